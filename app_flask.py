@@ -1,12 +1,85 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import os
+import json
+import time
+import random
+import logging
+import threading
 from dotenv import load_dotenv
 
+from scripts.configuracion import cargar_opciones, obtener_ruta_estado, obtener_ruta_eventos, obtener_ruta_tienda
+from scripts.planificador import ejecutar_en_exclusiva
+from scripts.webhooks import CABECERA_FIRMA, RegistroEventos, ProcesadorWebhooks, verificar_firma, interpretar_evento
+from scripts.tienda_simulada import TiendaSimulada, CuboLlamadas
+
 app = Flask(__name__)
 
 # Cargar variables de entorno
 load_dotenv()
 
+# Secreto de la aplicación en Tienda Nube, con el que se firman los webhooks
+client_secret = os.getenv("TIENDANUBE_CLIENT_SECRET")
+
+registro_eventos = None
+# Un procesador por tienda, por su user_id (store_id en los webhooks); el primero es el de la principal
+procesadores_webhooks = {}
+_bloqueo_procesador = threading.Lock()
+
+# Emulador de la API de productos de Tienda Nube para pruebas de carga sin conexión. Se activa con
+# EMULADOR_TIENDANUBE=1 y el sincronizador se apunta a él con API_BASE_URL=http://localhost:5000
+emulador_activo = os.getenv("EMULADOR_TIENDANUBE") == "1"
+emulador_latencia = float(os.getenv("EMULADOR_LATENCIA", "0"))
+emulador_proporcion_errores = float(os.getenv("EMULADOR_PROPORCION_ERRORES", "0"))
+tienda_emulada = TiendaSimulada(user_id=os.getenv("USER_ID", "1"))
+cubo_emulador = CuboLlamadas(int(os.getenv("EMULADOR_CAPACIDAD", "40")), float(os.getenv("EMULADOR_RITMO", "2")))
+
+
+def resincronizar_skus(skus, skus_productos, tienda):
+    """
+    Sincronización dirigida a los SKU afectados por los webhooks de una tienda: solo de stock si
+    vinieron de órdenes, y de precio, stock y variantes si algún producto se modificó en Tienda Nube.
+    """
+    from scripts.pipeline import ejecutar_sincronizacion_stock, ejecutar_sincronizacion_dirigida
+
+    # Corre dentro de la ráfaga del procesador, que ya tiene el bloqueo de las sincronizaciones
+    opciones = cargar_opciones()
+    if skus_productos:
+        return ejecutar_sincronizacion_dirigida(opciones, log_func=logging.info, stop_event=threading.Event(), skus=skus, tiendas=[tienda])
+    return ejecutar_sincronizacion_stock(opciones, log_func=logging.info, stop_event=threading.Event(), skus=skus, tiendas=[tienda])
+
+def en_tienda(tienda, funcion):
+    """funcion, llamando a la API de la tienda indicada desde el hilo del procesador."""
+    from scripts.sincronizador import usar_tienda
+
+    def llamar(*args):
+        with usar_tienda(tienda):
+            return funcion(*args)
+    return llamar
+
+def obtener_procesadores():
+    """Crea e inicia los procesadores de webhooks, uno por tienda, la primera vez que se necesitan."""
+    global registro_eventos
+    with _bloqueo_procesador:
+        if not procesadores_webhooks:
+            from scripts.sincronizador import obtener_producto, obtener_orden, cargar_tiendas
+
+            registro_eventos = RegistroEventos(obtener_ruta_eventos())
+            csv_path = cargar_opciones()['csv_path']
+            for tienda in cargar_tiendas():
+                # Los eventos sin store_id (por ejemplo, los del emisor de prueba) son de la principal
+                tiendas = (str(tienda.user_id), "") if tienda.nombre == "principal" else (str(tienda.user_id),)
+                procesador = ProcesadorWebhooks(
+                    registro_eventos, obtener_ruta_estado(obtener_ruta_tienda(csv_path, tienda.nombre)),
+                    obtener_producto=en_tienda(tienda, obtener_producto), obtener_orden=en_tienda(tienda, obtener_orden),
+                    resincronizar=lambda skus, skus_productos, tienda=tienda: resincronizar_skus(skus, skus_productos, tienda), tiendas=tiendas,
+                    en_exclusiva=lambda funcion, tienda=tienda: ejecutar_en_exclusiva(funcion, f"webhooks de la tienda {tienda.nombre}")
+                )
+                procesador.iniciar()
+                # Eventos que quedaron pendientes de una ejecución anterior
+                procesador.notificar()
+                procesadores_webhooks[str(tienda.user_id)] = procesador
+    return procesadores_webhooks
+
 @app.route('/')
 def home():
     return "API de Sincronización con Tienda Nube Activa"
@@ -21,10 +94,78 @@ def install():
 # Ruta para manejar webhooks
 @app.route('/webhook', methods=['POST'])
 def webhook():
-    data = request.json
-    # Aquí manejarías los eventos recibidos desde Tienda Nube
+    cuerpo = request.get_data()
+
+    if client_secret:
+        if not verificar_firma(cuerpo, request.headers.get(CABECERA_FIRMA), client_secret):
+            return jsonify({"message": "Firma no válida"}), 401
+    else:
+        logging.warning("TIENDANUBE_CLIENT_SECRET no está configurado: no se verifica la firma de los webhooks.")
+
+    try:
+        datos = json.loads(cuerpo or b"null")
+    except ValueError:
+        return jsonify({"message": "Cuerpo no válido"}), 400
+
+    evento = interpretar_evento(datos)
+    if evento is None:
+        return jsonify({"message": "Evento ignorado"}), 200
+
+    procesadores = obtener_procesadores()
+    tienda_id = str(datos.get("store_id") or "")
+    procesador = procesadores.get(tienda_id) if tienda_id else next(iter(procesadores.values()))
+    if procesador is None:
+        logging.warning(f"Webhook de la tienda {tienda_id}, que no está configurada: se ignora.")
+        return jsonify({"message": "Tienda no configurada"}), 200
+
+    # Solo se registra: Tienda Nube espera una respuesta rápida y el procesamiento se hace en segundo plano
+    nombre, recurso, recurso_id = evento
+    registro_eventos.agregar(nombre, recurso, recurso_id, tienda_id)
+    procesador.notificar()
     return jsonify({"message": "Webhook recibido"}), 200
 
+@app.route('/webhook/estado', methods=['GET'])
+def webhook_estado():
+    procesadores = obtener_procesadores()
+    return jsonify({
+        "eventos": registro_eventos.contar(),
+        "skus_pendientes": sorted(set().union(*(procesador.skus_pendientes for procesador in procesadores.values())))
+    })
+
+def emular_api(user_id, ruta):
+    permitida, cabeceras = cubo_emulador.consumir()
+    if not permitida:
+        return jsonify({"code": 429, "message": "Too Many Requests"}), 429, cabeceras
+
+    if emulador_latencia:
+        time.sleep(emulador_latencia)
+    if emulador_proporcion_errores and random.random() < emulador_proporcion_errores:
+        estado = random.choice((500, 502, 503, 504))
+        return jsonify({"code": estado, "message": "Error simulado"}), estado, cabeceras
+
+    estado, cuerpo, cabeceras_tienda = tienda_emulada.manejar(request.method, request.url, request.get_data())
+    return Response(json.dumps(cuerpo), status=estado, headers={**cabeceras, **cabeceras_tienda}, mimetype="application/json")
+
+def emulador_catalogo():
+    """Carga productos (formato de procesar_csv_a_json) en la tienda emulada."""
+    productos = request.get_json(silent=True) or []
+    if request.args.get("reemplazar") == "1":
+        tienda_emulada.vaciar()
+    tienda_emulada.cargar(productos)
+    return jsonify({"productos": len(tienda_emulada.productos)})
+
+def emulador_estado():
+    return jsonify({
+        "productos": len(tienda_emulada.productos),
+        "variantes": sum(len(producto["variants"]) for producto in list(tienda_emulada.productos.values())),
+        "rechazadas_por_limite": cubo_emulador.rechazadas
+    })
+
+if emulador_activo:
+    app.add_url_rule('/v1/<user_id>/<path:ruta>', 'emular_api', emular_api, methods=['GET', 'POST', 'PUT', 'DELETE'])
+    app.add_url_rule('/emulador/catalogo', 'emulador_catalogo', emulador_catalogo, methods=['POST'])
+    app.add_url_rule('/emulador/estado', 'emulador_estado', emulador_estado, methods=['GET'])
+    logging.warning(f"Emulador de Tienda Nube activo (latencia {emulador_latencia} s, errores {emulador_proporcion_errores:.0%}).")
+
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0')
-
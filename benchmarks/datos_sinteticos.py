@@ -0,0 +1,102 @@
+# benchmarks/datos_sinteticos.py
+
+import os
+import csv
+import random
+
+from scripts.fuentes import ESQUEMA_FACTUSOL, crear_base_sqlite
+
+# Proporciones parecidas a las de un catálogo real de Factusol
+PROPORCION_PUBLICADOS = 0.9
+PROPORCION_CON_VARIANTES = 0.25
+TALLAS = ["XS", "S", "M", "L", "XL", "XXL", "36", "38", "40", "42", "44", "46"]
+COLORES = ["Negro", "Blanco", "Rojo", "Azul", "Verde"]
+PROPORCION_CON_COLOR = 0.3
+PROPORCION_SIN_PRECIO = 0.02
+PROPORCION_SIN_STOCK = 0.1
+# Parte del stock está en un segundo almacén, para que la exportación tenga que sumarlo
+PROPORCION_DOS_ALMACENES = 0.3
+
+SECCIONES = ["Indumentaria", "Calzado", "Accesorios", "Hogar"]
+FAMILIAS_POR_SECCION = 5
+
+COLUMNAS = {tabla: list(columnas) for tabla, columnas in ESQUEMA_FACTUSOL.items()}
+
+
+def repartir_stock(azar, stock):
+    if stock > 0 and azar.random() < PROPORCION_DOS_ALMACENES:
+        tienda = azar.randint(0, stock)
+        return [("GEN", stock - tienda), ("TDA", tienda)]
+    return [("GEN", stock)]
+
+def generar_filas(articulos, semilla=0):
+    """
+    Filas de las tablas de Factusol para la cantidad de artículos indicada. Devuelve un diccionario
+    {tabla: lista de filas} con las columnas de COLUMNAS. Con la misma semilla los datos son iguales.
+    """
+    azar = random.Random(semilla)
+    tablas = {tabla: [] for tabla in COLUMNAS}
+    tablas["F_ALM"].append(["GEN", "Almacén general"])
+    tablas["F_ALM"].append(["TDA", "Tienda"])
+    tablas["F_TAR"].append(["1", "Precio de venta"])
+    familias = []
+    for numero_seccion, seccion in enumerate(SECCIONES):
+        codigo_seccion = f"S{numero_seccion:02d}"
+        tablas["F_SEC"].append([codigo_seccion, seccion])
+        for numero_familia in range(FAMILIAS_POR_SECCION):
+            codigo_familia = f"F{numero_seccion:02d}{numero_familia:02d}"
+            tablas["F_FAM"].append([codigo_familia, f"{seccion} {numero_familia + 1}", codigo_seccion])
+            familias.append(codigo_familia)
+
+    for numero in range(articulos):
+        codigo = f"ART{numero:07d}"
+        costo = round(azar.uniform(1, 200), 2)
+        precio = round(costo * azar.uniform(1.3, 2.5), 2)
+        tablas["F_ART"].append([
+            codigo, f"Artículo sintético {numero}", f"Descripción del artículo {numero}",
+            "1" if azar.random() < PROPORCION_PUBLICADOS else "0",
+            f"{7790000000000 + numero}", costo, azar.choice(familias)
+        ])
+
+        if azar.random() < PROPORCION_CON_VARIANTES:
+            tallas = azar.sample(TALLAS, azar.randint(2, 6))
+            colores = azar.sample(COLORES, azar.randint(1, 2)) if azar.random() < PROPORCION_CON_COLOR else [""]
+            for talla in tallas:
+                for color in colores:
+                    stock = 0 if azar.random() < PROPORCION_SIN_STOCK else azar.randint(-2, 40)
+                    tablas["F_ARC"].append([codigo, talla, color])
+                    for almacen, cantidad in repartir_stock(azar, stock):
+                        tablas["F_STC"].append([almacen, codigo, talla, color, cantidad])
+                    if azar.random() >= PROPORCION_SIN_PRECIO:
+                        tablas["F_LTC"].append(["1", codigo, talla, color, precio])
+        else:
+            stock = 0 if azar.random() < PROPORCION_SIN_STOCK else azar.randint(-2, 120)
+            for almacen, cantidad in repartir_stock(azar, stock):
+                tablas["F_STO"].append([almacen, codigo, cantidad])
+            if azar.random() >= PROPORCION_SIN_PRECIO:
+                tablas["F_LTA"].append(["1", codigo, precio])
+
+    return tablas
+
+def escribir_csv(tablas, directorio):
+    """Escribe las tablas con el mismo formato que exportar_a_csv (separador ';', UTF-8, con cabecera)."""
+    if not os.path.exists(directorio):
+        os.makedirs(directorio)
+
+    for tabla, filas in tablas.items():
+        with open(os.path.join(directorio, f"{tabla}.csv"), 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo, delimiter=';')
+            escritor.writerow(COLUMNAS[tabla])
+            escritor.writerows(filas)
+
+def generar_factusol(directorio, articulos, semilla=0):
+    """Tablas sintéticas como carpeta de CSV."""
+    tablas = generar_filas(articulos, semilla)
+    escribir_csv(tablas, directorio)
+    return {tabla: len(filas) for tabla, filas in tablas.items()}
+
+def generar_sqlite(ruta, articulos, semilla=0):
+    """Tablas sintéticas como base SQLite, para medir también la exportación."""
+    tablas = generar_filas(articulos, semilla)
+    crear_base_sqlite(ruta, tablas)
+    return {tabla: len(filas) for tabla, filas in tablas.items()}
@@ -0,0 +1,185 @@
+"""
+Benchmarks de la sincronización con datos sintéticos de Factusol y una Tienda Nube simulada.
+
+Para cada tamaño se generan las tablas de Factusol en una base SQLite, se carga en la tienda
+simulada un catálogo con diferencias realistas respecto de ellas (stock y precios distintos, altas
+y bajas) y se mide cada etapa del motor real, desde la exportación: tiempo y pico de memoria
+(tracemalloc). Después se sincroniza otra vez con los mismos datos, que no debería cambiar nada:
+si todavía planifica operaciones, se avisa. Los resultados se guardan en benchmarks/resultados/
+para comparar versiones.
+
+Ejemplos:
+    python -m benchmarks.ejecutar --articulos 1000,10000
+    python -m benchmarks.ejecutar --db C:\\Factusol\\empresa.accdb          # con una base real
+    python -m benchmarks.ejecutar --articulos 50000 --sin-memoria           # tiempos sin el costo de tracemalloc
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.datos_sinteticos import generar_sqlite
+from benchmarks.tienda_local import conectar_tienda_simulada
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# Diferencias entre Factusol y la tienda simulada
+PROPORCION_FALTANTES = 0.03
+PROPORCION_SOBRANTES = 0.02
+PROPORCION_STOCK_DISTINTO = 0.10
+PROPORCION_PRECIO_DISTINTO = 0.03
+
+
+class Medicion:
+    def __init__(self, memoria=True):
+        self.memoria = memoria
+        self.etapas = {}
+
+    def medir(self, nombre, funcion, *args, **kwargs):
+        if self.memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            resultado = {"segundos": round(time.perf_counter() - inicio, 4)}
+            if self.memoria:
+                resultado["memoria_pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+                tracemalloc.stop()
+            self.etapas[nombre] = resultado
+            print(f"  {nombre}: {resultado['segundos']:.3f} s" + (f", {resultado['memoria_pico_mb']} MB" if self.memoria else ""))
+
+
+def catalogo_remoto(productos, semilla=0):
+    """Copia de los productos con las diferencias que la sincronización tiene que corregir."""
+    azar = random.Random(semilla)
+    remotos = []
+
+    for producto in productos:
+        if azar.random() < PROPORCION_FALTANTES:
+            continue
+        remoto = copy.deepcopy(producto)
+        for variante in remoto["variants"]:
+            if azar.random() < PROPORCION_STOCK_DISTINTO:
+                variante["stock"] = (variante.get("stock") or 0) + azar.randint(1, 10)
+            if azar.random() < PROPORCION_PRECIO_DISTINTO and variante.get("price"):
+                variante["price"] = str(round(float(variante["price"]) * 1.1, 2))
+        remotos.append(remoto)
+
+    for numero in range(int(len(productos) * PROPORCION_SOBRANTES)):
+        remotos.append({
+            "name": {"es": f"Producto discontinuado {numero}"},
+            "published": True,
+            "variants": [{"sku": f"BAJA{numero:07d}", "price": "10", "stock": 1, "values": []}]
+        })
+
+    return remotos
+
+def comparar_productos(sincronizador, productos_nuevos, productos_remotos):
+    """Ejecuta productos_iguales para cada producto de Factusol que existe en la tienda."""
+    remotos_por_sku = {sincronizador.normalizar_sku(producto["variants"][0].get("sku")): producto for producto in productos_remotos if producto["variants"]}
+    iguales = 0
+    for producto in productos_nuevos:
+        remoto = remotos_por_sku.get(sincronizador.normalizar_sku(producto["sku"]))
+        if remoto and sincronizador.productos_iguales(remoto, producto):
+            iguales += 1
+    return iguales
+
+def ejecutar_tamano(articulos, directorio, memoria=True, db_path=None, latencia=0.0):
+    from scripts import sincronizador, estadisticas
+    from scripts.validacion import validar_productos
+
+    print(f"\n{articulos} artículos" if articulos else f"\nBase de datos {db_path}")
+    medicion = Medicion(memoria)
+    csv_path = os.path.join(directorio, f"factusol_{articulos or 'db'}")
+
+    if db_path:
+        filas = None
+    else:
+        db_path = os.path.join(directorio, f"factusol_{articulos}.sqlite")
+        filas = generar_sqlite(db_path, articulos)
+    # Las tablas de la configuración por defecto: precios, stock y variantes
+    tablas = sincronizador.tablas_necesarias({"precios", "stock", "variantes"})
+    medicion.medir("exportacion", sincronizador.exportar_a_csv, db_path, csv_path, tablas=tablas)
+
+    productos = medicion.medir("transformacion", sincronizador.procesar_csv_a_json, [os.path.join(csv_path, f"{tabla}.csv") for tabla in tablas])
+    productos_validos, informe = medicion.medir("validacion", validar_productos, productos)
+
+    tienda = conectar_tienda_simulada(sincronizador, latencia=latencia)
+    tienda.cargar(catalogo_remoto(productos_validos))
+    remotos = list(tienda.productos.values())
+    iguales = medicion.medir("comparacion", comparar_productos, sincronizador, productos_validos, remotos)
+
+    stats = estadisticas.iniciar("benchmark")
+    sincronizar = lambda: sincronizador.sincronizar_productos(
+        productos_validos, log_func=lambda mensaje: None, stop_event=threading.Event(),
+        gestionar_precio=True, gestionar_stock=True, crear_productos=True, accion_no_existentes="Ocultar",
+        skus_excluidos=informe["skus_excluidos"]
+    )
+    resumen = medicion.medir("sincronizacion", sincronizar)
+    stats.finalizar("completada")
+
+    # Con la tienda ya al día, una segunda pasada no tiene que crear ni actualizar nada
+    repeticion = medicion.medir("sincronizacion_repetida", sincronizar)
+    cambios_repetidos = {clave: repeticion.get(clave) for clave in ("creados", "actualizados", "ocultados", "errores") if repeticion.get(clave)}
+    if cambios_repetidos:
+        print(f"  AVISO: la segunda sincronización con los mismos datos todavía aplicó cambios: {cambios_repetidos}")
+
+    return {
+        "articulos": articulos,
+        "filas": filas,
+        "productos": len(productos),
+        "productos_validos": len(productos_validos),
+        "productos_iguales": iguales,
+        "etapas": medicion.etapas,
+        "sincronizacion": {clave: resumen.get(clave) for clave in ("creados", "actualizados", "ocultados", "errores")},
+        "sincronizacion_repetida": {clave: repeticion.get(clave) for clave in ("creados", "actualizados", "ocultados", "errores")},
+        "estadisticas": {clave: stats.como_dict()[clave] for clave in ("etapas", "llamadas_api", "bytes_enviados", "bytes_recibidos")}
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la sincronización con datos sintéticos.")
+    parser.add_argument("--articulos", default="1000,10000", help="Tamaños a medir, separados por comas (por ejemplo 1000,10000,100000).")
+    parser.add_argument("--db", help="Base de datos de Factusol real (Access, SQLite o carpeta de CSV) en lugar de datos sintéticos; se ignora --articulos.")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir memoria (tracemalloc hace más lentas las etapas).")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de latencia simulada por llamada a la API.")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto en benchmarks/resultados/).")
+    args = parser.parse_args(argv)
+
+    from scripts import sincronizador  # noqa: F401  Configura el logging en DEBUG al importarse
+    logging.getLogger().setLevel(logging.WARNING)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        tamanos = [None] if args.db else [int(valor) for valor in args.articulos.split(",")]
+        for articulos in tamanos:
+            resultados.append(ejecutar_tamano(articulos, directorio, not args.sin_memoria, args.db, args.latencia))
+
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "memoria_medida": not args.sin_memoria,
+        "resultados": resultados
+    }
+
+    salida = args.salida or os.path.join(DIRECTORIO_RESULTADOS, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    directorio_salida = os.path.dirname(salida)
+    if directorio_salida and not os.path.exists(directorio_salida):
+        os.makedirs(directorio_salida)
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {salida}")
+
+if __name__ == "__main__":
+    main()
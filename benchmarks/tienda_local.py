@@ -0,0 +1,55 @@
+# benchmarks/tienda_local.py
+
+import json
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from scripts.tienda_simulada import TiendaSimulada
+
+
+class AdaptadorTiendaSimulada(BaseAdapter):
+    """
+    Adaptador de requests que responde con una TiendaSimulada en el mismo proceso, sin red.
+    Se monta sobre la sesión del sincronizador para que el motor real corra contra el catálogo
+    simulado. latencia agrega una espera fija (segundos) a cada llamada.
+    """
+
+    def __init__(self, tienda, latencia=0.0):
+        super().__init__()
+        self.tienda = tienda
+        self.latencia = latencia
+
+    def send(self, request, **kwargs):
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        estado, cuerpo, cabeceras = self.tienda.manejar(request.method, request.url, request.body)
+
+        respuesta = requests.Response()
+        respuesta.status_code = estado
+        respuesta._content = json.dumps(cuerpo).encode('utf-8')
+        respuesta.headers = CaseInsensitiveDict({
+            "Content-Type": "application/json",
+            # Siempre con margen, para que manejar_rate_limit no agregue esperas a la medición
+            "x-rate-limit-limit": "40",
+            "x-rate-limit-remaining": "40",
+            "x-rate-limit-reset": "0",
+            **cabeceras
+        })
+        respuesta.encoding = "utf-8"
+        respuesta.url = request.url
+        respuesta.request = request
+        return respuesta
+
+    def close(self):
+        pass
+
+
+def conectar_tienda_simulada(sincronizador, tienda=None, latencia=0.0):
+    """Dirige las llamadas del sincronizador a una TiendaSimulada y la devuelve."""
+    tienda = tienda or TiendaSimulada(user_id=sincronizador.user_id)
+    sincronizador.sesion.mount(f"{sincronizador.api_base}/", AdaptadorTiendaSimulada(tienda, latencia))
+    return tienda
@@ -0,0 +1,146 @@
+"""
+Sincronización Factusol → Tienda Nube sin ventana, para el Programador de tareas de Windows, cron o servidores.
+
+Usa el mismo config.txt que la aplicación de escritorio y escribe en la salida estándar un resumen
+JSON de la ejecución. Los mensajes de log van a la salida de error.
+
+Ejemplos:
+    python cli.py                      # exportar, transformar y sincronizar
+    python cli.py --modo stock         # solo cambios de stock
+    python cli.py --modo incremental   # solo artículos que cambiaron en Factusol desde la última sincronización
+    python cli.py --vigilar            # sincronización incremental cada vez que cambia la base de datos
+    python cli.py --solo-planificar    # calcular y guardar el plan sin escribir en Tienda Nube
+    python cli.py --aplicar-plan       # aplicar el último plan guardado
+    python cli.py --perfilar           # perfilar cada etapa para diagnosticar lentitud
+"""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+
+# Códigos de salida
+SALIDA_OK = 0
+SALIDA_ERROR = 1
+SALIDA_SKUS_DUPLICADOS = 2
+SALIDA_EN_CURSO = 3
+SALIDA_CANCELADA = 130
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Sincronizador Factusol | Tienda Nube sin interfaz gráfica.")
+    parser.add_argument("--config", help="Ruta de config.txt (por defecto la misma que usa la aplicación de escritorio).")
+    parser.add_argument("--modo", choices=["completa", "stock", "incremental"], default="completa", help="Sincronización completa, solo de stock o solo de los artículos modificados.")
+    accion = parser.add_mutually_exclusive_group()
+    accion.add_argument("--solo-planificar", action="store_true", help="Calcula y guarda el plan sin escribir en Tienda Nube.")
+    accion.add_argument("--aplicar-plan", nargs="?", const="", metavar="RUTA", help="Aplica un plan guardado (por defecto el último calculado).")
+    accion.add_argument("--vigilar", action="store_true", help="Queda en ejecución y sincroniza los cambios cada vez que se modifica la base de datos.")
+    parser.add_argument("--tiempo-limite", type=float, metavar="MINUTOS", help="Tiempo máximo para aplicar cambios; lo restante queda pendiente.")
+    parser.add_argument("--perfilar", action="store_true", help="Perfila cada etapa con cProfile y guarda los resultados junto a los logs.")
+    parser.add_argument("--medir-memoria", action="store_true", help="Mide la memoria de Python por etapa con tracemalloc e informa dónde se asigna.")
+    parser.add_argument("--nivel-log", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return parser
+
+def codigo_salida(resumen):
+    estado = resumen.get("estado")
+    if estado in ("completada", "stock_desactivado"):
+        return SALIDA_OK
+    if estado == "cancelada":
+        return SALIDA_CANCELADA
+    if estado == "skus_duplicados":
+        return SALIDA_SKUS_DUPLICADOS
+    if estado == "en_curso":
+        return SALIDA_EN_CURSO
+    return SALIDA_ERROR
+
+def en_exclusiva(modo, sincronizar):
+    """
+    Ejecuta la sincronización con el mismo bloqueo que la aplicación de escritorio y el servidor de
+    webhooks. Si otro proceso está sincronizando, devuelve un resumen con estado "en_curso".
+    """
+    from scripts.planificador import ejecutar_en_exclusiva
+
+    resultado = {}
+
+    def ejecutar():
+        try:
+            resultado["resumen"] = sincronizar()
+        except Exception as e:
+            logging.exception("Error en la sincronización")
+            resultado["resumen"] = {"modo": modo, "estado": "error", "error": str(e)}
+
+    if not ejecutar_en_exclusiva(ejecutar, f"sincronización {modo} (cli)", logging.info):
+        return {"modo": modo, "estado": "en_curso"}
+    return resultado["resumen"]
+
+def vigilar(opciones, stop_event, sincronizar):
+    """Sincroniza tras cada cambio en la base de datos hasta recibir Ctrl+C; escribe un resumen JSON por ejecución."""
+    from scripts.vigilante import VigilanteBaseDatos
+
+    def al_cambiar(registrar_lectura):
+        resumen = en_exclusiva("incremental", lambda: sincronizar(opciones, log_func=logging.info, stop_event=stop_event, al_exportar=registrar_lectura))
+        print(json.dumps(resumen, ensure_ascii=False, default=str), flush=True)
+        # Si otro proceso estaba sincronizando, el vigilante vuelve a intentarlo más tarde
+        return resumen["estado"] != "en_curso"
+
+    from scripts.configuracion import rutas_bases
+
+    vigilante = VigilanteBaseDatos(rutas_bases(opciones), al_cambiar, espera_silencio=opciones['espera_cambios_segundos'])
+    vigilante.iniciar()
+    while not stop_event.wait(1):
+        pass
+    vigilante.detener()
+    return SALIDA_OK
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+
+    # El log tiene que configurarse antes de importar el sincronizador para que no escriba en stdout
+    logging.basicConfig(level=getattr(logging, args.nivel_log), format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+
+    from scripts.configuracion import leer_configuracion, cargar_opciones
+    from scripts.pipeline import ejecutar_sincronizacion, ejecutar_sincronizacion_stock, ejecutar_sincronizacion_incremental, aplicar_plan_guardado
+
+    try:
+        opciones = cargar_opciones(leer_configuracion(args.config))
+    except ValueError as e:
+        logging.error(str(e))
+        print(json.dumps({"modo": args.modo, "estado": "error", "error": str(e)}, ensure_ascii=False))
+        return SALIDA_ERROR
+    if args.tiempo_limite is not None:
+        if args.tiempo_limite <= 0:
+            crear_parser().error("--tiempo-limite debe ser mayor que cero.")
+        opciones['tiempo_limite'] = args.tiempo_limite * 60
+    if args.perfilar:
+        opciones['perfilar'] = True
+    if args.medir_memoria:
+        opciones['medir_memoria'] = True
+
+    # Ctrl+C o la detención de la tarea cancelan la sincronización de forma ordenada: el diario
+    # conserva lo aplicado y la próxima ejecución reanuda el plan
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    if args.vigilar:
+        return vigilar(opciones, stop_event, ejecutar_sincronizacion_incremental)
+
+    if args.aplicar_plan is not None:
+        sincronizar = lambda: aplicar_plan_guardado(opciones, log_func=logging.info, stop_event=stop_event, ruta_plan=args.aplicar_plan or None)
+    elif args.modo == "stock":
+        sincronizar = lambda: ejecutar_sincronizacion_stock(opciones, log_func=logging.info, stop_event=stop_event)
+    elif args.modo == "incremental":
+        sincronizar = lambda: ejecutar_sincronizacion_incremental(opciones, log_func=logging.info, stop_event=stop_event)
+    else:
+        sincronizar = lambda: ejecutar_sincronizacion(opciones, log_func=logging.info, stop_event=stop_event, solo_planificar=args.solo_planificar)
+
+    resumen = en_exclusiva(args.modo, sincronizar)
+
+    print(json.dumps(resumen, ensure_ascii=False, default=str))
+    return codigo_salida(resumen)
+
+if __name__ == "__main__":
+    sys.exit(main())
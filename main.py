@@ -1,34 +1,34 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox, Toplevel
-import shutil
-from tkinter import ttk
-from pathlib import Path
+# El registro de arranque se importa primero para medir el resto de la carga
+from scripts.arranque import registro_arranque
+
+with registro_arranque.medir("import tkinter"):
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, Toplevel
+    from tkinter import ttk
 import threading
+import queue
+import re
+import time
 import os
 import sys
-import configparser
 import webbrowser
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from dotenv import load_dotenv
-from scripts.sincronizador import procesar_csv_a_json, sincronizar_productos, exportar_a_csv
+with registro_arranque.medir("import dotenv"):
+    from dotenv import load_dotenv
+with registro_arranque.medir("import scripts.configuracion"):
+    from scripts.configuracion import obtener_ruta_config, leer_configuracion, cargar_opciones, obtener_ruta_estado_programaciones, obtener_ruta_logs, rutas_bases
+    from scripts.registro_logs import BufferLogs
+    from scripts.vigilante import VigilanteBaseDatos
+    from scripts.planificador import PlanificadorSincronizacion, programaciones_desde_opciones, ejecutar_en_exclusiva, sincronizacion_en_curso
 import logging
 
+# requests, la sincronización y APScheduler se cargan recién cuando se necesitan, para que la ventana
+# aparezca enseguida (en el ejecutable de un solo archivo su importación tarda varios segundos). pandas
+# y pyodbc los importa la fuente de Access al usarse: con SQLite o CSV no hacen falta
+MODULOS_SINCRONIZACION = ["requests", "scripts.pipeline"]
+
 def obtener_ruta_base():
     return os.path.dirname(os.path.abspath(__file__))
 
-def obtener_ruta_config():
-    if os.name == 'nt':  # Windows
-        carpeta_config = os.path.join(os.getenv('LOCALAPPDATA'), 'sincronizador_app')
-    else:  # Linux, Mac
-        carpeta_config = os.path.join(os.getenv('HOME'), '.config', 'sincronizador_app')
-
-    # Crear la carpeta si no existe
-    Path(carpeta_config).mkdir(parents=True, exist_ok=True)
-
-    # Ruta completa del archivo config.txt
-    return os.path.join(carpeta_config, 'config.txt')
-
 config_path = os.path.join(obtener_ruta_base(), 'config.txt')
 
 config_path = os.path.join(obtener_ruta_base(), 'scripts', 'config.txt')
@@ -58,58 +58,132 @@ if not os.path.exists(dotenv_path):
 if not os.path.exists(config_path):
     logging.error(f"No se encontró el archivo config.txt en: {config_path}")
 
-scheduler = BackgroundScheduler()
+planificador = None
+vigilante = None
 log_text = None
 running_thread = None
 stop_event = threading.Event()
 
+# Los hilos de sincronización nunca tocan los widgets: dejan sus mensajes en esta cola y el hilo de
+# Tk los vuelca al log por lotes a una frecuencia fija
+cola_logs = queue.Queue()
+INTERVALO_DRENADO_MS = 33
+MAX_LINEAS_POR_LOTE = 2000
+# Líneas que se conservan en pantalla; las anteriores pasan a los archivos de logs/
+MAX_LINEAS_LOG = 20000
+
 global productos_creados, productos_actualizados, productos_eliminados
 productos_creados = 0
 productos_actualizados = 0
 productos_eliminados = 0
 
 class TextHandler(logging.Handler):
-    def __init__(self, text_widget):
+    def __init__(self, text_widget, buffer_logs):
         super().__init__()
         self.text_widget = text_widget
+        # El widget muestra exactamente las líneas del buffer: la línea N del widget es la
+        # línea buffer_logs.primer_seq + N - 1 del log
+        self.buffer_logs = buffer_logs
+        self.lineas_en_widget = 0
         self.search_results = []
         self.current_match_index = 0
+        self.detalle_var = None
+        # Medición del caudal de líneas volcadas al widget
+        self.lineas_por_segundo = 0.0
+        self._inicio_medicion = time.monotonic()
+        self._lineas_medicion = 0
 
     def emit(self, record):
+        # Puede llamarse desde cualquier hilo: solo se encola
         try:
-            msg = self.format(record)
+            cola_logs.put(self.format(record))
+        except Exception as e:
+            print(f"Error al emitir log: {e}")
+
+    def drenar(self):
+        """Vuelca al widget un lote de los mensajes encolados. Solo debe llamarse desde el hilo de Tk."""
+        mensajes = []
+        try:
+            while len(mensajes) < MAX_LINEAS_POR_LOTE:
+                mensajes.append(cola_logs.get_nowait())
+        except queue.Empty:
+            pass
+
+        lineas = self.buffer_logs.agregar(mensajes) if mensajes else []
+        if lineas:
+            # Una sola inserción por lote en lugar de una por línea
             self.text_widget.config(state=tk.NORMAL)
-            self.text_widget.insert(tk.END, msg + "\n")
+            self.text_widget.insert(tk.END, "\n".join(lineas) + "\n")
+            self.lineas_en_widget += len(lineas)
+
+            # Se recortan del principio las líneas que el buffer ya volcó a disco
+            exceso = self.lineas_en_widget - len(self.buffer_logs.lineas)
+            if exceso > 0:
+                self.text_widget.delete("1.0", f"{exceso + 1}.0")
+                self.lineas_en_widget -= exceso
+
             self.text_widget.see(tk.END)
             self.text_widget.config(state=tk.DISABLED)
-        except Exception as e:
-            print(f"Error al emitir log: {e}")
 
-    def buscar_en_logs(self, search_term):
+        self._lineas_medicion += len(lineas)
+        transcurrido = time.monotonic() - self._inicio_medicion
+        if transcurrido >= 1:
+            self.lineas_por_segundo = self._lineas_medicion / transcurrido
+            self._lineas_medicion = 0
+            self._inicio_medicion = time.monotonic()
+
+        return len(lineas)
+
+    def iniciar_drenado(self, root, caudal_var=None):
+        """Programa el volcado periódico de la cola en el bucle de Tk."""
+        def ciclo():
+            self.drenar()
+            if caudal_var is not None:
+                caudal_var.set(f"Log: {self.lineas_por_segundo:.0f} líneas/s")
+            root.after(INTERVALO_DRENADO_MS, ciclo)
+
+        root.after(INTERVALO_DRENADO_MS, ciclo)
+
+    def buscar_en_logs(self, search_term, regex=False):
         self.text_widget.tag_remove("current_highlight", "1.0", tk.END)
         self.search_results.clear()
 
         if search_term:
-            start_pos = "1.0"
-            while True:
-                start_pos = self.text_widget.search(search_term, start_pos, stopindex=tk.END)
-                if not start_pos:
-                    break
-                end_pos = f"{start_pos}+{len(search_term)}c"
-                self.search_results.append((start_pos, end_pos))
-                start_pos = end_pos
+            # La búsqueda abarca también las líneas que ya no están en pantalla
+            try:
+                self.search_results = self.buffer_logs.buscar(search_term, regex=regex)
+            except re.error as e:
+                self.mostrar_detalle(f"Expresión regular no válida: {e}")
+                return
 
             if self.search_results:
                 self.current_match_index = 0
                 self.mostrar_coincidencia()
+            else:
+                self.mostrar_detalle("Sin coincidencias.")
+
+    def mostrar_detalle(self, texto):
+        if self.detalle_var is not None:
+            self.detalle_var.set(texto)
 
     def mostrar_coincidencia(self):
         if self.search_results:
             self.text_widget.tag_remove("current_highlight", "1.0", tk.END)
-            current_pos, end_pos = self.search_results[self.current_match_index]
+            seq, inicio, fin, linea = self.search_results[self.current_match_index]
+            posicion = f"Coincidencia {self.current_match_index + 1} de {len(self.search_results)}"
+
+            # Si la línea ya se volcó a disco se muestra debajo del buscador
+            primera_en_widget = self.buffer_logs.primer_seq
+            if seq < primera_en_widget:
+                self.mostrar_detalle(f"{posicion} (log archivado): {linea}")
+                return
+
+            numero_linea = seq - primera_en_widget + 1
+            current_pos, end_pos = f"{numero_linea}.{inicio}", f"{numero_linea}.{fin}"
             self.text_widget.tag_add("current_highlight", current_pos, end_pos)
             self.text_widget.tag_config("current_highlight", background="orange", foreground="black")
             self.text_widget.see(current_pos)
+            self.mostrar_detalle(posicion)
 
     def siguiente_coincidencia(self):
         if self.search_results:
@@ -121,45 +195,51 @@ class TextHandler(logging.Handler):
             self.current_match_index = (self.current_match_index - 1) % len(self.search_results)
             self.mostrar_coincidencia()
 
+def cargar_pipeline():
+    """Importa los módulos de sincronización la primera vez que se usan y registra cuánto tardó cada uno."""
+    if "scripts.pipeline" not in sys.modules:
+        desde = len(registro_arranque.mediciones)
+        for nombre_modulo in MODULOS_SINCRONIZACION:
+            registro_arranque.importar(nombre_modulo)
+        registro_arranque.registrar_informe("Carga de módulos de sincronización", desde)
+    return sys.modules["scripts.pipeline"]
+
+def obtener_planificador(log_func):
+    global planificador
+    if planificador is None:
+        registro_arranque.importar("apscheduler.schedulers.background")
+        planificador = PlanificadorSincronizacion(obtener_ruta_estado_programaciones(), log_func=log_func)
+    return planificador
+
 def limpiar_estado():
     global productos_creados, productos_actualizados, productos_eliminados
     productos_creados = 0
     productos_actualizados = 0
     productos_eliminados = 0
-    if scheduler.running:
-        scheduler.shutdown()
+    if planificador:
+        planificador.detener()
+    if vigilante:
+        vigilante.detener()
     if running_thread and running_thread.is_alive():
         stop_event.set()
 
-def leer_configuracion():
-    config = configparser.ConfigParser()
-    config_path = obtener_ruta_config()
-
-    # Crear archivo de configuración si no existe y copiar valores por defecto
-    if not os.path.exists(config_path):
-        # Copiar config.txt predeterminado desde la carpeta empaquetada
-        ruta_predeterminada = os.path.join(obtener_ruta_base(), 'scripts', 'config.txt')
-        shutil.copy(ruta_predeterminada, config_path)
-        logging.info(f"Archivo config.txt copiado a {config_path}")
-
-    # Leer el archivo de configuración
-    config.read(config_path)
-    return config
-
-def guardar_configuracion(db_path, csv_path, gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes, hora_sincronizacion):
+def guardar_configuracion(db_path, csv_path, gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes, hora_sincronizacion, intervalo_stock_minutos, vigilar_base_datos, perfilar):
     config = leer_configuracion()
     config_path = obtener_ruta_config()
 
-    # Guardar todas las configuraciones como strings
-    config['DEFAULT'] = {
+    # Guardar todas las configuraciones como strings (las opciones avanzadas que no están en la ventana se conservan)
+    config['DEFAULT'].update({
         'db_path': db_path.get(),
         'csv_path': csv_path.get(),
         'hora_sincronizacion': hora_sincronizacion.get(),
+        'intervalo_stock_minutos': intervalo_stock_minutos.get(),
+        'vigilar_base_datos': str(vigilar_base_datos.get()),
+        'perfilar': str(perfilar.get()),
         'gestionar_precio': str(gestionar_precio.get()),  # Convertimos el valor booleano a string
         'gestionar_stock': str(gestionar_stock.get()),    # Convertimos el valor booleano a string
         'crear_productos': str(crear_productos.get()),    # Convertimos el valor booleano a string
         'accion_no_existentes': accion_no_existentes.get()
-    }
+    })
 
     with open(config_path, 'w') as configfile:
         config.write(configfile)
@@ -223,7 +303,7 @@ def main():
     def seleccionar_db():
         path = filedialog.askopenfilename(
             title="Seleccionar archivo de base de datos de Factusol",
-            filetypes=[("Access Database", "*.mdb;*.accdb"), ("All Files", "*.*")]
+            filetypes=[("Access Database", "*.mdb;*.accdb"), ("SQLite", "*.sqlite;*.sqlite3;*.db"), ("All Files", "*.*")]
         )
         if path:
             db_path.set(path)
@@ -269,104 +349,144 @@ def main():
         return skus_duplicados
 
 
-    def sincronizacion_manual():
+    def opciones_actuales():
+        """Opciones de config.txt con los valores que el usuario tiene seleccionados en la ventana."""
+        opciones = cargar_opciones()
+        opciones.update({
+            'db_path': db_path.get(),
+            'csv_path': csv_path.get(),
+            'gestionar_precio': gestionar_precio.get(),
+            'gestionar_stock': gestionar_stock.get(),
+            'crear_productos': crear_productos.get(),
+            'accion_no_existentes': accion_no_existentes.get(),
+            'hora_sincronizacion': hora_sincronizacion.get(),
+            'intervalo_stock_minutos': intervalo_stock_minutos.get(),
+            'vigilar_base_datos': vigilar_base_datos.get(),
+            'perfilar': perfilar.get()
+        })
+        return opciones
+
+    def sincronizacion_manual(solo_planificar=False):
         global running_thread
         try:
-            logging.info("Iniciando sincronización manual...")
-            if stop_event.is_set():
-                logging.info("Sincronización cancelada antes de comenzar.")
-                return
+            resumen = cargar_pipeline().ejecutar_sincronizacion(opciones_actuales(), log_func=log, stop_event=stop_event, solo_planificar=solo_planificar)
 
-            exportar_a_csv(db_path.get(), csv_path.get(), send_to_gui=log)
-
-            if stop_event.is_set():
-                logging.info("Sincronización cancelada después de exportar CSV.")
-                return
-
-            csv_files = [
-                os.path.join(csv_path.get(), "F_ART.csv"),
-                os.path.join(csv_path.get(), "F_LTA.csv"),
-                os.path.join(csv_path.get(), "F_STO.csv"),
-                os.path.join(csv_path.get(), "F_ARC.csv"),
-                os.path.join(csv_path.get(), "F_STC.csv"),
-                os.path.join(csv_path.get(), "F_LTC.csv")
-            ]
-
-            productos_nuevos = procesar_csv_a_json(csv_files)
-
-            # Verificar si hay productos con SKUs duplicados
-            skus = [producto['sku'] for producto in productos_nuevos]
-            skus_duplicados = [sku for sku in set(skus) if skus.count(sku) > 1]
+            if resumen["estado"] == "skus_duplicados":
+                # Mostrar la advertencia en la interfaz gráfica
+                root.after(0, advertencia_productos_duplicados, resumen["skus_duplicados"])
 
-            if skus_duplicados:
-                # Registrar en el logging
-                mensaje_duplicados = f"Se encontraron SKUs duplicados: {', '.join(skus_duplicados)}. Por favor, corrígelos antes de continuar."
-                logging.warning(mensaje_duplicados)
-                log(mensaje_duplicados)
+        except Exception as e:
+            logging.info(f"Error en sincronización manual: {e}")
+        finally:
+            running_thread = None
+            stop_event.clear()
 
-                # Mostrar la advertencia en la interfaz gráfica
-                advertencia_productos_duplicados(skus_duplicados)
 
-                # Detener el proceso ya que no podemos continuar con SKUs duplicados
-                return
+    def sincronizacion_stock():
+        global running_thread
+        try:
+            cargar_pipeline().ejecutar_sincronizacion_stock(opciones_actuales(), log_func=log, stop_event=stop_event)
+        except Exception as e:
+            logging.info(f"Error en sincronización de stock: {e}")
+        finally:
+            running_thread = None
+            stop_event.clear()
 
-            # Pasar los valores de los checkboxes a la función de sincronización
-            sincronizar_productos(
-                productos_nuevos,
-                log_func=log,
-                stop_event=stop_event,
-                gestionar_precio=gestionar_precio.get(),
-                gestionar_stock=gestionar_stock.get(),
-                crear_productos=crear_productos.get(),
-                accion_no_existentes=accion_no_existentes.get()  # Usar valor de string
-            )
+    def sincronizacion_incremental(al_exportar=None):
+        global running_thread
+        try:
+            resumen = cargar_pipeline().ejecutar_sincronizacion_incremental(opciones_actuales(), log_func=log, stop_event=stop_event, al_exportar=al_exportar)
 
+            if resumen["estado"] == "skus_duplicados":
+                root.after(0, advertencia_productos_duplicados, resumen["skus_duplicados"])
         except Exception as e:
-            logging.info(f"Error en sincronización manual: {e}")
+            logging.info(f"Error en sincronización incremental: {e}")
         finally:
             running_thread = None
             stop_event.clear()
 
+    def aplicacion_plan_guardado():
+        global running_thread
+        try:
+            cargar_pipeline().aplicar_plan_guardado(opciones_actuales(), log_func=log, stop_event=stop_event)
+        except Exception as e:
+            logging.info(f"Error al aplicar el plan guardado: {e}")
+        finally:
+            running_thread = None
+            stop_event.clear()
 
     def log(message):
-        if log_text:
-            log_text.config(state=tk.NORMAL)
-            log_text.insert(tk.END, message + "\n")
-            log_text.see(tk.END)
-            log_text.config(state=tk.DISABLED)
+        # Se llama desde los hilos de sincronización: el mensaje se muestra en el próximo volcado
+        cola_logs.put(message)
         print(f"{message}")
 
     def iniciar_sincronizacion():
+        iniciar_en_segundo_plano(sincronizacion_manual)
+
+    def iniciar_planificacion():
+        iniciar_en_segundo_plano(lambda: sincronizacion_manual(solo_planificar=True))
+
+    def iniciar_sincronizacion_stock():
+        iniciar_en_segundo_plano(sincronizacion_stock)
+
+    def iniciar_aplicacion_plan():
+        iniciar_en_segundo_plano(aplicacion_plan_guardado)
+
+    def iniciar_en_segundo_plano(target):
         global running_thread
-        if running_thread is None:
-            running_thread = threading.Thread(target=sincronizacion_manual)
+        if (running_thread is None or not running_thread.is_alive()) and not sincronizacion_en_curso():
+            # El bloqueo compartido evita que coincida con una sincronización programada
+            running_thread = threading.Thread(target=lambda: ejecutar_en_exclusiva(target, "sincronización manual", log))
             running_thread.start()
         else:
             log("Sincronización ya en ejecución.")
 
     def cancelar_sincronizacion():
         global running_thread
-        if running_thread and running_thread.is_alive():
+        if (running_thread and running_thread.is_alive()) or sincronizacion_en_curso():
             log("Solicitando cancelación de la sincronización...")
             stop_event.set()
         else:
             log("No hay sincronización en curso.")
 
     def activar_sincronizacion_automatica():
-        hora = hora_sincronizacion.get()
-        if hora:
-            try:
-                hh, mm = hora.split(":")
-                scheduler.add_job(sincronizacion_manual, CronTrigger(hour=hh, minute=mm))
-                scheduler.start()
-                log(f"Sincronización automática programada a las {hora}.")
-            except Exception as e:
-                log(f"Error al programar la sincronización automática: {e}")
-        else:
-            log("Por favor, seleccione una hora válida (HH:MM) para la sincronización automática.")
+        global vigilante
+        try:
+            opciones = opciones_actuales()
+            programaciones = programaciones_desde_opciones(opciones)
+            if not programaciones and not opciones['vigilar_base_datos']:
+                log("Por favor, seleccione una hora válida (HH:MM), un intervalo de stock o la sincronización al detectar cambios.")
+                return
+
+            if programaciones:
+                obtener_planificador(log).programar(programaciones, {
+                    "completa": sincronizacion_manual,
+                    "stock": sincronizacion_stock,
+                    "incremental": sincronizacion_incremental
+                })
+
+            if vigilante:
+                vigilante.detener()
+                vigilante = None
+            if opciones['vigilar_base_datos']:
+                vigilante = VigilanteBaseDatos(
+                    rutas_bases(opciones),
+                    lambda registrar_lectura: ejecutar_en_exclusiva(
+                        lambda: sincronizacion_incremental(al_exportar=registrar_lectura), "sincronización por cambios en Factusol", log
+                    ),
+                    espera_silencio=opciones['espera_cambios_segundos'], log_func=log
+                )
+                vigilante.iniciar()
+        except Exception as e:
+            log(f"Error al programar la sincronización automática: {e}")
 
     def cancelar_sincronizacion_automatica():
-        scheduler.remove_all_jobs()
+        global vigilante
+        if planificador:
+            planificador.cancelar()
+        if vigilante:
+            vigilante.detener()
+            vigilante = None
         log("Sincronización automática cancelada.")
 
     root.minsize(800, 1000)
@@ -418,9 +538,14 @@ def main():
     ttk.Radiobutton(checkbox_frame, text="Ocultar", variable=accion_no_existentes, value="Ocultar").grid(row=1, column=6, sticky="w")
     ttk.Radiobutton(checkbox_frame, text="Eliminar", variable=accion_no_existentes, value="Eliminar").grid(row=2, column=6, sticky="w")
 
+    # Diagnóstico: perfila cada etapa y guarda el resultado junto a los logs
+    ttk.Label(checkbox_frame, text="Diagnóstico").grid(row=0, column=8, padx=10, pady=5, sticky="w")
+    perfilar = tk.BooleanVar(value=leer_configuracion()['DEFAULT'].get('perfilar', 'False') == 'True')
+    ttk.Checkbutton(checkbox_frame, text="Perfilar ejecución", variable=perfilar).grid(row=1, column=8, sticky="w")
+
     # Botón para guardar configuración debajo de los checkboxes
     save_button = ttk.Button(main_frame, text="Guardar Configuración", 
-                             command=lambda: guardar_configuracion(db_path, csv_path, gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes, hora_sincronizacion))
+                             command=lambda: guardar_configuracion(db_path, csv_path, gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes, hora_sincronizacion, intervalo_stock_minutos, vigilar_base_datos, perfilar))
     save_button.grid(row=6, column=0, columnspan=2, pady=5, sticky="ew")
 
     # Botón para sincronización manual
@@ -431,26 +556,49 @@ def main():
     cancel_button = ttk.Button(main_frame, text="Cancelar", command=cancelar_sincronizacion, style='TButton')
     cancel_button.grid(row=7, column=1, pady=5, padx=10, sticky="ew")  # Al lado del botón de sincronización manual
 
+    # Sincronización rápida de stock y botones para calcular el plan y aplicarlo por separado
+    acciones_frame = ttk.Frame(main_frame)
+    acciones_frame.grid(row=8, column=0, columnspan=2, sticky="ew")
+    for columna in range(3):
+        acciones_frame.grid_columnconfigure(columna, weight=1)
+
+    stock_button = ttk.Button(acciones_frame, text="Sincronizar Solo Stock", command=iniciar_sincronizacion_stock, style='TButton')
+    stock_button.grid(row=0, column=0, pady=5, padx=10, sticky="ew")
+
+    plan_button = ttk.Button(acciones_frame, text="Calcular Plan", command=iniciar_planificacion, style='TButton')
+    plan_button.grid(row=0, column=1, pady=5, padx=10, sticky="ew")
+
+    aplicar_plan_button = ttk.Button(acciones_frame, text="Aplicar Plan Guardado", command=iniciar_aplicacion_plan, style='TButton')
+    aplicar_plan_button.grid(row=0, column=2, pady=5, padx=10, sticky="ew")
+
     hora_frame = ttk.Frame(main_frame)
-    hora_frame.grid(row=8, column=0, columnspan=2, pady=5, sticky="ew")
+    hora_frame.grid(row=9, column=0, columnspan=2, pady=5, sticky="ew")
 
     hora_guardada = obtener_hora_sincronizacion_guardada()
 
-    ttk.Label(main_frame, text="Sincronización Automática", font=("Montserrat", 10, "bold")).grid(row=9, column=0, columnspan=2, pady=(10, 5), sticky="ew")
+    ttk.Label(main_frame, text="Sincronización Automática", font=("Montserrat", 10, "bold")).grid(row=10, column=0, columnspan=2, pady=(10, 5), sticky="ew")
 
     ttk.Label(hora_frame, text="Hora de sincronización (HH:MM):", font=montserrat).grid(row=0, column=0, pady=5, padx=(0, 10), sticky=tk.E)
     hora_sincronizacion = tk.StringVar(value=hora_guardada)
     hora_entry = ttk.Entry(hora_frame, textvariable=hora_sincronizacion, width=8, font=montserrat)
     hora_entry.grid(row=0, column=1, pady=5, sticky=tk.W)
 
+    ttk.Label(hora_frame, text="Stock cada (minutos):", font=montserrat).grid(row=0, column=2, pady=5, padx=(20, 10), sticky=tk.E)
+    intervalo_stock_minutos = tk.StringVar(value=leer_configuracion()['DEFAULT'].get('intervalo_stock_minutos', ''))
+    intervalo_stock_entry = ttk.Entry(hora_frame, textvariable=intervalo_stock_minutos, width=8, font=montserrat)
+    intervalo_stock_entry.grid(row=0, column=3, pady=5, sticky=tk.W)
+
+    vigilar_base_datos = tk.BooleanVar(value=leer_configuracion()['DEFAULT'].get('vigilar_base_datos', 'False') == 'True')
+    ttk.Checkbutton(hora_frame, text="Sincronizar al detectar cambios en Factusol", variable=vigilar_base_datos).grid(row=0, column=4, pady=5, padx=(20, 0), sticky=tk.W)
+
     activar_sync_button = ttk.Button(main_frame, text="Activar Sincronización", command=activar_sincronizacion_automatica, style='TButton')
-    activar_sync_button.grid(row=10, column=0, pady=5, sticky="ew")
+    activar_sync_button.grid(row=11, column=0, pady=5, sticky="ew")
 
     cancelar_sync_button = ttk.Button(main_frame, text="Cancelar Sincronización", command=cancelar_sincronizacion_automatica, style='TButton')
-    cancelar_sync_button.grid(row=10, column=1, pady=5, sticky="ew")
+    cancelar_sync_button.grid(row=11, column=1, pady=5, sticky="ew")
 
     log_frame = ttk.Frame(main_frame)
-    log_frame.grid(row=11, column=0, columnspan=2, pady=5, sticky=(tk.W, tk.E, tk.N, tk.S))
+    log_frame.grid(row=12, column=0, columnspan=2, pady=5, sticky=(tk.W, tk.E, tk.N, tk.S))
 
     log_scrollbar = tk.Scrollbar(log_frame, orient=tk.VERTICAL)
     log_text = tk.Text(log_frame, wrap='word', font=montserrat, borderwidth=2, relief="solid", yscrollcommand=log_scrollbar.set)
@@ -475,10 +623,23 @@ def main():
     siguiente_button = ttk.Button(buscar_frame, text="Siguiente", style='TButton')
     siguiente_button.grid(row=0, column=4, padx=(0, 10))
 
-    text_handler = TextHandler(log_text)
+    buscar_regex = tk.BooleanVar(value=False)
+    ttk.Checkbutton(buscar_frame, text="Expresión regular", variable=buscar_regex).grid(row=0, column=5, padx=(0, 10))
+
+    caudal_logs = tk.StringVar(value="")
+    ttk.Label(buscar_frame, textvariable=caudal_logs, font=montserrat).grid(row=0, column=6, padx=(0, 10))
+
+    detalle_busqueda = tk.StringVar(value="")
+    ttk.Label(buscar_frame, textvariable=detalle_busqueda, font=montserrat, wraplength=900, justify="left").grid(row=1, column=0, columnspan=7, padx=10, sticky=tk.W)
+
+    buffer_logs = BufferLogs(capacidad=MAX_LINEAS_LOG, directorio=obtener_ruta_logs())
+    text_handler = TextHandler(log_text, buffer_logs)
+    text_handler.detalle_var = detalle_busqueda
     logging.getLogger().addHandler(text_handler)
+    text_handler.iniciar_drenado(root, caudal_logs)
 
-    buscar_button.config(command=lambda: text_handler.buscar_en_logs(buscar_entry.get()))
+    buscar_button.config(command=lambda: text_handler.buscar_en_logs(buscar_entry.get(), buscar_regex.get()))
+    buscar_entry.bind("<Return>", lambda event: text_handler.buscar_en_logs(buscar_entry.get(), buscar_regex.get()))
     anterior_button.config(command=text_handler.anterior_coincidencia)
     siguiente_button.config(command=text_handler.siguiente_coincidencia)
 
@@ -491,7 +652,7 @@ def main():
 
     root.grid_rowconfigure(1, weight=1)
     root.grid_columnconfigure(0, weight=1)
-    main_frame.grid_rowconfigure(11, weight=1)
+    main_frame.grid_rowconfigure(12, weight=1)
     main_frame.grid_columnconfigure(0, weight=1)
     main_frame.grid_columnconfigure(1, weight=1)
 
@@ -499,7 +660,14 @@ def main():
     style.configure('TButton', font=montserrat, padding=5, relief="flat")
     style.map('TButton', foreground=[('pressed', 'white'), ('active', '#01304f')], background=[('pressed', '#007ACC'), ('active', '#007ACC')])
 
-    root.protocol("WM_DELETE_WINDOW", lambda: (limpiar_estado(), root.destroy()))
+    root.protocol("WM_DELETE_WINDOW", lambda: (limpiar_estado(), buffer_logs.cerrar(), root.destroy()))
+
+    # Cuando la ventana ya se dibujó, informar cuánto tardó el arranque
+    def informar_arranque():
+        registro_arranque.mediciones.append(("ventana visible", registro_arranque.transcurrido()))
+        registro_arranque.registrar_informe("Tiempo de arranque")
+
+    root.after_idle(informar_arranque)
 
     root.mainloop()
 
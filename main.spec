@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('scripts/config.txt', 'scripts'), ('scripts/.env', 'scripts')],
-    hiddenimports=[],
+    # main.py importa estos módulos por nombre al iniciar la primera sincronización
+    hiddenimports=['scripts.pipeline', 'requests', 'numpy', 'pandas', 'pyodbc', 'apscheduler.schedulers.background', 'apscheduler.triggers.cron', 'apscheduler.triggers.interval'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -38,3 +39,41 @@ exe = EXE(
     icon='icon.ico',
 )
 
+
+# Ejecutable de consola para ejecuciones programadas sin ventana (cli.py)
+cli_a = Analysis(
+    ['cli.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('scripts/config.txt', 'scripts'), ('scripts/.env', 'scripts')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['tkinter', 'apscheduler'],
+    noarchive=False,
+    optimize=0,
+)
+cli_pyz = PYZ(cli_a.pure)
+
+cli_exe = EXE(
+    cli_pyz,
+    cli_a.scripts,
+    cli_a.binaries,
+    cli_a.datas,
+    [],
+    name='sincronizador_cli',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon='icon.ico',
+)
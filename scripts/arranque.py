@@ -0,0 +1,48 @@
+# scripts/arranque.py
+
+import time
+import logging
+import importlib
+from contextlib import contextmanager
+
+
+class RegistroArranque:
+    """
+    Mide el tiempo de arranque de la aplicación y de la carga de cada módulo pesado.
+    Solo usa la biblioteca estándar para poder importarse antes que cualquier otra cosa.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.mediciones = []
+
+    @contextmanager
+    def medir(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mediciones.append((nombre, time.perf_counter() - inicio))
+
+    def importar(self, nombre_modulo):
+        """Importa un módulo registrando cuánto tardó (cero si ya estaba cargado)."""
+        with self.medir(f"import {nombre_modulo}"):
+            return importlib.import_module(nombre_modulo)
+
+    def transcurrido(self):
+        return time.perf_counter() - self.inicio
+
+    def informe(self, titulo, desde=0):
+        """Texto con las mediciones a partir de la posición desde, de la más lenta a la más rápida."""
+        mediciones = sorted(self.mediciones[desde:], key=lambda medicion: medicion[1], reverse=True)
+        lineas = [f"{titulo} ({self.transcurrido() * 1000:.0f} ms desde el inicio):"]
+        lineas.extend(f"  {nombre}: {segundos * 1000:.1f} ms" for nombre, segundos in mediciones)
+        return "\n".join(lineas)
+
+    def registrar_informe(self, titulo, desde=0):
+        informe = self.informe(titulo, desde)
+        logging.info(informe)
+        return informe
+
+
+registro_arranque = RegistroArranque()
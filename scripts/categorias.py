@@ -0,0 +1,137 @@
+# scripts/categorias.py
+
+import os
+import json
+import logging
+
+from scripts.sincronizador import obtener_categorias_existentes, crear_categoria, actualizar_categoria, datos_api
+
+
+class MapaCategorias:
+    """
+    IDs de Tienda Nube de las categorías creadas a partir de las familias y secciones de Factusol,
+    guardados en disco por tienda. Con el mapa, cada ejecución solo llama a la API por las categorías
+    nuevas, renombradas o movidas, no por cada producto.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.categorias = {}
+        self._cargar()
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+
+        try:
+            with open(self.ruta, encoding='utf-8') as archivo:
+                self.categorias = json.load(archivo).get("categorias", {})
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"No se pudo leer el mapa de categorías guardado en {self.ruta}: {e}")
+
+    def buscar(self, clave):
+        return self.categorias.get(clave)
+
+    def registrar(self, clave, categoria_id, nombre, padre_id):
+        self.categorias[clave] = {"id": categoria_id, "nombre": nombre, "padre_id": padre_id}
+
+    def quitar(self, clave):
+        self.categorias.pop(clave, None)
+
+    def guardar(self):
+        directorio = os.path.dirname(self.ruta)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+        ruta_temporal = f"{self.ruta}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({"categorias": self.categorias}, archivo, ensure_ascii=False, indent=2)
+        os.replace(ruta_temporal, self.ruta)
+
+
+def resolver_categorias(necesarias, mapa, log_func, crear=True):
+    """
+    IDs de Tienda Nube de las categorías indicadas ({clave: categoría de indexar_categorias}), creando
+    las que faltan y renombrando las que cambiaron en Factusol. Antes de crear la primera se descargan
+    una vez las categorías de la tienda, para adoptar las que ya existan con el mismo nombre y padre.
+    Sin crear solo se usan las del mapa. Devuelve {clave: ID}.
+    """
+    ids = {}
+    existentes = None
+    cambios = 0
+
+    # Las secciones antes que sus familias: una familia necesita el ID de su sección
+    for clave, categoria in sorted(necesarias.items(), key=lambda item: (item[1]["padre"] is not None, item[0])):
+        nombre = categoria["nombre"]
+        padre_id = None
+        if categoria["padre"]:
+            padre_id = ids.get(categoria["padre"])
+            if padre_id is None:
+                continue
+
+        conocida = mapa.buscar(clave)
+        if conocida and conocida["nombre"] == nombre and conocida.get("padre_id") == padre_id:
+            ids[clave] = conocida["id"]
+            continue
+
+        if not crear:
+            log_func(f"La categoría '{nombre}' se {'actualizará' if conocida else 'creará'} en Tienda Nube.")
+            if conocida:
+                ids[clave] = conocida["id"]
+            continue
+
+        if conocida:
+            actualizada = actualizar_categoria(conocida["id"], nombre, padre_id)
+            if actualizada is False:
+                ids[clave] = conocida["id"]
+                continue
+            if actualizada:
+                mapa.registrar(clave, conocida["id"], nombre, padre_id)
+                ids[clave] = conocida["id"]
+                cambios += 1
+                continue
+            # La categoría se borró en Tienda Nube: se vuelve a crear
+            mapa.quitar(clave)
+
+        if existentes is None:
+            existentes = {
+                ((existente.get("name") or {}).get("es"), existente.get("parent") or None): existente["id"]
+                for existente in obtener_categorias_existentes()
+            }
+
+        categoria_id = existentes.get((nombre, padre_id))
+        if categoria_id is None:
+            creada = crear_categoria(nombre, padre_id)
+            if not creada:
+                continue
+            categoria_id = creada["id"]
+            existentes[(nombre, padre_id)] = categoria_id
+        mapa.registrar(clave, categoria_id, nombre, padre_id)
+        ids[clave] = categoria_id
+        cambios += 1
+
+    if cambios:
+        mapa.guardar()
+        log_func(f"Categorías: {cambios} creadas, adoptadas o actualizadas en Tienda Nube.")
+    return ids
+
+def asignar_categorias(productos, mapa, log_func, crear=True):
+    """
+    Reemplaza las categorías de Factusol de cada producto (categorias_factusol) por los IDs de
+    Tienda Nube en categories. Un producto sin familia o con alguna categoría sin ID queda sin
+    categories, para no quitarle las que ya tiene en la tienda.
+    """
+    necesarias = {}
+    for producto in productos:
+        for categoria in producto.get("categorias_factusol") or []:
+            necesarias.setdefault(categoria["clave"], categoria)
+    ids = resolver_categorias(necesarias, mapa, log_func, crear)
+
+    asignados = []
+    for producto in productos:
+        categorias = producto.get("categorias_factusol")
+        producto = datos_api(producto)
+        if categorias and all(categoria["clave"] in ids for categoria in categorias):
+            producto["categories"] = [ids[categoria["clave"]] for categoria in categorias]
+        asignados.append(producto)
+    return asignados
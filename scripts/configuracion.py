@@ -0,0 +1,141 @@
+# scripts/configuracion.py
+
+import os
+import shutil
+import logging
+import configparser
+from pathlib import Path
+
+# Separador de las bases de datos en db_path cuando se sincronizan varias empresas
+SEPARADOR_BASES = ";"
+
+
+def obtener_ruta_base():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def obtener_ruta_config():
+    if os.name == 'nt':  # Windows
+        carpeta_config = os.path.join(os.getenv('LOCALAPPDATA'), 'sincronizador_app')
+    else:  # Linux, Mac
+        carpeta_config = os.path.join(os.getenv('HOME'), '.config', 'sincronizador_app')
+
+    # Crear la carpeta si no existe
+    Path(carpeta_config).mkdir(parents=True, exist_ok=True)
+
+    # Ruta completa del archivo config.txt
+    return os.path.join(carpeta_config, 'config.txt')
+
+def leer_configuracion(config_path=None):
+    config = configparser.ConfigParser()
+    config_path = config_path or obtener_ruta_config()
+
+    # Crear archivo de configuración si no existe y copiar valores por defecto
+    if not os.path.exists(config_path):
+        # Copiar config.txt predeterminado desde la carpeta empaquetada
+        ruta_predeterminada = os.path.join(obtener_ruta_base(), 'scripts', 'config.txt')
+        shutil.copy(ruta_predeterminada, config_path)
+        logging.info(f"Archivo config.txt copiado a {config_path}")
+
+    # Leer el archivo de configuración
+    config.read(config_path)
+    return config
+
+def numero_positivo(seccion, clave, descripcion):
+    """Número mayor que cero de config.txt, o None si la opción está vacía."""
+    valor = seccion.get(clave, '').strip()
+    if not valor:
+        return None
+    try:
+        numero = float(valor)
+    except ValueError:
+        numero = 0
+    if not numero > 0:
+        raise ValueError(f"{descripcion} no válido en config.txt: '{valor}'. Indique un número mayor que cero.")
+    return numero
+
+def cargar_opciones(config=None):
+    """Opciones de sincronización de config.txt con sus tipos, compartidas por la ventana y la línea de comandos."""
+    config = config or leer_configuracion()
+    seccion = config['DEFAULT']
+
+    minutos = numero_positivo(seccion, 'tiempo_limite_minutos', "Tiempo límite en minutos")
+    espera_cambios = numero_positivo(seccion, 'espera_cambios_segundos', "Espera tras los cambios en segundos")
+
+    return {
+        'db_path': seccion.get('db_path', ''),
+        'csv_path': seccion.get('csv_path', ''),
+        'hora_sincronizacion': seccion.get('hora_sincronizacion', ''),
+        'intervalo_stock_minutos': seccion.get('intervalo_stock_minutos', ''),
+        # Programaciones adicionales, por ejemplo "completa 02:00; stock cada 10m"
+        'programaciones': seccion.get('programaciones', ''),
+        'gestionar_precio': seccion.get('gestionar_precio', 'False') == 'True',
+        'gestionar_stock': seccion.get('gestionar_stock', 'False') == 'True',
+        'crear_productos': seccion.get('crear_productos', 'False') == 'True',
+        # Talles y colores de F_ARC; sin variantes cada artículo se publica como producto simple
+        'gestionar_variantes': seccion.get('gestionar_variantes', 'True') == 'True',
+        # Categorías de Tienda Nube a partir de las familias y secciones de Factusol; las categorías de
+        # los productos con familia se reemplazan por las de Factusol
+        'gestionar_categorias': seccion.get('gestionar_categorias', 'False') == 'True',
+        'accion_no_existentes': seccion.get('accion_no_existentes', 'Ocultar'),
+        # Tiempo máximo en segundos para aplicar cambios en una sincronización, o None si no hay límite
+        'tiempo_limite': minutos * 60 if minutos else None,
+        # Carpeta del textfile collector de node_exporter; vacío para no exportar métricas a Prometheus
+        'directorio_prometheus': seccion.get('directorio_prometheus', '').strip(),
+        # Sincronización incremental al detectar cambios en la base de datos de Factusol
+        'vigilar_base_datos': seccion.get('vigilar_base_datos', 'False') == 'True',
+        'espera_cambios_segundos': espera_cambios or 60,
+        # Perfilar cada etapa con cProfile; los resultados quedan junto a los logs
+        'perfilar': seccion.get('perfilar', 'False') == 'True',
+        # Pico de memoria de Python y sitios de asignación por etapa (tracemalloc); el RSS se mide siempre
+        'medir_memoria': seccion.get('medir_memoria', 'False') == 'True',
+        # Con varias bases en db_path: "precedencia" (un SKU repetido se toma de la primera base) o
+        # "prefijo" (cada SKU lleva el prefijo de su base, de prefijos_bases separados por ';')
+        'combinacion_bases': seccion.get('combinacion_bases', 'precedencia').strip() or 'precedencia',
+        'prefijos_bases': seccion.get('prefijos_bases', ''),
+        # Códigos de F_ALM cuyo stock se suma, separados por comas; vacío para sumar todos los almacenes
+        'almacenes': [codigo.strip() for codigo in seccion.get('almacenes', '').split(',') if codigo.strip()],
+        # Código de F_TAR de los precios; vacío para usar la tarifa de código más bajo
+        'tarifa': seccion.get('tarifa', '').strip()
+    }
+
+def rutas_bases(opciones):
+    """Bases de datos configuradas en db_path, separadas por ';' y en orden de precedencia."""
+    return [ruta.strip() for ruta in opciones['db_path'].split(SEPARADOR_BASES) if ruta.strip()]
+
+def obtener_ruta_estado_programaciones():
+    return os.path.join(os.path.dirname(obtener_ruta_config()), 'programaciones.json')
+
+def obtener_ruta_eventos():
+    return os.path.join(os.path.dirname(obtener_ruta_config()), 'webhooks.sqlite3')
+
+def obtener_ruta_bloqueo():
+    return os.path.join(os.path.dirname(obtener_ruta_config()), 'sincronizacion.lock')
+
+def obtener_ruta_logs():
+    return os.path.join(os.path.dirname(obtener_ruta_config()), 'logs')
+
+def obtener_ruta_perfiles():
+    return os.path.join(obtener_ruta_logs(), 'perfiles')
+
+# Archivos de trabajo que se guardan junto a los CSV exportados
+def obtener_ruta_plan(csv_path):
+    return os.path.join(csv_path, "plan_sincronizacion.json")
+
+def obtener_ruta_diario(csv_path):
+    return os.path.join(csv_path, "diario_sincronizacion.jsonl")
+
+def obtener_ruta_estado(csv_path):
+    return os.path.join(csv_path, "estado_remoto.json")
+
+def obtener_ruta_instantanea(csv_path):
+    return os.path.join(csv_path, "instantanea_productos.json")
+
+def obtener_ruta_categorias(csv_path):
+    return os.path.join(csv_path, "categorias_tienda.json")
+
+def obtener_ruta_estadisticas(csv_path):
+    return os.path.join(csv_path, "estadisticas")
+
+def obtener_ruta_tienda(csv_path, nombre):
+    """Carpeta de los archivos de trabajo de una tienda: los de la principal quedan junto a los CSV."""
+    return csv_path if nombre == "principal" else os.path.join(csv_path, "tiendas", nombre)
@@ -0,0 +1,94 @@
+# scripts/diario.py
+
+import os
+import json
+import logging
+
+
+class DiarioOperaciones:
+    """
+    Diario de escritura anticipada (write-ahead) de las operaciones de un plan de sincronización.
+
+    Cada operación se registra como 'iniciada' antes de enviarse a Tienda Nube y luego con su
+    resultado ('ok' o 'error'). Si la ejecución se corta, la siguiente puede reanudar el mismo
+    plan saltando lo que ya se aplicó.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.plan_id = None
+        self.estados = {}
+        self.finalizado = False
+        self._archivo = None
+        self._cargar()
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+
+        with open(self.ruta, encoding='utf-8') as archivo:
+            for linea in archivo:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Puede quedar una última línea incompleta si el proceso se cortó mientras escribía
+                    logging.warning(f"Se ignoró una línea dañada del diario {self.ruta}")
+                    continue
+
+                evento = registro.get("evento")
+                if evento == "inicio":
+                    self.plan_id = registro.get("plan")
+                    self.estados = {}
+                    self.finalizado = False
+                elif evento == "fin":
+                    self.finalizado = True
+                else:
+                    self.estados[registro.get("operacion")] = evento
+
+    def pendiente(self, plan_id):
+        """Indica si el plan se empezó a aplicar y no llegó a terminar."""
+        return self.plan_id == plan_id and not self.finalizado
+
+    def iniciar_plan(self, plan_id):
+        """Prepara el diario para el plan. Si es el mismo plan interrumpido se conservan los estados."""
+        if self.plan_id == plan_id and not self.finalizado:
+            return
+
+        self.cerrar()
+        directorio = os.path.dirname(self.ruta)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+        # Un plan nuevo reemplaza el diario del anterior
+        with open(self.ruta, 'w', encoding='utf-8'):
+            pass
+        self.plan_id = plan_id
+        self.estados = {}
+        self.finalizado = False
+        self._escribir({"evento": "inicio", "plan": plan_id})
+
+    def registrar(self, operacion_id, estado, detalle=None):
+        self.estados[operacion_id] = estado
+        registro = {"evento": estado, "operacion": operacion_id}
+        if detalle:
+            registro["detalle"] = detalle
+        self._escribir(registro)
+
+    def finalizar(self):
+        self.finalizado = True
+        self._escribir({"evento": "fin", "plan": self.plan_id})
+        self.cerrar()
+
+    def cerrar(self):
+        if self._archivo:
+            self._archivo.close()
+            self._archivo = None
+
+    def _escribir(self, registro):
+        if self._archivo is None:
+            self._archivo = open(self.ruta, 'a', encoding='utf-8')
+
+        self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        # El registro tiene que estar en disco antes de enviar la operación a Tienda Nube
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
@@ -0,0 +1,224 @@
+# scripts/estadisticas.py
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from scripts.memoria import MedidorMemoria
+
+
+class EstadisticasSincronizacion:
+    """
+    Tiempos y contadores de una ejecución, completados a lo largo del pipeline: duración de cada
+    etapa y de la exportación de cada tabla, llamadas a la API por endpoint y estado, bytes
+    transferidos, tiempo de espera por el rate limit y memoria de cada etapa. Se guardan en JSON y, opcionalmente, en un
+    archivo de texto para el textfile collector de Prometheus.
+    """
+
+    def __init__(self, modo="completa", perfilador=None, memoria=None):
+        self.modo = modo
+        # Perfilador de scripts/perfilado.py si se pidió perfilar la ejecución
+        self.perfilador = perfilador
+        self.memoria = memoria or MedidorMemoria()
+        self.inicio = datetime.now()
+        self.estado = None
+        self.duracion_segundos = 0.0
+        self.etapas = {}
+        self.tablas = {}
+        self.llamadas_api = {}
+        self.bytes_enviados = 0
+        self.bytes_recibidos = 0
+        self.espera_rate_limit_segundos = 0.0
+        self.espera_reintentos_segundos = 0.0
+        self.contadores = {}
+        self._inicio_monotonic = time.monotonic()
+        self._bloqueo = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide la duración de una etapa; si se repite, se acumula. Con perfilador, también la perfila."""
+        inicio = time.perf_counter()
+        try:
+            with self.memoria.etapa(nombre):
+                if self.perfilador:
+                    with self.perfilador.etapa(nombre):
+                        yield
+                else:
+                    yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._bloqueo:
+                self.etapas[nombre] = self.etapas.get(nombre, 0.0) + duracion
+
+    def en_hilo(self, funcion):
+        """Función para un hilo de trabajo de la etapa en curso, perfilada si corresponde."""
+        return self.perfilador.en_hilo(funcion) if self.perfilador else funcion
+
+    def registrar_tabla(self, tabla, segundos, filas):
+        with self._bloqueo:
+            self.tablas[tabla] = {"segundos": round(segundos, 3), "filas": filas}
+
+    def registrar_llamada(self, endpoint, estado, enviados=0, recibidos=0):
+        """estado es el código HTTP o el nombre del error si no hubo respuesta."""
+        with self._bloqueo:
+            por_estado = self.llamadas_api.setdefault(endpoint, {})
+            por_estado[str(estado)] = por_estado.get(str(estado), 0) + 1
+            self.bytes_enviados += enviados
+            self.bytes_recibidos += recibidos
+
+    def registrar_espera(self, segundos, motivo="rate_limit"):
+        with self._bloqueo:
+            if motivo == "rate_limit":
+                self.espera_rate_limit_segundos += segundos
+            else:
+                self.espera_reintentos_segundos += segundos
+
+    def contar(self, nombre, cantidad=1):
+        with self._bloqueo:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def finalizar(self, estado):
+        self.estado = estado
+        self.duracion_segundos = time.monotonic() - self._inicio_monotonic
+        self.memoria.detener()
+
+    def rendimiento(self):
+        """Filas exportadas, productos y operaciones por segundo en la etapa correspondiente."""
+        def por_segundo(cantidad, etapa):
+            segundos = self.etapas.get(etapa)
+            return round(cantidad / segundos, 1) if cantidad and segundos else None
+
+        filas = sum(datos["filas"] for datos in self.tablas.values())
+        return {
+            "filas_por_segundo": por_segundo(filas, "exportacion"),
+            "productos_por_segundo": por_segundo(self.contadores.get("productos", 0), "transformacion"),
+            "operaciones_por_segundo": por_segundo(self.contadores.get("operaciones_aplicadas", 0), "aplicacion")
+        }
+
+    def como_dict(self):
+        with self._bloqueo:
+            return {
+                "modo": self.modo,
+                "inicio": self.inicio.isoformat(timespec="seconds"),
+                "estado": self.estado,
+                "duracion_segundos": round(self.duracion_segundos, 3),
+                "etapas": {nombre: round(segundos, 3) for nombre, segundos in self.etapas.items()},
+                "tablas": dict(self.tablas),
+                "llamadas_api": {endpoint: dict(estados) for endpoint, estados in self.llamadas_api.items()},
+                "bytes_enviados": self.bytes_enviados,
+                "bytes_recibidos": self.bytes_recibidos,
+                "espera_rate_limit_segundos": round(self.espera_rate_limit_segundos, 3),
+                "espera_reintentos_segundos": round(self.espera_reintentos_segundos, 3),
+                "contadores": dict(self.contadores),
+                "rendimiento": self.rendimiento(),
+                "memoria": dict(self.memoria.etapas)
+            }
+
+    def resumen_texto(self):
+        lineas = [f"--- Estadísticas de la ejecución ({self.modo}, {self.duracion_segundos:.1f} s) ---"]
+        lineas.extend(f"{nombre}: {segundos:.2f} s" for nombre, segundos in self.etapas.items())
+        llamadas = sum(sum(estados.values()) for estados in self.llamadas_api.values())
+        lineas.append(f"Llamadas a la API: {llamadas} ({self.bytes_enviados} bytes enviados, {self.bytes_recibidos} recibidos)")
+        lineas.append(f"Espera por rate limit: {self.espera_rate_limit_segundos:.1f} s; por reintentos: {self.espera_reintentos_segundos:.1f} s")
+        lineas.extend(f"{nombre.replace('_', ' ').capitalize()}: {valor}" for nombre, valor in self.rendimiento().items() if valor)
+        for nombre, datos in self.memoria.etapas.items():
+            texto = f"Memoria en {nombre}: pico {datos['rss_pico_mb']} MB" if "rss_pico_mb" in datos else f"Memoria en {nombre}:"
+            if "python_pico_mb" in datos:
+                texto += f" (Python {datos['python_pico_mb']} MB; en el pico, más asignada en {datos['sitios_pico'][0]['sitio'] if datos['sitios_pico'] else '-'})"
+            lineas.append(texto)
+        return "\n".join(lineas)
+
+    def guardar(self, directorio):
+        """Guarda las estadísticas en un JSON por ejecución y devuelve su ruta."""
+        if not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+        ruta = os.path.join(directorio, f"{self.modo}_{self.inicio.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.como_dict(), archivo, ensure_ascii=False, indent=2)
+        return ruta
+
+    def guardar_prometheus(self, directorio):
+        """
+        Escribe las métricas en formato de texto de Prometheus, en un archivo por modo para que una
+        sincronización de stock no borre las métricas de la completa. El reemplazo es atómico, como
+        pide el textfile collector de node_exporter.
+        """
+        def etiquetas(**valores):
+            texto = ",".join(f'{clave}="{str(valor).replace(chr(34), "")}"' for clave, valor in valores.items())
+            return "{" + texto + "}"
+
+        modo = self.modo
+        lineas = [
+            "# TYPE sincronizador_duracion_segundos gauge",
+            f"sincronizador_duracion_segundos{etiquetas(modo=modo)} {self.duracion_segundos:.3f}",
+            "# TYPE sincronizador_ultima_ejecucion_timestamp_segundos gauge",
+            f"sincronizador_ultima_ejecucion_timestamp_segundos{etiquetas(modo=modo)} {time.time():.0f}",
+            "# TYPE sincronizador_ultima_ejecucion_exito gauge",
+            f"sincronizador_ultima_ejecucion_exito{etiquetas(modo=modo)} {1 if self.estado == 'completada' else 0}",
+            "# TYPE sincronizador_etapa_segundos gauge"
+        ]
+        lineas.extend(f"sincronizador_etapa_segundos{etiquetas(modo=modo, etapa=nombre)} {segundos:.3f}" for nombre, segundos in self.etapas.items())
+
+        lineas.append("# TYPE sincronizador_etapa_memoria_pico_bytes gauge")
+        lineas.extend(
+            f"sincronizador_etapa_memoria_pico_bytes{etiquetas(modo=modo, etapa=nombre)} {int(datos['rss_pico_mb'] * 1024 * 1024)}"
+            for nombre, datos in self.memoria.etapas.items() if "rss_pico_mb" in datos
+        )
+
+        lineas.append("# TYPE sincronizador_exportacion_tabla_segundos gauge")
+        lineas.extend(f"sincronizador_exportacion_tabla_segundos{etiquetas(modo=modo, tabla=tabla)} {datos['segundos']}" for tabla, datos in self.tablas.items())
+        lineas.append("# TYPE sincronizador_exportacion_tabla_filas gauge")
+        lineas.extend(f"sincronizador_exportacion_tabla_filas{etiquetas(modo=modo, tabla=tabla)} {datos['filas']}" for tabla, datos in self.tablas.items())
+
+        lineas.append("# TYPE sincronizador_api_llamadas gauge")
+        for endpoint, estados in self.llamadas_api.items():
+            lineas.extend(f"sincronizador_api_llamadas{etiquetas(modo=modo, endpoint=endpoint, estado=estado)} {cantidad}" for estado, cantidad in estados.items())
+
+        lineas.extend([
+            "# TYPE sincronizador_api_bytes gauge",
+            f"sincronizador_api_bytes{etiquetas(modo=modo, direccion='enviados')} {self.bytes_enviados}",
+            f"sincronizador_api_bytes{etiquetas(modo=modo, direccion='recibidos')} {self.bytes_recibidos}",
+            "# TYPE sincronizador_espera_segundos gauge",
+            f"sincronizador_espera_segundos{etiquetas(modo=modo, motivo='rate_limit')} {self.espera_rate_limit_segundos:.3f}",
+            f"sincronizador_espera_segundos{etiquetas(modo=modo, motivo='reintentos')} {self.espera_reintentos_segundos:.3f}"
+        ])
+
+        if not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+        ruta = os.path.join(directorio, f"sincronizador_{modo}.prom")
+        ruta_temporal = f"{ruta}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write("\n".join(lineas) + "\n")
+        os.replace(ruta_temporal, ruta)
+        return ruta
+
+
+# Estadísticas de la ejecución en curso. Como nunca corren dos sincronizaciones a la vez
+# (bloqueo_sincronizacion), el sincronizador registra en esta instancia, salvo en los hilos que
+# sincronizan una tienda adicional, que registran en las suyas (ver usar).
+actual = EstadisticasSincronizacion()
+_hilo = threading.local()
+
+
+def iniciar(modo, perfilador=None, memoria=None):
+    global actual
+    actual = EstadisticasSincronizacion(modo, perfilador, memoria)
+    return actual
+
+def en_curso():
+    return getattr(_hilo, "estadisticas", None) or actual
+
+@contextmanager
+def usar(estadisticas):
+    """Registra en estadisticas lo que se mida en este hilo."""
+    anteriores = getattr(_hilo, "estadisticas", None)
+    _hilo.estadisticas = estadisticas
+    try:
+        yield estadisticas
+    finally:
+        _hilo.estadisticas = anteriores
@@ -0,0 +1,103 @@
+# scripts/estado_remoto.py
+
+import os
+import json
+import logging
+from datetime import datetime
+
+# Campos de las variantes de Tienda Nube que se conservan en el estado local
+CAMPOS_VARIANTE = ("id", "sku", "price", "stock", "cost", "barcode", "values")
+
+
+class EstadoRemoto:
+    """
+    Última copia conocida de los productos de Tienda Nube, guardada en disco.
+
+    Se reemplaza en cada sincronización completa y se mantiene al día con las operaciones
+    aplicadas, de modo que los modos incrementales puedan comparar contra ella sin descargar
+    el catálogo completo.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.productos = {}
+        self.actualizado = None
+        self._cargar()
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+
+        try:
+            with open(self.ruta, encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"No se pudo leer el estado remoto guardado en {self.ruta}: {e}")
+            return
+
+        self.productos = {str(producto["id"]): producto for producto in datos.get("productos", [])}
+        self.actualizado = datos.get("actualizado")
+
+    def vacio(self):
+        return not self.productos
+
+    def reemplazar(self, productos_existentes):
+        """Reemplaza el estado con los productos descargados en una sincronización completa."""
+        self.productos = {}
+        for producto in productos_existentes:
+            self.actualizar_producto(producto)
+        self.actualizado = datetime.now().isoformat(timespec="seconds")
+
+    def actualizar_producto(self, producto):
+        self.productos[str(producto["id"])] = {
+            "id": producto["id"],
+            "published": producto.get("published", True),
+            # Solo los IDs: alcanzan para comparar las categorías asignadas desde Factusol
+            "categories": [categoria["id"] if isinstance(categoria, dict) else categoria for categoria in producto.get("categories") or []],
+            "variants": [
+                {campo: variante.get(campo) for campo in CAMPOS_VARIANTE}
+                for variante in producto.get("variants", [])
+            ]
+        }
+
+    def quitar_producto(self, producto_id):
+        self.productos.pop(str(producto_id), None)
+
+    def buscar_variante(self, producto_id, variante_id):
+        producto = self.productos.get(str(producto_id))
+        if not producto:
+            return None
+        for variante in producto["variants"]:
+            if variante.get("id") == variante_id:
+                return variante
+        return None
+
+    def aplicar_operacion(self, operacion):
+        """Refleja en el estado una operación del plan que se aplicó correctamente en Tienda Nube."""
+        tipo = operacion["tipo"]
+        producto_id = str(operacion.get("producto_id"))
+
+        if tipo == "actualizar_variante":
+            variante = self.buscar_variante(operacion["producto_id"], operacion["variante_id"])
+            if variante:
+                for campo, valor in operacion["datos"].items():
+                    if campo in CAMPOS_VARIANTE and campo != "id":
+                        variante[campo] = valor
+        elif tipo == "actualizar_producto" and producto_id in self.productos:
+            if "categories" in operacion["datos"]:
+                self.productos[producto_id]["categories"] = list(operacion["datos"]["categories"])
+        elif tipo == "ocultar_producto" and producto_id in self.productos:
+            self.productos[producto_id]["published"] = False
+        elif tipo == "eliminar_producto":
+            self.quitar_producto(producto_id)
+        # Las creaciones se incorporan en la próxima descarga completa, cuando se conocen sus IDs
+
+    def guardar(self):
+        directorio = os.path.dirname(self.ruta)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+        ruta_temporal = f"{self.ruta}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({"actualizado": self.actualizado, "productos": list(self.productos.values())}, archivo, ensure_ascii=False)
+        os.replace(ruta_temporal, self.ruta)
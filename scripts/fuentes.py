@@ -0,0 +1,223 @@
+# scripts/fuentes.py
+
+import os
+import csv
+import logging
+import sqlite3
+
+# Tablas de Factusol con las columnas que usa la sincronización y su tipo en SQLite. Una base SQLite
+# con este esquema (ver crear_base_sqlite) sirve para probar y medir la exportación sin Access
+ESQUEMA_FACTUSOL = {
+    "F_ART": {"CODART": "TEXT", "DESART": "TEXT", "DEWART": "TEXT", "SUWART": "TEXT", "EANART": "TEXT", "PCOART": "REAL", "FAMART": "TEXT"},
+    "F_ARC": {"ARTARC": "TEXT", "CE1ARC": "TEXT", "CE2ARC": "TEXT"},
+    "F_STO": {"ALMSTO": "TEXT", "ARTSTO": "TEXT", "DISSTO": "REAL"},
+    "F_STC": {"ALMSTC": "TEXT", "ARTSTC": "TEXT", "CE1STC": "TEXT", "CE2STC": "TEXT", "DISSTC": "REAL"},
+    "F_LTA": {"TARLTA": "TEXT", "ARTLTA": "TEXT", "PRELTA": "REAL"},
+    "F_LTC": {"TARLTC": "TEXT", "ARTLTC": "TEXT", "CE1LTC": "TEXT", "CE2LTC": "TEXT", "PRELTC": "REAL"},
+    "F_ALM": {"CODALM": "TEXT", "NOMALM": "TEXT"},
+    "F_TAR": {"CODTAR": "TEXT", "DESTAR": "TEXT"},
+    "F_FAM": {"CODFAM": "TEXT", "DESFAM": "TEXT", "SECFAM": "TEXT"},
+    "F_SEC": {"CODSEC": "TEXT", "DESSEC": "TEXT"}
+}
+
+# Columnas que la transformación lee si están (descripción web, código de barras, costo, familia,
+# color): en bases de versiones de Factusol que no las tienen se exporta la tabla sin ellas
+COLUMNAS_OPCIONALES = {
+    "F_ART": {"DEWART", "EANART", "PCOART", "FAMART"},
+    "F_ARC": {"CE2ARC"},
+    "F_LTC": {"CE2LTC"}
+}
+
+EXTENSIONES_SQLITE = (".sqlite", ".sqlite3", ".db")
+
+
+def agregado(agrupar, sumar, filtro=None):
+    """
+    Exportación agregada de una tabla: una fila por combinación de las columnas agrupar con la suma
+    de las columnas sumar, opcionalmente solo de las filas cuyo valor está en filtro ({columna:
+    valores}). Se usa en lugar de la lista de columnas en las tablas de exportar_tabla.
+    """
+    return {"agrupar": list(agrupar), "sumar": list(sumar), "filtro": {columna: list(valores) for columna, valores in (filtro or {}).items() if valores}}
+
+def columnas_salida(columnas):
+    if isinstance(columnas, dict):
+        return columnas["agrupar"] + columnas["sumar"]
+    return columnas
+
+def consulta(tabla, columnas):
+    """Consulta SQL y sus parámetros para exportar las columnas (o el agregado) de una tabla."""
+    if not isinstance(columnas, dict):
+        return f"SELECT {', '.join(columnas) if columnas else '*'} FROM {tabla}", []
+
+    # Los totales llevan otro nombre en la consulta: Access no admite un alias igual a la columna
+    # sumada. Cada fuente escribe el CSV con los nombres de columnas_salida
+    seleccion = columnas["agrupar"] + [f"SUM({columna}) AS TOTAL_{columna}" for columna in columnas["sumar"]]
+    sql = f"SELECT {', '.join(seleccion)} FROM {tabla}"
+    parametros = []
+    if columnas["filtro"]:
+        condiciones = []
+        for columna, valores in columnas["filtro"].items():
+            condiciones.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+            parametros.extend(valores)
+        sql += f" WHERE {' AND '.join(condiciones)}"
+    return f"{sql} GROUP BY {', '.join(columnas['agrupar'])}", parametros
+
+def columnas_existentes(tabla, columnas, existentes):
+    """
+    Las columnas pedidas que tiene la tabla según sus metadatos (existentes). Las opcionales que
+    faltan se dejan fuera con un aviso; si falta otra, ValueError.
+    """
+    existentes = {columna.upper() for columna in existentes}
+    faltantes = [columna for columna in columnas if columna.upper() not in existentes]
+    obligatorias = [columna for columna in faltantes if columna not in COLUMNAS_OPCIONALES.get(tabla, ())]
+    if obligatorias:
+        raise ValueError(f"Faltan las columnas {', '.join(obligatorias)} en {tabla}")
+    if faltantes:
+        logging.warning(f"La tabla {tabla} no tiene las columnas {', '.join(faltantes)}; se exporta sin ellas.")
+    return [columna for columna in columnas if columna not in faltantes]
+
+def agregar_filas(cabecera, filas, columnas):
+    """El agregado de consulta() calculado en Python, para las fuentes que no admiten SQL."""
+    faltantes = [columna for columna in columnas_salida(columnas) + list(columnas["filtro"]) if columna not in cabecera]
+    if faltantes:
+        raise ValueError(f"Faltan las columnas {', '.join(faltantes)}")
+    indices_grupo = [cabecera.index(columna) for columna in columnas["agrupar"]]
+    indices_suma = [cabecera.index(columna) for columna in columnas["sumar"]]
+    filtros = [(cabecera.index(columna), set(valores)) for columna, valores in columnas["filtro"].items()]
+
+    totales = {}
+    for fila in filas:
+        if any(fila[indice] not in valores for indice, valores in filtros):
+            continue
+        suma = totales.setdefault(tuple(fila[indice] for indice in indices_grupo), [0.0] * len(indices_suma))
+        for posicion, indice in enumerate(indices_suma):
+            suma[posicion] += float(fila[indice] or 0)
+    return [list(grupo) + suma for grupo, suma in totales.items()]
+
+def escribir_filas(ruta_csv, columnas, filas):
+    """Escribe un CSV con el mismo formato que genera pandas en la exportación (';', UTF-8, con cabecera)."""
+    cantidad = 0
+    with open(ruta_csv, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo, delimiter=';')
+        escritor.writerow(columnas)
+        for fila in filas:
+            escritor.writerow(["" if valor is None else valor for valor in fila])
+            cantidad += 1
+    return cantidad
+
+
+class FuenteAccess:
+    """Base de datos de Factusol (.accdb/.mdb) leída por ODBC. Solo funciona en Windows con el driver de Access."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        # pyodbc solo hace falta con esta fuente: se importa aquí para no exigirlo en las demás
+        import pyodbc
+        self._pyodbc = pyodbc
+        self.error_conexion = pyodbc.Error
+
+    def descripcion(self):
+        return f"Access {self.ruta}"
+
+    def exportar_tabla(self, tabla, columnas, ruta_csv):
+        import pandas as pd
+
+        conn_str = (
+            r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
+            r"DBQ=" + self.ruta + ";"
+        )
+        conn = self._pyodbc.connect(conn_str)
+        try:
+            existentes = [fila.column_name for fila in conn.cursor().columns(table=tabla)]
+            # Sin metadatos (tabla inexistente) la consulta informa el error
+            if columnas and not isinstance(columnas, dict) and existentes:
+                columnas = columnas_existentes(tabla, columnas, existentes)
+            sql, parametros = consulta(tabla, columnas)
+            df = pd.read_sql(sql, conn, params=parametros or None)
+            if isinstance(columnas, dict):
+                df.columns = columnas_salida(columnas)
+            df.to_csv(ruta_csv, sep=';', index=False, encoding='utf-8')
+            return len(df)
+        finally:
+            conn.close()
+
+
+class FuenteSQLite:
+    """Copia de las tablas de Factusol en SQLite, para probar y medir la exportación en cualquier equipo."""
+
+    error_conexion = sqlite3.Error
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def descripcion(self):
+        return f"SQLite {self.ruta}"
+
+    def exportar_tabla(self, tabla, columnas, ruta_csv):
+        # Una conexión por tabla: la exportación corre en varios hilos. Se abre en solo lectura para
+        # que una ruta mal escrita no cree una base vacía
+        conn = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)
+        try:
+            existentes = [fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")]
+            # Sin metadatos (tabla inexistente) la consulta informa el error
+            if columnas and not isinstance(columnas, dict) and existentes:
+                columnas = columnas_existentes(tabla, columnas, existentes)
+            cursor = conn.execute(*consulta(tabla, columnas))
+            nombres = columnas_salida(columnas) if isinstance(columnas, dict) else [descripcion[0] for descripcion in cursor.description]
+            return escribir_filas(ruta_csv, nombres, cursor)
+        finally:
+            conn.close()
+
+
+class FuenteCSV:
+    """Carpeta con un CSV por tabla ({tabla}.csv, separador ';'), por ejemplo una exportación anterior."""
+
+    error_conexion = OSError
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def descripcion(self):
+        return f"carpeta CSV {self.ruta}"
+
+    def exportar_tabla(self, tabla, columnas, ruta_csv):
+        with open(os.path.join(self.ruta, f"{tabla}.csv"), newline='', encoding='utf-8') as archivo:
+            lector = csv.reader(archivo, delimiter=';')
+            cabecera = next(lector, [])
+            if not columnas:
+                return escribir_filas(ruta_csv, cabecera, lector)
+            if isinstance(columnas, dict):
+                return escribir_filas(ruta_csv, columnas_salida(columnas), agregar_filas(cabecera, lector, columnas))
+
+            columnas = columnas_existentes(tabla, columnas, cabecera)
+            posiciones = {columna.upper(): indice for indice, columna in enumerate(cabecera)}
+            indices = [posiciones[columna.upper()] for columna in columnas]
+            return escribir_filas(ruta_csv, columnas, ([fila[indice] for indice in indices] for fila in lector))
+
+
+def crear_fuente(ruta):
+    """Fuente de datos según la ruta configurada: carpeta de CSV, base SQLite o base de Access (por defecto)."""
+    if os.path.isdir(ruta):
+        return FuenteCSV(ruta)
+    if ruta.lower().endswith(EXTENSIONES_SQLITE):
+        return FuenteSQLite(ruta)
+    return FuenteAccess(ruta)
+
+def crear_base_sqlite(ruta, tablas):
+    """
+    Crea una base SQLite con ESQUEMA_FACTUSOL y la llena con tablas ({tabla: lista de filas en el
+    orden de las columnas del esquema}). Reemplaza la base si ya existía.
+    """
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+    conn = sqlite3.connect(ruta)
+    try:
+        for tabla, columnas in ESQUEMA_FACTUSOL.items():
+            conn.execute(f"CREATE TABLE {tabla} ({', '.join(f'{columna} {tipo}' for columna, tipo in columnas.items())})")
+            filas = tablas.get(tabla)
+            if filas:
+                conn.executemany(f"INSERT INTO {tabla} VALUES ({', '.join('?' * len(columnas))})", filas)
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,150 @@
+# scripts/memoria.py
+
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Cada cuánto se muestrea la memoria del proceso durante una etapa
+INTERVALO_MUESTREO = 0.05
+# Sitios de asignación que se informan por etapa cuando se usa tracemalloc
+TOP_SITIOS = 10
+# Durante la etapa se toma una nueva foto de tracemalloc cada vez que la memoria de Python crece este
+# factor desde la anterior: la última queda cerca del pico sin tomar una foto en cada muestreo
+FACTOR_FOTO_PICO = 1.25
+MB = 1024 * 1024
+
+
+def _rss_windows():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)
+        ]
+
+    contadores = PROCESS_MEMORY_COUNTERS()
+    contadores.cb = ctypes.sizeof(contadores)
+    proceso = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+        return None
+    return contadores.WorkingSetSize
+
+def rss_actual():
+    """Memoria residente del proceso en bytes, o None si no se puede medir en este sistema."""
+    try:
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        if os.name == 'nt':
+            return _rss_windows()
+        with open("/proc/self/statm") as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def tomar_foto():
+    # Sin las asignaciones del propio tracemalloc (las fotos anteriores y sus listas de trazas)
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+class MedidorMemoria:
+    """
+    Memoria por etapa: RSS del proceso al empezar y al terminar y su pico (muestreado en un hilo
+    mientras dura la etapa). Con usar_tracemalloc también el pico de memoria asignada por Python y
+    los sitios (archivo:línea) que más memoria habían asignado desde el inicio de la etapa en una foto
+    tomada cerca del pico (ver FACTOR_FOTO_PICO), no lo que queda retenido al terminar; tracemalloc
+    hace más lentas las etapas que crean muchos objetos, por eso es opcional.
+    """
+
+    def __init__(self, usar_tracemalloc=False, top=TOP_SITIOS):
+        self.usar_tracemalloc = usar_tracemalloc
+        self.top = top
+        self.etapas = {}
+        self._iniciado_aqui = False
+        if usar_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciado_aqui = True
+
+    def detener(self):
+        if self._iniciado_aqui:
+            tracemalloc.stop()
+            self._iniciado_aqui = False
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicial = rss_actual()
+        pico = [inicial or 0]
+        fin_muestreo = threading.Event()
+
+        foto_inicial = None
+        # Última foto tomada durante la etapa y la memoria de Python al tomarla
+        foto_pico = [None, 0]
+        if self.usar_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            foto_inicial = tomar_foto()
+            foto_pico[1] = tracemalloc.get_traced_memory()[0]
+
+        def muestrear():
+            while not fin_muestreo.wait(INTERVALO_MUESTREO):
+                actual = rss_actual()
+                if actual and actual > pico[0]:
+                    pico[0] = actual
+                if foto_inicial is not None:
+                    python = tracemalloc.get_traced_memory()[0]
+                    if python > foto_pico[1] * FACTOR_FOTO_PICO:
+                        # Se suelta la foto anterior antes de tomar la nueva
+                        foto_pico[0] = None
+                        foto_pico[:] = [tomar_foto(), python]
+
+        muestreo = None
+        if inicial is not None or foto_inicial is not None:
+            muestreo = threading.Thread(target=muestrear, name=f"memoria_{nombre}", daemon=True)
+            muestreo.start()
+
+        try:
+            yield
+        finally:
+            datos = {}
+            if muestreo is not None:
+                fin_muestreo.set()
+                muestreo.join()
+
+            if foto_inicial is not None:
+                actual, pico_python = tracemalloc.get_traced_memory()
+                # Si la memoria no creció durante la etapa, el pico puede estar al final
+                if foto_pico[0] is None or actual >= foto_pico[1]:
+                    foto_pico[:] = [tomar_foto(), actual]
+                datos["python_pico_mb"] = round(pico_python / MB, 2)
+                datos["python_foto_pico_mb"] = round(foto_pico[1] / MB, 2)
+                diferencias = foto_pico[0].compare_to(foto_inicial, "lineno")
+                asignadas = [diferencia for diferencia in diferencias if diferencia.size_diff > 0][:self.top]
+                datos["sitios_pico"] = [
+                    {"sitio": str(diferencia.traceback[0]), "mb": round(diferencia.size_diff / MB, 3), "bloques": diferencia.count_diff}
+                    for diferencia in asignadas
+                ]
+                foto_pico[0] = None
+
+            if inicial is not None:
+                final = rss_actual() or 0
+                datos.update({
+                    "rss_inicial_mb": round(inicial / MB, 1),
+                    "rss_final_mb": round(final / MB, 1),
+                    "rss_pico_mb": round(max(pico[0], final) / MB, 1)
+                })
+
+            if datos:
+                # Si la etapa se repite se conserva el mayor pico
+                anterior = self.etapas.get(nombre)
+                if anterior is None or datos.get("rss_pico_mb", 0) >= anterior.get("rss_pico_mb", 0):
+                    self.etapas[nombre] = datos
@@ -0,0 +1,94 @@
+# scripts/multiempresa.py
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.configuracion import rutas_bases, SEPARADOR_BASES
+from scripts.sincronizador import exportar_a_csv, procesar_csv_a_json, leer_stock_factusol, normalizar_sku, tablas_stock
+
+# Bases de datos que se exportan a la vez: cada exportación ya usa un hilo por tabla
+MAX_BASES_SIMULTANEAS = 3
+
+
+def nombre_base(ruta):
+    return os.path.splitext(os.path.basename(ruta.rstrip("/\\")))[0]
+
+def prefijos_bases(opciones, rutas):
+    """Prefijo de SKU de cada base: el de prefijos_bases o, si falta, el nombre del archivo y un guion."""
+    configurados = [prefijo.strip() for prefijo in opciones.get('prefijos_bases', '').split(SEPARADOR_BASES)]
+    return [
+        configurados[indice] if indice < len(configurados) and configurados[indice]
+        else f"{nombre_base(ruta).upper()}-"
+        for indice, ruta in enumerate(rutas)
+    ]
+
+def directorio_base(csv_path, indice, ruta):
+    return os.path.join(csv_path, "bases", f"{indice + 1}_{nombre_base(ruta)}")
+
+def exportar_bases(rutas, csv_path, log_func, tablas=None):
+    """
+    Exporta varias bases a la vez (como máximo MAX_BASES_SIMULTANEAS), cada una en su carpeta bajo
+    csv_path/bases, para que el tiempo total se acerque al de la base más lenta y no a la suma.
+    Devuelve las carpetas en el mismo orden que rutas.
+    """
+    directorios = [directorio_base(csv_path, indice, ruta) for indice, ruta in enumerate(rutas)]
+    with ThreadPoolExecutor(max_workers=min(MAX_BASES_SIMULTANEAS, len(rutas))) as executor:
+        list(executor.map(lambda ruta, directorio: exportar_a_csv(ruta, directorio, send_to_gui=log_func, tablas=tablas), rutas, directorios))
+    return directorios
+
+def con_prefijo(producto, prefijo):
+    producto = dict(producto)
+    producto["sku"] = f"{prefijo}{producto['sku']}"
+    producto["variants"] = [dict(variante, sku=f"{prefijo}{variante['sku']}") if variante.get("sku") else variante for variante in producto.get("variants", [])]
+    return producto
+
+def combinar_productos(listas, regla, prefijos, log_func=logging.info):
+    """
+    Une los productos de varias bases en una sola lista. Con la regla "prefijo" cada SKU lleva el
+    prefijo de su base; con "precedencia", un SKU que aparece en varias bases se toma de la primera.
+    """
+    if regla == "prefijo":
+        return [con_prefijo(producto, prefijo) for productos, prefijo in zip(listas, prefijos) for producto in productos]
+
+    combinados = {}
+    descartados = 0
+    for productos in listas:
+        for producto in productos:
+            sku = normalizar_sku(producto.get("sku"))
+            if sku in combinados:
+                descartados += 1
+            else:
+                combinados[sku] = producto
+    if descartados:
+        log_func(f"{descartados} artículos repetidos en varias bases se tomaron de la base con más precedencia.")
+    return list(combinados.values())
+
+def transformar_bases(directorios, archivos_csv, opciones, log_func):
+    listas = [
+        procesar_csv_a_json(
+            [os.path.join(directorio, archivo) for archivo in archivos_csv],
+            tarifa=opciones['tarifa'], almacenes=opciones['almacenes'], categorias=opciones['gestionar_categorias']
+        )
+        for directorio in directorios
+    ]
+    rutas = rutas_bases(opciones)
+    return combinar_productos(listas, opciones.get('combinacion_bases', 'precedencia'), prefijos_bases(opciones, rutas), log_func)
+
+def leer_stock_bases(opciones, csv_directory, log_func):
+    """Exporta y lee el stock de todas las bases y lo combina con la misma regla que los productos."""
+    rutas = rutas_bases(opciones)
+    directorios = exportar_bases(rutas, os.path.join(csv_directory, "stock"), log_func, tablas=tablas_stock(opciones['almacenes']))
+    regla = opciones.get('combinacion_bases', 'precedencia')
+    prefijos = prefijos_bases(opciones, rutas) if regla == "prefijo" else [""] * len(rutas)
+
+    articulos_web, stock_simple, stock_variantes = set(), {}, {}
+    for directorio, prefijo in zip(directorios, prefijos):
+        prefijo = normalizar_sku(prefijo)
+        articulos, simple, variantes = leer_stock_factusol(directorio, opciones['almacenes'])
+        # Con precedencia, un artículo ya visto en una base anterior conserva el stock de esa base
+        nuevos = {sku for sku in articulos if f"{prefijo}{sku}" not in articulos_web}
+        articulos_web.update(f"{prefijo}{sku}" for sku in nuevos)
+        stock_simple.update((f"{prefijo}{sku}", stock) for sku, stock in simple.items() if sku in nuevos)
+        stock_variantes.update(((f"{prefijo}{sku}", talla, color), stock) for (sku, talla, color), stock in variantes.items() if sku in nuevos)
+    return articulos_web, stock_simple, stock_variantes
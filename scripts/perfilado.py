@@ -0,0 +1,97 @@
+# scripts/perfilado.py
+
+import io
+import os
+import pstats
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Funciones que se listan por etapa en el resumen
+TOP_FUNCIONES = 25
+
+
+class Perfilador:
+    """
+    Perfila con cProfile cada etapa de una ejecución (exportación, transformación, obtención remota,
+    diferencias, aplicación). guardar() escribe un .prof por etapa, con el grafo de llamadas para
+    abrir con pstats o snakeviz, y un resumen de texto con las funciones más costosas de cada una.
+    """
+
+    def __init__(self, directorio, modo, top=TOP_FUNCIONES):
+        self.directorio = directorio
+        self.modo = modo
+        self.top = top
+        self.inicio = datetime.now()
+        self.perfiles = {}
+        self._etapa_actual = None
+        self._bloqueo = threading.Lock()
+
+    def _agregar(self, nombre, perfil):
+        with self._bloqueo:
+            self.perfiles.setdefault(nombre, []).append(perfil)
+
+    @contextmanager
+    def etapa(self, nombre):
+        perfil = cProfile.Profile()
+        self._etapa_actual = nombre
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            self._etapa_actual = None
+            self._agregar(nombre, perfil)
+
+    def en_hilo(self, funcion):
+        """
+        Envuelve una función que se ejecuta en un hilo de trabajo (por ejemplo, la exportación de
+        cada tabla) para que su tiempo se sume a la etapa en curso: cProfile solo ve el hilo que lo activó.
+        """
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            nombre = self._etapa_actual
+            if nombre is None:
+                return funcion(*args, **kwargs)
+
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+            except ValueError:
+                # Desde Python 3.12 cProfile ve todos los hilos y no admite dos activos a la vez:
+                # el perfil de la etapa ya incluye esta llamada
+                return funcion(*args, **kwargs)
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                perfil.disable()
+                self._agregar(nombre, perfil)
+        return envoltura
+
+    def resumen_texto(self, orden="cumulative"):
+        lineas = [f"Perfil de la ejecución {self.modo} del {self.inicio.isoformat(timespec='seconds')}"]
+        for nombre, perfiles in self.perfiles.items():
+            salida = io.StringIO()
+            datos = pstats.Stats(*perfiles, stream=salida)
+            datos.sort_stats(orden).print_stats(self.top)
+            lineas.append(f"\n===== {nombre} =====")
+            lineas.append(salida.getvalue().strip())
+        return "\n".join(lineas)
+
+    def guardar(self):
+        """Escribe un .prof por etapa y el resumen; devuelve la ruta del resumen, o None si no se perfiló nada."""
+        if not self.perfiles:
+            return None
+        if not os.path.exists(self.directorio):
+            os.makedirs(self.directorio)
+
+        prefijo = os.path.join(self.directorio, f"{self.modo}_{self.inicio.strftime('%Y%m%d_%H%M%S')}")
+        for nombre, perfiles in self.perfiles.items():
+            pstats.Stats(*perfiles).dump_stats(f"{prefijo}_{nombre}.prof")
+
+        ruta_resumen = f"{prefijo}_resumen.txt"
+        with open(ruta_resumen, 'w', encoding='utf-8') as archivo:
+            archivo.write(self.resumen_texto())
+        return ruta_resumen
@@ -0,0 +1,542 @@
+# scripts/pipeline.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.configuracion import obtener_ruta_plan, obtener_ruta_diario, obtener_ruta_estado, obtener_ruta_estadisticas, obtener_ruta_instantanea, obtener_ruta_perfiles, obtener_ruta_tienda, obtener_ruta_categorias, rutas_bases
+from scripts.diario import DiarioOperaciones
+from scripts import estadisticas
+from scripts.perfilado import Perfilador
+from scripts.memoria import MedidorMemoria
+from scripts.multiempresa import exportar_bases, transformar_bases, leer_stock_bases
+from scripts.validacion import validar_productos, resumir_validacion, registrar_informe
+from scripts.estado_remoto import EstadoRemoto
+from scripts.categorias import MapaCategorias, asignar_categorias
+from scripts.sincronizador import (
+    exportar_a_csv, tablas_necesarias, funciones_activas, procesar_csv_a_json, sincronizar_productos, sincronizar_stock, cargar_plan, aplicar_plan,
+    planificar_sincronizacion, normalizar_sku, obtener_producto_por_sku, tienda_actual, usar_tienda, cargar_tiendas, exportar_y_leer_stock
+)
+
+
+
+def iniciar_estadisticas(modo, opciones):
+    """
+    Estadísticas de una ejecución nueva, con perfilador si la opción perfilar está activa y con
+    tracemalloc si lo está medir_memoria.
+    """
+    perfilador = Perfilador(obtener_ruta_perfiles(), modo) if opciones.get('perfilar') else None
+    return estadisticas.iniciar(modo, perfilador, MedidorMemoria(usar_tracemalloc=opciones.get('medir_memoria', False)))
+
+def registrar_estadisticas(stats, resumen, opciones, log_func):
+    """Cierra las estadísticas de la ejecución, las guarda y las agrega al resumen."""
+    stats.finalizar(resumen["estado"])
+    log_func(stats.resumen_texto())
+
+    try:
+        if opciones.get('csv_path'):
+            resumen["ruta_estadisticas"] = stats.guardar(obtener_ruta_estadisticas(opciones['csv_path']))
+        if opciones.get('directorio_prometheus'):
+            stats.guardar_prometheus(opciones['directorio_prometheus'])
+    except OSError as e:
+        logging.error(f"No se pudieron guardar las estadísticas de la ejecución: {e}")
+
+    if stats.perfilador:
+        try:
+            resumen["ruta_perfil"] = stats.perfilador.guardar()
+            if resumen["ruta_perfil"]:
+                log_func(f"Perfil de la ejecución guardado en {resumen['ruta_perfil']}")
+        except OSError as e:
+            logging.error(f"No se pudo guardar el perfil de la ejecución: {e}")
+
+    resumen["estadisticas"] = stats.como_dict()
+    return resumen
+
+def huella_producto(producto):
+    return hashlib.sha1(json.dumps(producto, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def calcular_instantanea(productos):
+    """Huella de cada producto transformado por SKU, para detectar qué artículos cambiaron en Factusol."""
+    return {normalizar_sku(producto["sku"]): huella_producto(producto) for producto in productos}
+
+def cargar_instantanea(ruta):
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"No se pudo leer la instantánea de productos en {ruta}: {e}")
+        return None
+
+def guardar_instantanea(ruta, instantanea):
+    ruta_temporal = f"{ruta}.tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(instantanea, archivo)
+    os.replace(ruta_temporal, ruta)
+
+def preparar_productos(opciones, log_func, stop_event, stats, resumen, al_exportar=None):
+    """
+    Exportación, transformación y validación comunes a la sincronización completa y la incremental.
+    al_exportar se llama al terminar la exportación (ver VigilanteBaseDatos).
+    Devuelve (estado, productos válidos, informe de validación); estado es None si se puede
+    continuar, o el estado final de la ejecución ("cancelada" o "skus_duplicados").
+    """
+    csv_path = opciones['csv_path']
+    # Con varias bases (db_path separado por ';') se exportan a la vez y sus productos se combinan
+    rutas = rutas_bases(opciones)
+    # Solo se exportan (y luego se leen) las tablas y columnas de las funciones activas
+    tablas = tablas_necesarias(funciones_activas(opciones), opciones['almacenes'])
+    archivos_csv = [f"{tabla}.csv" for tabla in tablas]
+    with stats.etapa("exportacion"):
+        if len(rutas) > 1:
+            directorios = exportar_bases(rutas, csv_path, log_func, tablas=tablas)
+        else:
+            exportar_a_csv(opciones['db_path'], csv_path, send_to_gui=log_func, tablas=tablas)
+    if al_exportar:
+        al_exportar()
+
+    if stop_event.is_set():
+        logging.info("Sincronización cancelada después de exportar CSV.")
+        return "cancelada", None, None
+
+    with stats.etapa("transformacion"):
+        if len(rutas) > 1:
+            productos_nuevos = transformar_bases(directorios, archivos_csv, opciones, log_func)
+        else:
+            productos_nuevos = procesar_csv_a_json(
+                [os.path.join(csv_path, archivo) for archivo in archivos_csv], tarifa=opciones['tarifa'], almacenes=opciones['almacenes'],
+                categorias=opciones['gestionar_categorias']
+            )
+    resumen["productos"] = len(productos_nuevos)
+    stats.contar("productos", len(productos_nuevos))
+
+    # Validación de todos los productos en una pasada, antes de llamar a la API
+    with stats.etapa("validacion"):
+        productos_validos, informe = validar_productos(productos_nuevos, gestionar_precio=opciones['gestionar_precio'])
+    registrar_informe(informe, log_func)
+    resumen["validacion"] = resumir_validacion(informe)
+    stats.contar("productos_excluidos", informe["excluidos"])
+
+    skus_duplicados = informe["skus_duplicados"]
+    if skus_duplicados:
+        mensaje_duplicados = f"Se encontraron SKUs duplicados: {', '.join(skus_duplicados)}. Por favor, corrígelos antes de continuar."
+        logging.warning(mensaje_duplicados)
+        log_func(mensaje_duplicados)
+
+        # Detener el proceso ya que no podemos continuar con SKUs duplicados
+        resumen["skus_duplicados"] = sorted(skus_duplicados)
+        return "skus_duplicados", None, informe
+
+    return None, productos_validos, informe
+
+
+def sincronizar_tienda(tienda, productos_validos, informe, opciones, log_func, stop_event, solo_planificar, stats):
+    """Diferencias y aplicación en la tienda activa (ver en_tiendas), con sus archivos de trabajo."""
+    ruta = obtener_ruta_tienda(opciones['csv_path'], tienda.nombre)
+    if opciones['gestionar_categorias']:
+        # Cada tienda tiene sus propios IDs de categoría; al solo planificar no se crea ninguna
+        with stats.etapa("categorias"):
+            productos_validos = asignar_categorias(productos_validos, MapaCategorias(obtener_ruta_categorias(ruta)), log_func, crear=not solo_planificar)
+
+    return sincronizar_productos(
+        productos_validos,
+        log_func=log_func,
+        stop_event=stop_event,
+        gestionar_precio=opciones['gestionar_precio'],
+        gestionar_stock=opciones['gestionar_stock'],
+        crear_productos=opciones['crear_productos'],
+        accion_no_existentes=opciones['accion_no_existentes'],
+        ruta_plan=obtener_ruta_plan(ruta),
+        solo_planificar=solo_planificar,
+        ruta_diario=obtener_ruta_diario(ruta),
+        tiempo_limite=opciones.get('tiempo_limite'),
+        ruta_estado=obtener_ruta_estado(ruta),
+        skus_excluidos=informe["skus_excluidos"]
+    )
+
+def estado_resultado(resultado):
+    return "cancelada" if resultado is None or resultado.get("cancelada") else "completada"
+
+def en_tiendas(tiendas, trabajo, opciones, log_func, stats, estado_de=estado_resultado):
+    """
+    Ejecuta trabajo(tienda, ruta, log_func, stats) en cada tienda a la vez, un hilo por tienda, con
+    la tienda activa y ruta como carpeta de sus archivos de trabajo (estado remoto, plan, diario,
+    instantánea). Cada tienda respeta su propio rate limit y registra sus estadísticas aparte; la
+    principal, en las de la ejecución. Con una sola tienda no se abren hilos.
+    Devuelve el resultado de la principal y un resumen por tienda adicional.
+    """
+    def ejecutar(tienda, log_tienda, stats_tienda):
+        ruta = obtener_ruta_tienda(opciones['csv_path'], tienda.nombre)
+        if not os.path.exists(ruta):
+            os.makedirs(ruta)
+        with usar_tienda(tienda), estadisticas.usar(stats_tienda):
+            return trabajo(tienda, ruta, log_tienda, stats_tienda)
+
+    def ejecutar_adicional(tienda):
+        stats_tienda = estadisticas.EstadisticasSincronizacion(f"{stats.modo}_{tienda.nombre}")
+        try:
+            resultado = ejecutar(tienda, lambda mensaje: log_func(f"[{tienda.nombre}] {mensaje}"), stats_tienda)
+            estado = estado_de(resultado)
+        except Exception as e:
+            logging.exception(f"Error al sincronizar la tienda {tienda.nombre}")
+            resultado, estado = {"error": str(e)}, "error"
+
+        stats_tienda.finalizar(estado)
+        try:
+            stats_tienda.guardar(obtener_ruta_estadisticas(obtener_ruta_tienda(opciones['csv_path'], tienda.nombre)))
+        except OSError as e:
+            logging.error(f"No se pudieron guardar las estadísticas de la tienda {tienda.nombre}: {e}")
+        return {"estado": estado, "sincronizacion": resultado, "estadisticas": stats_tienda.como_dict()}
+
+    if len(tiendas) == 1:
+        return ejecutar(tiendas[0], log_func, stats), {}
+
+    log_func(f"Sincronizando {len(tiendas)} tiendas en paralelo: {', '.join(tienda.nombre for tienda in tiendas)}.")
+    with ThreadPoolExecutor(max_workers=len(tiendas)) as executor:
+        futuros = {
+            tienda.nombre: executor.submit(ejecutar, tienda, log_func, stats) if tienda.nombre == "principal" else executor.submit(ejecutar_adicional, tienda)
+            for tienda in tiendas
+        }
+        adicionales = {nombre: futuro.result() for nombre, futuro in futuros.items() if nombre != "principal"}
+        return futuros["principal"].result(), adicionales
+
+def tiendas_al_dia(resultado, adicionales):
+    """Si la principal y todas las tiendas adicionales terminaron sin errores ni operaciones pendientes."""
+    if resultado is None or resultado.get("cancelada") or resultado.get("pendientes"):
+        return False
+    return all(
+        tienda["estado"] == "completada" and not (tienda["sincronizacion"] or {}).get("pendientes")
+        for tienda in adicionales.values()
+    )
+
+def skus_con_error(resultado, adicionales):
+    """SKU con alguna operación fallida en la principal o en las tiendas adicionales."""
+    skus = set((resultado or {}).get("skus_con_error", []))
+    for tienda in adicionales.values():
+        skus.update((tienda["sincronizacion"] or {}).get("skus_con_error", []))
+    return skus
+
+def guardar_instantaneas(tiendas, opciones, instantanea, skus_con_error=()):
+    """
+    Guarda la instantánea de cada tienda sin los SKU con errores, para que la próxima incremental los
+    vuelva a sincronizar: los que siguen en Factusol quedan como cambiados y los quitados conservan la
+    huella anterior, así que se vuelven a quitar.
+    """
+    for tienda in tiendas:
+        ruta = obtener_ruta_instantanea(obtener_ruta_tienda(opciones['csv_path'], tienda.nombre))
+        guardar = dict(instantanea)
+        if skus_con_error:
+            anterior = cargar_instantanea(ruta) or {}
+            for sku in skus_con_error:
+                guardar.pop(sku, None)
+                if sku not in instantanea and sku in anterior:
+                    guardar[sku] = anterior[sku]
+        guardar_instantanea(ruta, guardar)
+
+def sincronizar_tiendas(tiendas, productos_validos, informe, opciones, log_func, stop_event, solo_planificar, stats):
+    """Sincroniza los mismos productos en todas las tiendas (ver en_tiendas)."""
+    return en_tiendas(
+        tiendas,
+        lambda tienda, ruta, log_tienda, stats_tienda: sincronizar_tienda(tienda, productos_validos, informe, opciones, log_tienda, stop_event, solo_planificar, stats_tienda),
+        opciones, log_func, stats
+    )
+
+def ejecutar_sincronizacion(opciones, log_func, stop_event, solo_planificar=False, al_exportar=None):
+    """
+    Exportación → transformación → sincronización con las opciones de cargar_opciones.
+    Con tiendas adicionales en el .env, la exportación y la transformación se hacen una sola vez y
+    se sincronizan todas las tiendas en paralelo.
+    Devuelve un resumen serializable con el estado final de la ejecución.
+    """
+    inicio = time.monotonic()
+    resumen = {"modo": "planificacion" if solo_planificar else "completa", "estado": "completada"}
+    stats = iniciar_estadisticas(resumen["modo"], opciones)
+
+    def finalizar(estado, **datos):
+        resumen.update(datos)
+        resumen["estado"] = estado
+        resumen["duracion_segundos"] = round(time.monotonic() - inicio, 2)
+        return registrar_estadisticas(stats, resumen, opciones, log_func)
+
+    logging.info("Iniciando sincronización manual...")
+    if stop_event.is_set():
+        logging.info("Sincronización cancelada antes de comenzar.")
+        return finalizar("cancelada")
+
+    estado, productos_validos, informe = preparar_productos(opciones, log_func, stop_event, stats, resumen, al_exportar)
+    if estado:
+        return finalizar(estado)
+
+    tiendas = cargar_tiendas()
+    resultado, adicionales = sincronizar_tiendas(tiendas, productos_validos, informe, opciones, log_func, stop_event, solo_planificar, stats)
+    if adicionales:
+        resumen["tiendas"] = adicionales
+
+    if resultado is None or resultado.get("cancelada"):
+        return finalizar("cancelada", sincronizacion=resultado)
+
+    # Punto de partida de la sincronización incremental, solo si todas las tiendas quedaron al día
+    if not solo_planificar and tiendas_al_dia(resultado, adicionales):
+        guardar_instantaneas(tiendas, opciones, calcular_instantanea(productos_validos), skus_con_error(resultado, adicionales))
+    return finalizar("completada", sincronizacion=resultado)
+
+def sincronizar_tienda_incremental(ruta, productos_validos, informe, actual, opciones, log_func, stop_event, stats):
+    """
+    Sincronización incremental en la tienda activa (ver en_tiendas): los artículos que cambiaron
+    desde su instantánea, planificados contra su estado remoto local.
+    """
+    estado_remoto = EstadoRemoto(obtener_ruta_estado(ruta))
+    anterior = cargar_instantanea(obtener_ruta_instantanea(ruta)) or {}
+    tienda_actual().reintentos_por_endpoint.clear()
+
+    cambiados = [producto for producto in productos_validos if anterior.get(normalizar_sku(producto["sku"])) != actual[normalizar_sku(producto["sku"])]]
+    excluidos = set(informe["skus_excluidos"])
+    quitados = {sku for sku in anterior if sku not in actual and sku not in excluidos}
+    log_func(f"Sincronización incremental: {len(cambiados)} artículos nuevos o modificados y {len(quitados)} quitados desde la última sincronización.")
+    resultado = {"cambiados": len(cambiados), "quitados": len(quitados), "cancelada": False, "pendientes": 0}
+    if not cambiados and not quitados:
+        return resultado
+
+    aplicado = sincronizar_cambios(ruta, estado_remoto, cambiados, quitados, informe, opciones, log_func, stop_event, stats)
+    if aplicado is None:
+        return None
+    resultado.update(aplicado)
+    return resultado
+
+def sincronizar_cambios(ruta, estado_remoto, cambiados, quitados, informe, opciones, log_func, stop_event, stats):
+    """
+    Planifica y aplica en la tienda activa solo los artículos cambiados y los SKU quitados, contra el
+    estado remoto local. Devuelve el resumen de aplicar_plan, o None si se canceló al planificar.
+    """
+    afectados = {normalizar_sku(producto["sku"]) for producto in cambiados} | quitados
+    existentes = [
+        producto for producto in estado_remoto.productos.values()
+        if any(normalizar_sku(variante.get("sku")) in afectados for variante in producto["variants"])
+    ]
+
+    with stats.etapa("obtencion_remota"):
+        # Los productos creados después de la última descarga completa no están en el estado local:
+        # se buscan por SKU para no crearlos dos veces
+        conocidos = {normalizar_sku(variante.get("sku")) for producto in existentes for variante in producto["variants"]}
+        for producto in cambiados:
+            sku = normalizar_sku(producto["sku"])
+            if sku in conocidos:
+                continue
+            remoto = obtener_producto_por_sku(sku)
+            if remoto:
+                estado_remoto.actualizar_producto(remoto)
+                existentes.append(estado_remoto.productos[str(remoto["id"])])
+
+    if opciones['gestionar_categorias']:
+        with stats.etapa("categorias"):
+            cambiados = asignar_categorias(cambiados, MapaCategorias(obtener_ruta_categorias(ruta)), log_func)
+
+    with stats.etapa("diferencias"):
+        plan = planificar_sincronizacion(
+            cambiados, existentes, log_func, stop_event,
+            opciones['gestionar_precio'], opciones['gestionar_stock'], opciones['crear_productos'], opciones['accion_no_existentes'],
+            informe["skus_excluidos"]
+        )
+    if plan is None:
+        return None
+    return aplicar_plan(plan, log_func, stop_event, tiempo_limite=opciones.get('tiempo_limite'), estado_remoto=estado_remoto)
+
+def ejecutar_sincronizacion_dirigida(opciones, log_func, stop_event, skus, tiendas=None):
+    """
+    Precio, stock y variantes de los SKU indicados (por ejemplo, los de productos modificados en
+    Tienda Nube según los webhooks) en todas las tiendas o en las indicadas, planificados contra el
+    estado remoto local como la incremental. No avanza la instantánea ni quita productos: los SKU
+    que ya no están en Factusol quedan para la próxima sincronización completa.
+    """
+    inicio = time.monotonic()
+    resumen = {"modo": "dirigida", "estado": "completada"}
+    stats = iniciar_estadisticas("dirigida", opciones)
+    skus = {normalizar_sku(sku) for sku in skus}
+
+    def finalizar(estado, **datos):
+        resumen.update(datos)
+        resumen["estado"] = estado
+        resumen["duracion_segundos"] = round(time.monotonic() - inicio, 2)
+        return registrar_estadisticas(stats, resumen, opciones, log_func)
+
+    estado, productos_validos, informe = preparar_productos(opciones, log_func, stop_event, stats, resumen)
+    if estado:
+        return finalizar(estado)
+
+    cambiados = [producto for producto in productos_validos if normalizar_sku(producto["sku"]) in skus]
+    log_func(f"Sincronización dirigida de {len(cambiados)} artículos de {len(skus)} SKU.")
+
+    def sincronizar(tienda, ruta, log_tienda, stats_tienda):
+        estado_remoto = EstadoRemoto(obtener_ruta_estado(ruta))
+        if estado_remoto.vacio():
+            log_tienda("No hay un estado de Tienda Nube guardado. Ejecute primero una sincronización completa.")
+            return None
+        tienda_actual().reintentos_por_endpoint.clear()
+        return sincronizar_cambios(ruta, estado_remoto, cambiados, set(), informe, opciones, log_tienda, stop_event, stats_tienda)
+
+    resultado, adicionales = en_tiendas(
+        tiendas or cargar_tiendas(), sincronizar, opciones, log_func, stats, estado_de=lambda resultado: estado_stock(resultado, stop_event)
+    )
+    if adicionales:
+        resumen["tiendas"] = adicionales
+    return finalizar(estado_stock(resultado, stop_event), sincronizacion=resultado)
+
+def ejecutar_sincronizacion_incremental(opciones, log_func, stop_event, al_exportar=None):
+    """
+    Sincroniza solo los artículos que cambiaron en Factusol desde la última sincronización: compara
+    la transformación con la instantánea guardada y planifica contra el estado remoto local, sin
+    descargar el catálogo de Tienda Nube. Si a alguna tienda le falta la instantánea o el estado
+    remoto hace una completa. La instantánea solo avanza cuando todas las tiendas quedan al día.
+    """
+    csv_path = opciones['csv_path']
+    tiendas = cargar_tiendas()
+    for tienda in tiendas:
+        ruta = obtener_ruta_tienda(csv_path, tienda.nombre)
+        if EstadoRemoto(obtener_ruta_estado(ruta)).vacio() or cargar_instantanea(obtener_ruta_instantanea(ruta)) is None:
+            log_func("No hay una sincronización completa previa con la que comparar. Se ejecuta una sincronización completa.")
+            return ejecutar_sincronizacion(opciones, log_func, stop_event, al_exportar=al_exportar)
+
+    inicio = time.monotonic()
+    resumen = {"modo": "incremental", "estado": "completada"}
+    stats = iniciar_estadisticas("incremental", opciones)
+
+    def finalizar(estado, **datos):
+        resumen.update(datos)
+        resumen["estado"] = estado
+        resumen["duracion_segundos"] = round(time.monotonic() - inicio, 2)
+        return registrar_estadisticas(stats, resumen, opciones, log_func)
+
+    estado, productos_validos, informe = preparar_productos(opciones, log_func, stop_event, stats, resumen, al_exportar)
+    if estado:
+        return finalizar(estado)
+
+    actual = calcular_instantanea(productos_validos)
+    resultado, adicionales = en_tiendas(
+        tiendas,
+        lambda tienda, ruta, log_tienda, stats_tienda: sincronizar_tienda_incremental(ruta, productos_validos, informe, actual, opciones, log_tienda, stop_event, stats_tienda),
+        opciones, log_func, stats
+    )
+    if adicionales:
+        resumen["tiendas"] = adicionales
+    if resultado is None or resultado["cancelada"]:
+        return finalizar("cancelada", sincronizacion=resultado)
+
+    resumen["cambiados"] = resultado.pop("cambiados")
+    resumen["quitados"] = resultado.pop("quitados")
+    if tiendas_al_dia(resultado, adicionales):
+        guardar_instantaneas(tiendas, opciones, actual, skus_con_error(resultado, adicionales))
+    return finalizar("completada", sincronizacion=resultado)
+
+def leer_una_vez(leer):
+    """Envuelve una lectura del stock para que la haga la primera tienda y las demás reutilicen su resultado."""
+    bloqueo = threading.Lock()
+    leido = []
+
+    def leer_compartido(csv_directory):
+        with bloqueo:
+            if not leido:
+                leido.append(leer(csv_directory))
+            return leido[0]
+    return leer_compartido
+
+def estado_stock(resultado, stop_event):
+    if resultado is None:
+        return "cancelada" if stop_event.is_set() else "sin_estado_remoto"
+    return "cancelada" if resultado.get("cancelada") else "completada"
+
+def ejecutar_sincronizacion_stock(opciones, log_func, stop_event, skus=None, tiendas=None):
+    """
+    Sincronización rápida de stock con las opciones de cargar_opciones en todas las tiendas (o en
+    las indicadas); con skus, solo de esos artículos. El stock de Factusol se exporta y se lee una
+    sola vez.
+    """
+    inicio = time.monotonic()
+    modo = "stock" if skus is None else "stock_dirigida"
+    if not opciones['gestionar_stock']:
+        # Igual que la sincronización completa, que no envía el stock si no se gestiona
+        log_func("La gestión de stock está desactivada en la configuración. No se sincroniza el stock.")
+        return {"modo": modo, "estado": "stock_desactivado", "duracion_segundos": 0}
+
+    stats = iniciar_estadisticas(modo, opciones)
+    logging.info("Iniciando sincronización de stock...")
+
+    tiendas = tiendas or cargar_tiendas()
+    leer_stock = None
+    if len(rutas_bases(opciones)) > 1:
+        leer_stock = lambda csv_directory: leer_stock_bases(opciones, csv_directory, log_func)
+    elif len(tiendas) > 1:
+        leer_stock = lambda csv_directory: exportar_y_leer_stock(opciones['db_path'], csv_directory, log_func, opciones['almacenes'])
+    if leer_stock and len(tiendas) > 1:
+        leer_stock = leer_una_vez(leer_stock)
+
+    resultado, adicionales = en_tiendas(
+        tiendas,
+        lambda tienda, ruta, log_tienda, stats_tienda: sincronizar_stock(
+            opciones['db_path'], opciones['csv_path'], log_func=log_tienda, stop_event=stop_event,
+            ruta_estado=obtener_ruta_estado(ruta), skus=skus, leer_stock=leer_stock,
+            almacenes=opciones['almacenes']
+        ),
+        opciones, log_func, stats, estado_de=lambda resultado: estado_stock(resultado, stop_event)
+    )
+
+    resumen = {
+        "modo": modo,
+        "estado": estado_stock(resultado, stop_event),
+        "sincronizacion": resultado,
+        "duracion_segundos": round(time.monotonic() - inicio, 2)
+    }
+    if adicionales:
+        resumen["tiendas"] = adicionales
+    return registrar_estadisticas(stats, resumen, opciones, log_func)
+
+def aplicar_plan_tienda(ruta_plan, ruta, opciones, log_func, stop_event):
+    """Aplica el plan de ruta_plan en la tienda activa (ver en_tiendas) registrando su avance en su diario."""
+    if not os.path.exists(ruta_plan):
+        log_func(f"No existe un plan guardado en {ruta_plan}. Calcule un plan primero.")
+        return {"sin_plan": True, "cancelada": False}
+
+    return aplicar_plan(
+        cargar_plan(ruta_plan), log_func=log_func, stop_event=stop_event,
+        diario=DiarioOperaciones(obtener_ruta_diario(ruta)),
+        tiempo_limite=opciones.get('tiempo_limite'),
+        estado_remoto=EstadoRemoto(obtener_ruta_estado(ruta))
+    )
+
+def estado_plan(resultado):
+    return "sin_plan" if resultado.get("sin_plan") else estado_resultado(resultado)
+
+def aplicar_plan_guardado(opciones, log_func, stop_event, ruta_plan=None):
+    """
+    Aplica el último plan calculado de cada tienda registrando su avance en el diario. Con ruta_plan,
+    aplica ese plan en la tienda principal.
+    """
+    inicio = time.monotonic()
+    csv_path = opciones['csv_path']
+    tiendas = [tienda for tienda in cargar_tiendas() if not ruta_plan or tienda.nombre == "principal"]
+    rutas_plan = {tienda.nombre: ruta_plan or obtener_ruta_plan(obtener_ruta_tienda(csv_path, tienda.nombre)) for tienda in tiendas}
+
+    if not any(os.path.exists(ruta) for ruta in rutas_plan.values()):
+        log_func(f"No existe un plan guardado en {rutas_plan['principal']}. Calcule un plan primero.")
+        return {"modo": "aplicar_plan", "estado": "sin_plan", "duracion_segundos": 0}
+
+    stats = iniciar_estadisticas("aplicar_plan", opciones)
+    resultado, adicionales = en_tiendas(
+        tiendas,
+        lambda tienda, ruta, log_tienda, stats_tienda: aplicar_plan_tienda(rutas_plan[tienda.nombre], ruta, opciones, log_tienda, stop_event),
+        opciones, log_func, stats, estado_de=estado_plan
+    )
+
+    resumen = {
+        "modo": "aplicar_plan",
+        "estado": estado_plan(resultado),
+        "sincronizacion": resultado,
+        "duracion_segundos": round(time.monotonic() - inicio, 2)
+    }
+    if adicionales:
+        resumen["tiendas"] = adicionales
+    return registrar_estadisticas(stats, resumen, opciones, log_func)
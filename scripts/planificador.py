@@ -0,0 +1,259 @@
+# scripts/planificador.py
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+
+from scripts.configuracion import obtener_ruta_bloqueo
+
+# Una sola sincronización a la vez, sea manual o programada
+bloqueo_sincronizacion = threading.Lock()
+# Y un solo proceso sincronizando: la ventana, cli.py y app_flask escriben el mismo estado remoto y
+# el mismo diario. Por defecto, obtener_ruta_bloqueo()
+ruta_bloqueo = None
+
+MODOS_PROGRAMABLES = ("completa", "stock", "incremental")
+
+# Margen para ejecutar un disparo que se retrasó (por ejemplo porque el equipo estaba ocupado)
+MARGEN_DISPARO_ATRASADO = 15 * 60
+
+
+class BloqueoArchivo:
+    """
+    Bloqueo exclusivo entre procesos sobre un archivo (msvcrt en Windows, flock en el resto). El
+    sistema lo libera cuando el proceso termina, así que un cierre inesperado no lo deja tomado.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+
+    def adquirir(self):
+        archivo = open(self.ruta, 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                archivo.seek(0)
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return False
+        self._archivo = archivo
+        return True
+
+    def liberar(self):
+        if self._archivo is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self._archivo.seek(0)
+                msvcrt.locking(self._archivo.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._archivo.close()
+            self._archivo = None
+
+
+def ejecutar_en_exclusiva(funcion, nombre, log_func=logging.info):
+    """
+    Ejecuta la función si no hay otra sincronización en curso, en este proceso o en otro.
+    Retorna False si se omitió.
+    """
+    if not bloqueo_sincronizacion.acquire(blocking=False):
+        log_func(f"Ya hay una sincronización en curso. Se omite '{nombre}'.")
+        return False
+
+    try:
+        bloqueo = BloqueoArchivo(ruta_bloqueo or obtener_ruta_bloqueo())
+        if not bloqueo.adquirir():
+            log_func(f"Otro proceso (la aplicación, cli.py o el servidor de webhooks) está sincronizando. Se omite '{nombre}'.")
+            return False
+        try:
+            funcion()
+            return True
+        finally:
+            bloqueo.liberar()
+    finally:
+        bloqueo_sincronizacion.release()
+
+def sincronizacion_en_curso():
+    return bloqueo_sincronizacion.locked()
+
+def interpretar_programaciones(texto):
+    """
+    Convierte el texto de config.txt en una lista de (modo, expresión).
+    Formato: entradas separadas por ';' con el modo y la cadencia, por ejemplo
+    "completa 02:00; stock cada 10m". Las cadencias válidas son "HH:MM" (diaria) y "cada Nm" o "cada Nh".
+    """
+    programaciones = []
+    for entrada in (texto or "").split(";"):
+        entrada = entrada.strip()
+        if not entrada:
+            continue
+
+        modo, _, expresion = entrada.partition(" ")
+        modo = modo.lower()
+        expresion = expresion.strip()
+        if modo not in MODOS_PROGRAMABLES:
+            raise ValueError(f"Modo de sincronización desconocido en '{entrada}'. Use: {', '.join(MODOS_PROGRAMABLES)}.")
+        crear_trigger(expresion)  # Valida la expresión
+        programaciones.append((modo, expresion))
+    return programaciones
+
+def crear_trigger(expresion):
+    # APScheduler se importa al programar para no demorar el arranque de la aplicación
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    coincidencia = re.fullmatch(r"(\d{1,2}):(\d{2})", expresion)
+    if coincidencia:
+        return CronTrigger(hour=int(coincidencia.group(1)), minute=int(coincidencia.group(2)))
+
+    coincidencia = re.fullmatch(r"cada\s+(\d+)\s*([mh])", expresion, re.IGNORECASE)
+    if coincidencia and int(coincidencia.group(1)) > 0:
+        cantidad = int(coincidencia.group(1))
+        if coincidencia.group(2).lower() == "h":
+            return IntervalTrigger(hours=cantidad)
+        return IntervalTrigger(minutes=cantidad)
+
+    raise ValueError(f"Cadencia no válida: '{expresion}'. Use HH:MM o 'cada N m'/'cada N h'.")
+
+
+class PlanificadorSincronizacion:
+    """
+    Varias programaciones con nombre sobre un BackgroundScheduler de APScheduler.
+
+    - Nunca se superponen ejecuciones: todas comparten bloqueo_sincronizacion y el disparo que
+      encuentra otra sincronización en curso se omite.
+    - Los disparos atrasados se agrupan en una sola ejecución (coalesce).
+    - La próxima ejecución de cada programación se guarda en disco; si al abrir la aplicación
+      una programación quedó vencida mientras estaba cerrada, se ejecuta una vez enseguida.
+    """
+
+    def __init__(self, ruta_estado, log_func=logging.info):
+        self.ruta_estado = ruta_estado
+        self.log_func = log_func
+        self.scheduler = None
+        self.estado = self._cargar_estado()
+        self._bloqueo_estado = threading.Lock()
+
+    def _cargar_estado(self):
+        if not os.path.exists(self.ruta_estado):
+            return {}
+        try:
+            with open(self.ruta_estado, encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"No se pudo leer el estado de las programaciones en {self.ruta_estado}: {e}")
+            return {}
+
+    def _guardar_estado(self):
+        ruta_temporal = f"{self.ruta_estado}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(self.estado, archivo, ensure_ascii=False, indent=2)
+        os.replace(ruta_temporal, self.ruta_estado)
+
+    def programar(self, programaciones, funciones):
+        """
+        Reemplaza las programaciones activas. programaciones es una lista de (modo, expresión) y
+        funciones un diccionario {modo: función} con lo que ejecuta cada modo.
+        """
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        if self.scheduler is None:
+            self.scheduler = BackgroundScheduler()
+        self.scheduler.remove_all_jobs()
+
+        ahora = datetime.now().astimezone()
+        with self._bloqueo_estado:
+            # Se descartan los estados de programaciones que ya no existen
+            nombres = {f"{modo} {expresion}" for modo, expresion in programaciones}
+            self.estado = {nombre: datos for nombre, datos in self.estado.items() if nombre in nombres}
+
+        for modo, expresion in programaciones:
+            nombre = f"{modo} {expresion}"
+            opciones_job = {}
+
+            proxima_guardada = self.estado.get(nombre, {}).get("proxima_ejecucion")
+            if proxima_guardada and datetime.fromisoformat(proxima_guardada) < ahora:
+                self.log_func(f"La sincronización programada '{nombre}' se perdió mientras la aplicación estaba cerrada. Se ejecutará ahora.")
+                opciones_job["next_run_time"] = ahora
+
+            self.scheduler.add_job(
+                self._ejecutar, crear_trigger(expresion), args=[nombre, funciones[modo]], id=nombre, name=nombre,
+                coalesce=True, max_instances=1, misfire_grace_time=MARGEN_DISPARO_ATRASADO, replace_existing=True,
+                **opciones_job
+            )
+
+        if not self.scheduler.running:
+            self.scheduler.start()
+        self._actualizar_proximas()
+
+        for nombre in sorted(self.estado):
+            self.log_func(f"Sincronización '{nombre}' programada. Próxima ejecución: {self.estado[nombre].get('proxima_ejecucion')}")
+
+    def cancelar(self):
+        if self.scheduler:
+            self.scheduler.remove_all_jobs()
+        with self._bloqueo_estado:
+            self.estado = {}
+            self._guardar_estado()
+
+    def detener(self):
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def _ejecutar(self, nombre, funcion):
+        inicio = time.monotonic()
+        try:
+            ejecutada = ejecutar_en_exclusiva(funcion, nombre, self.log_func)
+            resultado = "completada" if ejecutada else "omitida"
+        except Exception as e:
+            logging.error(f"Error en la sincronización programada '{nombre}': {e}")
+            resultado = "error"
+
+        with self._bloqueo_estado:
+            datos = self.estado.setdefault(nombre, {})
+            datos["ultima_ejecucion"] = datetime.now().astimezone().isoformat(timespec="seconds")
+            datos["duracion_segundos"] = round(time.monotonic() - inicio, 2)
+            datos["resultado"] = resultado
+        self._actualizar_proximas()
+
+    def _actualizar_proximas(self):
+        with self._bloqueo_estado:
+            for job in self.scheduler.get_jobs():
+                proxima = job.next_run_time.isoformat(timespec="seconds") if job.next_run_time else None
+                self.estado.setdefault(job.id, {})["proxima_ejecucion"] = proxima
+            self._guardar_estado()
+
+
+def programaciones_desde_opciones(opciones):
+    """
+    Programaciones a partir de las opciones: la lista avanzada 'programaciones' de config.txt más
+    la hora de la sincronización completa diaria y el intervalo de la de stock de la ventana.
+    """
+    programaciones = interpretar_programaciones(opciones.get('programaciones', ''))
+
+    hora = (opciones.get('hora_sincronizacion') or '').strip()
+    if hora:
+        crear_trigger(hora)
+        programaciones.append(("completa", hora))
+
+    intervalo = str(opciones.get('intervalo_stock_minutos') or '').strip()
+    if intervalo:
+        if not intervalo.isdigit() or int(intervalo) <= 0:
+            raise ValueError(f"Intervalo de stock no válido: '{intervalo}'. Indique los minutos entre sincronizaciones.")
+        programaciones.append(("stock", f"cada {int(intervalo)}m"))
+
+    # Sin repetidos, conservando el orden
+    return list(dict.fromkeys(programaciones))
@@ -0,0 +1,188 @@
+# scripts/registro_logs.py
+
+import os
+import re
+import bisect
+from array import array
+from collections import deque, defaultdict
+from datetime import datetime
+
+# Palabras indexadas: letras, números, guiones y guiones bajos (cubre los SKU de Factusol)
+PATRON_PALABRA = re.compile(r"\w[\w\-]*")
+
+
+def tokenizar(texto):
+    return [palabra.lower() for palabra in PATRON_PALABRA.findall(texto)]
+
+
+class ArchivoVolcado:
+    """Archivo de log con las líneas que salieron del buffer y la posición de cada una en el archivo."""
+
+    def __init__(self, ruta, primer_seq):
+        self.ruta = ruta
+        self.primer_seq = primer_seq
+        self.posiciones = array('q')
+        self.tamano = 0
+
+    def ultimo_seq(self):
+        return self.primer_seq + len(self.posiciones) - 1
+
+
+class BufferLogs:
+    """
+    Log en memoria de tamaño acotado con índice de búsqueda.
+
+    Las últimas `capacidad` líneas se mantienen en un buffer circular; las más antiguas se vuelcan a
+    archivos rotativos en `directorio` (como máximo `copias` archivos de `tamano_maximo` bytes).
+    Un índice invertido palabra → líneas cubre tanto el buffer como lo volcado en esta sesión, de
+    modo que buscar un SKU no requiere recorrer todo el log.
+    """
+
+    def __init__(self, capacidad=20000, directorio=None, tamano_maximo=5 * 1024 * 1024, copias=5):
+        self.capacidad = capacidad
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self.copias = copias
+        self.lineas = deque()
+        self.primer_seq = 0  # Número de la línea más antigua del buffer
+        self.siguiente_seq = 0
+        self.seq_minimo = 0  # Número de la línea más antigua que todavía se puede recuperar
+        self.indice = defaultdict(list)
+        self.volcados = []
+        self._archivo = None
+        self._sesion = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._generacion = 0
+
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+    def agregar(self, mensajes):
+        """Agrega mensajes (pueden tener varias líneas). Devuelve la lista de líneas agregadas."""
+        nuevas = []
+        for mensaje in mensajes:
+            nuevas.extend(mensaje.split("\n"))
+
+        for linea in nuevas:
+            seq = self.siguiente_seq
+            self.siguiente_seq += 1
+            self.lineas.append(linea)
+            for palabra in set(tokenizar(linea)):
+                self.indice[palabra].append(seq)
+
+        exceso = len(self.lineas) - self.capacidad
+        if exceso > 0:
+            self._volcar([self.lineas.popleft() for _ in range(exceso)])
+            self.primer_seq += exceso
+            if not self.directorio:
+                self._descartar_hasta(self.primer_seq)
+
+        if self._archivo:
+            self._archivo.flush()
+        return nuevas
+
+    def _volcar(self, lineas):
+        if not self.directorio:
+            return
+
+        for linea in lineas:
+            if self._archivo is None or self.volcados[-1].tamano >= self.tamano_maximo:
+                self._rotar()
+
+            volcado = self.volcados[-1]
+            datos = (linea + "\n").encode('utf-8')
+            volcado.posiciones.append(volcado.tamano)
+            self._archivo.write(datos)
+            volcado.tamano += len(datos)
+
+    def _rotar(self):
+        if self._archivo:
+            self._archivo.close()
+
+        self._generacion += 1
+        ruta = os.path.join(self.directorio, f"sincronizador_{self._sesion}_{self._generacion:04d}.log")
+        primer_seq = self.volcados[-1].ultimo_seq() + 1 if self.volcados else self.seq_minimo
+        self.volcados.append(ArchivoVolcado(ruta, primer_seq))
+        self._archivo = open(ruta, 'ab')
+
+        # Se eliminan los archivos más antiguos, incluidos los de sesiones anteriores
+        archivos = sorted(
+            nombre for nombre in os.listdir(self.directorio)
+            if nombre.startswith("sincronizador_") and nombre.endswith(".log")
+        )
+        for nombre in archivos[:-self.copias]:
+            ruta_antigua = os.path.join(self.directorio, nombre)
+            os.remove(ruta_antigua)
+            if self.volcados and self.volcados[0].ruta == ruta_antigua:
+                descartado = self.volcados.pop(0)
+                self._descartar_hasta(descartado.ultimo_seq() + 1)
+
+    def _descartar_hasta(self, seq):
+        """Quita del índice las líneas que ya no se pueden recuperar."""
+        self.seq_minimo = seq
+        for palabra in list(self.indice):
+            posiciones = self.indice[palabra]
+            corte = bisect.bisect_left(posiciones, seq)
+            if corte == len(posiciones):
+                del self.indice[palabra]
+            elif corte:
+                del posiciones[:corte]
+
+    def obtener_linea(self, seq):
+        if seq >= self.primer_seq:
+            return self.lineas[seq - self.primer_seq]
+
+        posicion = bisect.bisect_right([volcado.primer_seq for volcado in self.volcados], seq) - 1
+        volcado = self.volcados[posicion]
+        with open(volcado.ruta, 'rb') as archivo:
+            archivo.seek(volcado.posiciones[seq - volcado.primer_seq])
+            return archivo.readline().decode('utf-8').rstrip("\n")
+
+    def _recorrer(self):
+        """Todas las líneas recuperables de esta sesión, de la más antigua a la más reciente."""
+        for volcado in self.volcados:
+            with open(volcado.ruta, 'rb') as archivo:
+                for desplazamiento, linea in enumerate(archivo):
+                    yield volcado.primer_seq + desplazamiento, linea.decode('utf-8').rstrip("\n")
+        yield from enumerate(self.lineas, start=self.primer_seq)
+
+    def buscar(self, termino, regex=False):
+        """
+        Devuelve una lista de (seq, inicio, fin, línea) con las coincidencias de termino.
+        Si todas las palabras del término están indexadas se usa el índice (búsqueda de SKU); las
+        expresiones regulares y los fragmentos de palabra recorren el log.
+        """
+        if not termino:
+            return []
+
+        if regex:
+            patron = re.compile(termino, re.IGNORECASE)
+            resultados = []
+            for seq, linea in self._recorrer():
+                coincidencia = patron.search(linea)
+                if coincidencia:
+                    resultados.append((seq, coincidencia.start(), coincidencia.end(), linea))
+            return resultados
+
+        termino_min = termino.lower()
+        palabras = set(tokenizar(termino))
+        if palabras and all(palabra in self.indice for palabra in palabras):
+            # Intersección de las líneas que contienen cada palabra, empezando por la menos frecuente
+            ordenadas = sorted(palabras, key=lambda palabra: len(self.indice[palabra]))
+            candidatas = set(self.indice[ordenadas[0]])
+            for palabra in ordenadas[1:]:
+                candidatas.intersection_update(self.indice[palabra])
+            lineas = ((seq, self.obtener_linea(seq)) for seq in sorted(candidatas) if seq >= self.seq_minimo)
+        else:
+            lineas = self._recorrer()
+
+        resultados = []
+        for seq, linea in lineas:
+            inicio = linea.lower().find(termino_min)
+            if inicio >= 0:
+                resultados.append((seq, inicio, inicio + len(termino), linea))
+        return resultados
+
+    def cerrar(self):
+        if self._archivo:
+            self._archivo.close()
+            self._archivo = None
@@ -1,16 +1,26 @@
 # scripts/sincronizador.py
 
 import os
-import pyodbc
-import pandas as pd
 import sys
 import logging
 import requests
 import time
+import random
+import threading
 import json
 import csv
+import uuid
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from itertools import chain
+from urllib.parse import quote
+from email.utils import parsedate_to_datetime
 from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from scripts.diario import DiarioOperaciones
+from scripts.estado_remoto import EstadoRemoto
+from scripts.fuentes import crear_fuente, agregado
+from scripts import estadisticas
 
 # Inicialización
 dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
@@ -18,11 +28,180 @@ load_dotenv(dotenv_path)
 
 access_token = os.getenv("ACCESS_TOKEN")
 user_id = os.getenv("USER_ID")
-api_url = f"https://api.tiendanube.com/v1/{user_id}/products"
+# Se puede apuntar a otro servidor (por ejemplo el emulador de app_flask.py) para pruebas de carga
+api_base = os.getenv("API_BASE_URL", "https://api.tiendanube.com").rstrip("/")
+
+# Política de reintentos común a todas las llamadas a la API
+REINTENTOS_MAXIMOS = 5
+ESPERA_BASE_REINTENTO = 1.0
+ESPERA_MAXIMA_REINTENTO = 60.0
+TIMEOUT_SOLICITUD = 30
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+# Un POST con 500/502/504 o sin respuesta puede haberse aplicado igualmente: solo se reintenta si
+# Tienda Nube lo rechazó sin procesarlo, para no crear productos o variantes duplicados
+ESTADOS_REINTENTABLES_POST = {429, 503}
+
+_bloqueo_reintentos = threading.Lock()
+
+
+class ContextoTienda:
+    """
+    Una tienda de Tienda Nube: credenciales, sesión HTTP (que reutiliza las conexiones y cuyas
+    cabeceras x-rate-limit-* marcan el ritmo de esa tienda), reintentos por endpoint y contadores
+    de la última aplicación de un plan. Las funciones de este módulo trabajan con la tienda activa
+    en el hilo (ver usar_tienda); por defecto, la de ACCESS_TOKEN y USER_ID.
+    """
+
+    def __init__(self, nombre, access_token, user_id):
+        self.nombre = nombre
+        self.access_token = access_token
+        self.user_id = user_id
+        self.api_url = f"{api_base}/v1/{user_id}/products"
+        self.sesion = requests.Session()
+        self.reintentos_por_endpoint = {}
+        self.contadores = {}
+        self.reiniciar_contadores()
+
+    def reiniciar_contadores(self):
+        self.contadores = {"creados": 0, "actualizados": 0, "eliminados": 0, "ocultados": 0}
+        return self.contadores
+
+
+tienda_principal = ContextoTienda("principal", access_token, user_id)
+# Sesión y URL de la tienda principal, para quien las use directamente (benchmarks, pruebas)
+api_url = tienda_principal.api_url
+sesion = tienda_principal.sesion
+
+_contexto = threading.local()
+
+
+def tienda_actual():
+    return getattr(_contexto, "tienda", None) or tienda_principal
+
+@contextmanager
+def usar_tienda(tienda):
+    """Dirige las llamadas a la API hechas en este hilo a la tienda indicada."""
+    anterior = getattr(_contexto, "tienda", None)
+    _contexto.tienda = tienda
+    try:
+        yield tienda
+    finally:
+        _contexto.tienda = anterior
+
+def cargar_tiendas():
+    """
+    Tiendas a sincronizar: la principal y las de TIENDAS_ADICIONALES en el .env (nombres separados
+    por comas), cada una con sus variables ACCESS_TOKEN_<NOMBRE> y USER_ID_<NOMBRE>.
+    """
+    tiendas = [tienda_principal]
+    for nombre in (nombre.strip() for nombre in os.getenv("TIENDAS_ADICIONALES", "").split(",")):
+        if not nombre:
+            continue
+        sufijo = nombre.upper()
+        token, usuario = os.getenv(f"ACCESS_TOKEN_{sufijo}"), os.getenv(f"USER_ID_{sufijo}")
+        if not token or not usuario:
+            logging.error(f"Faltan ACCESS_TOKEN_{sufijo} o USER_ID_{sufijo} para la tienda '{nombre}'; no se sincronizará.")
+            continue
+        tiendas.append(ContextoTienda(nombre, token, usuario))
+    return tiendas
+
+TABLAS_FACTUSOL = ["F_ART", "F_ARC", "F_STO", "F_STC", "F_LTA", "F_LTC", "F_ALM", "F_TAR", "F_FAM", "F_SEC"]
+
+# Campos que la transformación agrega a los productos para uso interno; no se envían a Tienda Nube
+CAMPOS_INTERNOS = ("categorias_factusol",)
+
+# Columnas de F_ART que usa cualquier sincronización de productos, sea cual sea la configuración
+COLUMNAS_ARTICULOS = ["CODART", "DESART", "DEWART", "SUWART", "EANART", "PCOART"]
 
-productos_creados = 0
-productos_actualizados = 0
-productos_eliminados = 0
+
+def consultas_stock(almacenes=None):
+    """
+    F_STO y F_STC con el stock ya sumado en la consulta: por artículo y por artículo, talla y color,
+    de los almacenes indicados (códigos de F_ALM) o de todos si no se indica ninguno.
+    """
+    return {
+        "F_STO": agregado(["ARTSTO"], ["DISSTO"], {"ALMSTO": almacenes}),
+        "F_STC": agregado(["ARTSTC", "CE1STC", "CE2STC"], ["DISSTC"], {"ALMSTC": almacenes})
+    }
+
+def tablas_factusol(almacenes=None):
+    """Exportación completa: todas las tablas, con el stock agregado por almacén."""
+    tablas = {tabla: None for tabla in TABLAS_FACTUSOL}
+    tablas.update(consultas_stock(almacenes))
+    return tablas
+
+def tablas_por_funcion(almacenes=None):
+    """
+    Tablas y columnas que lee cada función de la sincronización. Las claves con varias funciones son
+    lo que solo hace falta si todas están activas (por ejemplo, el stock de cada variante).
+    """
+    stock = consultas_stock(almacenes)
+    return {
+        ("precios",): {"F_LTA": ["TARLTA", "ARTLTA", "PRELTA"], "F_TAR": ["CODTAR"]},
+        ("precios", "variantes"): {"F_LTC": ["TARLTC", "ARTLTC", "CE1LTC", "CE2LTC", "PRELTC"]},
+        ("stock",): {"F_STO": stock["F_STO"]},
+        ("stock", "variantes"): {"F_STC": stock["F_STC"]},
+        ("variantes",): {"F_ARC": ["ARTARC", "CE1ARC", "CE2ARC"]},
+        ("categorias",): {"F_ART": ["FAMART"], "F_FAM": ["CODFAM", "DESFAM", "SECFAM"], "F_SEC": ["CODSEC", "DESSEC"]},
+        ("almacenes",): {"F_ALM": ["CODALM"]}
+    }
+
+def funciones_activas(opciones):
+    """Funciones que usa una sincronización completa con estas opciones (ver tablas_por_funcion)."""
+    funciones = set()
+    # Los productos nuevos se crean con su precio y stock aunque no se gestionen en los existentes
+    if opciones['gestionar_precio'] or opciones['crear_productos']:
+        funciones.add("precios")
+    if opciones['gestionar_stock'] or opciones['crear_productos']:
+        funciones.add("stock")
+    if opciones['gestionar_variantes']:
+        funciones.add("variantes")
+    if opciones['gestionar_categorias']:
+        funciones.add("categorias")
+    if opciones['almacenes']:
+        funciones.add("almacenes")
+    return funciones
+
+def tablas_necesarias(funciones, almacenes=None, columnas_articulos=COLUMNAS_ARTICULOS):
+    """Unión de las tablas y columnas de las funciones indicadas, en el formato de exportar_a_csv."""
+    tablas = {"F_ART": list(columnas_articulos)}
+    for requeridas, declaradas in tablas_por_funcion(almacenes).items():
+        if not funciones.issuperset(requeridas):
+            continue
+        for tabla, columnas in declaradas.items():
+            if tabla in tablas and not isinstance(columnas, dict):
+                tablas[tabla] += [columna for columna in columnas if columna not in tablas[tabla]]
+            else:
+                tablas[tabla] = columnas
+    return tablas
+
+def tablas_stock(almacenes=None):
+    """Columnas mínimas para la sincronización rápida de stock: no necesita las combinaciones de F_ARC."""
+    declaradas = tablas_por_funcion(almacenes)
+    tablas = {"F_ART": ["CODART", "SUWART"], **declaradas[("stock",)], **declaradas[("stock", "variantes")]}
+    if almacenes:
+        tablas.update(declaradas[("almacenes",)])
+    return tablas
+
+def comprobar_almacenes(filas_alm, almacenes):
+    """Avisa de los almacenes configurados que no existen en F_ALM: no aportarían stock."""
+    if not almacenes or not filas_alm:
+        return
+    existentes = {fila["CODALM"] for fila in filas_alm}
+    desconocidos = [codigo for codigo in almacenes if codigo not in existentes]
+    if desconocidos:
+        logging.warning(f"Los almacenes {', '.join(desconocidos)} no existen en Factusol; no se sumará stock de ellos.")
+
+# Prioridades de las operaciones del plan, de mayor (0) a menor importancia
+PRIORIDAD_STOCK_AGOTADO = 0
+PRIORIDAD_STOCK = 1
+PRIORIDAD_PRECIO = 2
+PRIORIDAD_CREACION = 3
+PRIORIDAD_BAJA = 4
+PRIORIDAD_OTROS = 5
+
+# Un plan interrumpido solo se reanuda si no es más antiguo que esto
+ANTIGUEDAD_MAXIMA_PLAN = timedelta(hours=24)
 
 # Configuración de logging
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s", handlers=[
@@ -31,12 +210,19 @@ logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %
 
 def obtener_headers():
     return {
-        'Authentication': f'bearer {access_token}',
+        'Authentication': f'bearer {tienda_actual().access_token}',
         'User-Agent': 'Integrador Factusol 2 (info@tiendapocket.com)',
         'Content-Type': 'application/json'
     }
 
-def exportar_a_csv(access_file_path, csv_directory, send_to_gui=None):
+def exportar_a_csv(access_file_path, csv_directory, send_to_gui=None, tablas=None):
+    """
+    Exporta las tablas de Factusol a CSV. tablas es un diccionario {tabla: columnas}; con columnas
+    None se exporta la tabla completa y con un agregado de scripts/fuentes.py, la tabla agregada.
+    Por defecto se exportan las tablas de tablas_factusol().
+    access_file_path puede ser la base de Access, una copia en SQLite o una carpeta de CSV (ver
+    scripts/fuentes.py).
+    """
     logger = logging.getLogger()
 
     if not access_file_path or not csv_directory:
@@ -49,24 +235,29 @@ def exportar_a_csv(access_file_path, csv_directory, send_to_gui=None):
         if send_to_gui:
             send_to_gui(f"Directorio {csv_directory} creado.")
 
-    tables = ["F_ART", "F_ARC", "F_STO", "F_STC", "F_LTA", "F_LTC", "F_ALM", "F_TAR", "F_FAM", "F_SEC"]
+    try:
+        fuente = crear_fuente(access_file_path)
+    except ImportError as e:
+        error_message = f"No se puede leer {access_file_path}: {e}"
+        logger.error(error_message)
+        if send_to_gui:
+            send_to_gui(error_message)
+        return
+
+    if tablas is None:
+        tablas = tablas_factusol()
 
     def export_table_to_csv(table_name):
-        conn_str = (
-            r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
-            r"DBQ=" + access_file_path + ";"
-        )
         try:
-            conn = pyodbc.connect(conn_str)
-            query = f"SELECT * FROM {table_name}"
-            df = pd.read_sql(query, conn)
+            inicio = time.perf_counter()
             csv_file_path = os.path.join(csv_directory, f"{table_name}.csv")
-            df.to_csv(csv_file_path, sep=';', index=False, encoding='utf-8')
+            filas = fuente.exportar_tabla(table_name, tablas[table_name], csv_file_path)
+            estadisticas.en_curso().registrar_tabla(table_name, time.perf_counter() - inicio, filas)
             message = f"Datos exportados de la tabla {table_name} a {csv_file_path}"
             logger.info(message)
             if send_to_gui:
                 send_to_gui(message)
-        except pyodbc.Error as e:
+        except fuente.error_conexion as e:
             error_message = f"Error al conectar con la base de datos: {e}"
             logger.error(error_message)
             if send_to_gui:
@@ -76,38 +267,116 @@ def exportar_a_csv(access_file_path, csv_directory, send_to_gui=None):
             logger.error(error_message)
             if send_to_gui:
                 send_to_gui(error_message)
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     with ThreadPoolExecutor() as executor:
-        executor.map(export_table_to_csv, tables)
+        executor.map(estadisticas.en_curso().en_hilo(export_table_to_csv), tablas)
+
+def entero_cabecera(headers, nombre):
+    """Valor entero de una cabecera, o None si falta o no se entiende (proxies, páginas de error)."""
+    try:
+        return int(headers.get(nombre))
+    except (TypeError, ValueError):
+        return None
 
 def manejar_rate_limit(headers):
-    rate_remaining = int(headers.get('x-rate-limit-remaining', 0))
-    rate_reset = int(headers.get('x-rate-limit-reset', 0))
-    
+    rate_remaining = entero_cabecera(headers, 'x-rate-limit-remaining')
+    if rate_remaining is None:
+        # Sin cabeceras de rate limit no hay nada que respetar
+        return
+    rate_reset = entero_cabecera(headers, 'x-rate-limit-reset') or 0
+
     if rate_remaining < 5:
-        wait_time = max(rate_reset / 1000.0, 1)
+        wait_time = min(max(rate_reset / 1000.0, 1), ESPERA_MAXIMA_REINTENTO)
         logging.info(f"Rate limit alcanzado. Esperando {wait_time:.2f} segundos para continuar...")
+        estadisticas.en_curso().registrar_espera(wait_time)
         time.sleep(wait_time)
     elif rate_remaining < 10:
         logging.info("Cerca del límite de tasa, reduciendo la frecuencia de las solicitudes...")
+        estadisticas.en_curso().registrar_espera(1)
         time.sleep(1)
 
+def calcular_espera_reintento(headers, intento):
+    """
+    Segundos a esperar antes de reintentar: lo que indique Tienda Nube o backoff exponencial con jitter.
+    Lo que piden las cabeceras se limita a ESPERA_MAXIMA_REINTENTO, y si no se entienden se usa el backoff.
+    """
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return min(float(retry_after), ESPERA_MAXIMA_REINTENTO) + random.uniform(0, 1)
+        except ValueError:
+            try:
+                # Retry-After también puede venir como fecha HTTP
+                fecha = parsedate_to_datetime(retry_after)
+                espera = max((fecha - datetime.now(fecha.tzinfo)).total_seconds(), 0)
+                return min(espera, ESPERA_MAXIMA_REINTENTO) + random.uniform(0, 1)
+            except (TypeError, ValueError):
+                pass
+
+    rate_reset = entero_cabecera(headers, 'x-rate-limit-reset')
+    if rate_reset is not None and entero_cabecera(headers, 'x-rate-limit-remaining') == 0:
+        return min(max(rate_reset, 0) / 1000.0, ESPERA_MAXIMA_REINTENTO) + random.uniform(0, 1)
+
+    # Full jitter: espera aleatoria entre 0 y el tope exponencial del intento
+    return random.uniform(0, min(ESPERA_MAXIMA_REINTENTO, ESPERA_BASE_REINTENTO * 2 ** intento))
+
+def registrar_reintento(endpoint):
+    reintentos = tienda_actual().reintentos_por_endpoint
+    with _bloqueo_reintentos:
+        reintentos[endpoint] = reintentos.get(endpoint, 0) + 1
+
+def solicitar(metodo, url, endpoint, **kwargs):
+    """
+    Realiza una llamada a la API de Tienda Nube aplicando la política de reintentos.
+    Reintenta los errores transitorios (429, 5xx, timeouts y errores de conexión) con backoff
+    exponencial y jitter, respetando Retry-After y x-rate-limit-reset. endpoint identifica la
+    llamada en los contadores de reintentos (por ejemplo "PUT variants").
+    """
+    kwargs.setdefault("headers", obtener_headers())
+    kwargs.setdefault("timeout", TIMEOUT_SOLICITUD)
+    estados_reintentables = ESTADOS_REINTENTABLES_POST if metodo == "POST" else ESTADOS_REINTENTABLES
+    clave = f"{metodo} {endpoint}"
+
+    for intento in range(REINTENTOS_MAXIMOS + 1):
+        try:
+            response = tienda_actual().sesion.request(metodo, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            estadisticas.en_curso().registrar_llamada(clave, type(e).__name__)
+            reintentable = isinstance(e, requests.ConnectTimeout) or metodo != "POST"
+            if not reintentable or intento == REINTENTOS_MAXIMOS:
+                raise
+            espera = calcular_espera_reintento({}, intento)
+            logging.warning(f"{clave}: error de conexión ({e}). Reintento {intento + 1} de {REINTENTOS_MAXIMOS} en {espera:.1f} segundos.")
+            registrar_reintento(clave)
+            estadisticas.en_curso().registrar_espera(espera, "reintentos")
+            time.sleep(espera)
+            continue
+
+        cuerpo_enviado = getattr(response.request, "body", None) or b""
+        estadisticas.en_curso().registrar_llamada(clave, response.status_code, len(cuerpo_enviado), len(response.content or b""))
+
+        if response.status_code in estados_reintentables and intento < REINTENTOS_MAXIMOS:
+            espera = calcular_espera_reintento(response.headers, intento)
+            logging.warning(f"{clave}: respuesta {response.status_code}. Reintento {intento + 1} de {REINTENTOS_MAXIMOS} en {espera:.1f} segundos.")
+            registrar_reintento(clave)
+            estadisticas.en_curso().registrar_espera(espera, "reintentos")
+            time.sleep(espera)
+            continue
+
+        manejar_rate_limit(response.headers)
+        return response
+
 def normalizar_sku(sku):
     return sku.strip().upper() if sku else ""
 
 def obtener_productos_existentes():
-    headers = obtener_headers()
     productos_existentes = []
     pagina = 1
     max_paginas = 50
 
     while True:
         params = {'page': pagina, 'per_page': 200}
-        response = requests.get(api_url, headers=headers, params=params)
-        manejar_rate_limit(response.headers)
+        response = solicitar("GET", tienda_actual().api_url, "products", params=params)
 
         if response.status_code == 200:
             data = response.json()
@@ -134,53 +403,154 @@ def obtener_productos_existentes():
 
     return productos_existentes
 
-def obtener_variantes_existentes(producto_id, reintentos=3):
-    headers = obtener_headers()
-    url_variants = f"{api_url}/{producto_id}/variants"
+def obtener_variantes_existentes(producto_id):
+    url_variants = f"{tienda_actual().api_url}/{producto_id}/variants"
     variantes_existentes = []
 
-    for intento in range(reintentos):
-        response = requests.get(url_variants, headers=headers)
-        manejar_rate_limit(response.headers)
+    # Los errores transitorios ya se reintentan en solicitar
+    response = solicitar("GET", url_variants, "variants")
 
-        if response.status_code == 200:
-            variantes_existentes = response.json()
-            logging.debug(f"Variantes obtenidas para el producto {producto_id}: {len(variantes_existentes)} variantes")
-            break  # Salir del ciclo al obtener correctamente las variantes
+    if response.status_code == 200:
+        variantes_existentes = response.json()
+        logging.debug(f"Variantes obtenidas para el producto {producto_id}: {len(variantes_existentes)} variantes")
+    elif response.status_code == 404:
+        logging.error(f"El producto {producto_id} no tiene variantes o no se encuentra. Error 404.")
+    else:
+        logging.error(f"Error al obtener variantes para el producto {producto_id}: {response.status_code} {response.text}")
 
-        elif response.status_code == 500:
-            logging.warning(f"Error al obtener variantes para el producto {producto_id} (Intento {intento + 1} de {reintentos}): {response.status_code} {response.text}")
-            time.sleep(2 ** intento)  # Exponencial backoff
+    return variantes_existentes
 
-        elif response.status_code == 404:
-            logging.error(f"El producto {producto_id} no tiene variantes o no se encuentra. Error 404.")
-            break  # No tiene sentido seguir reintentando si es un 404
+def obtener_producto_por_sku(sku):
+    url = f"{tienda_actual().api_url}/sku/{quote(sku, safe='')}"
+    response = solicitar("GET", url, "products/sku")
 
-        else:
-            logging.error(f"Error al obtener variantes para el producto {producto_id}: {response.status_code} {response.text}")
-            break  # Otros errores, salir del ciclo
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code != 404:
+        logging.error(f"Error al buscar el producto con SKU {sku}: {response.status_code} {response.text}")
+    return None
 
-    return variantes_existentes
+def obtener_producto(producto_id):
+    """Producto de Tienda Nube con sus variantes, o None si ya no existe."""
+    response = solicitar("GET", f"{tienda_actual().api_url}/{producto_id}", "products")
 
-def variantes_iguales(var_existente, var_nuevo):
-    def safe_float(value):
-        try:
-            return float(value) if value is not None else 0.0
-        except ValueError:
-            return 0.0
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code != 404:
+        logging.error(f"Error al obtener el producto {producto_id}: {response.status_code} {response.text}")
+    return None
+
+def obtener_orden(orden_id):
+    url = f"{tienda_actual().api_url.rsplit('/products', 1)[0]}/orders/{orden_id}"
+    response = solicitar("GET", url, "orders")
+
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code != 404:
+        logging.error(f"Error al obtener la orden {orden_id}: {response.status_code} {response.text}")
+    return None
+
+def url_categorias():
+    return f"{tienda_actual().api_url.rsplit('/products', 1)[0]}/categories"
+
+def obtener_categorias_existentes():
+    """Todas las categorías de la tienda, página por página."""
+    categorias = []
+    pagina = 1
+    while True:
+        response = solicitar("GET", url_categorias(), "categories", params={'page': pagina, 'per_page': 200})
+        if response.status_code != 200:
+            # Tienda Nube responde 404 al pedir una página posterior a la última
+            if response.status_code != 404:
+                logging.error(f"Error al obtener categorías: {response.status_code} {response.text}")
+            break
+
+        data = response.json()
+        categorias.extend(data)
+        if not data or 'rel="next"' not in response.headers.get('Link', ''):
+            break
+        pagina += 1
+    return categorias
+
+def crear_categoria(nombre, padre_id=None):
+    """Crea una categoría (dentro de padre_id si se indica) y la devuelve, o None si falla."""
+    response = solicitar("POST", url_categorias(), "categories", json={"name": {"es": nombre}, "parent": padre_id})
+
+    if response.status_code == 201:
+        logging.info(f"Categoría '{nombre}' creada correctamente.")
+        return response.json()
+    logging.error(f"Error al crear la categoría '{nombre}': {response.status_code} {response.text}")
+    return None
+
+def actualizar_categoria(categoria_id, nombre, padre_id=None):
+    """Renombra o mueve una categoría. Retorna True si se aplicó, False si falló y None si ya no existe."""
+    response = solicitar("PUT", f"{url_categorias()}/{categoria_id}", "categories", json={"name": {"es": nombre}, "parent": padre_id})
 
+    if response.status_code == 200:
+        logging.info(f"Categoría {categoria_id} actualizada a '{nombre}'.")
+        return True
+    if response.status_code == 404:
+        return None
+    logging.error(f"Error al actualizar la categoría {categoria_id}: {response.status_code} {response.text}")
+    return False
+
+def clave_variante(variante):
+    """SKU normalizado y valores de variación ordenados, identifican una variante dentro de un producto."""
+    return (
+        normalizar_sku(variante.get("sku")),
+        tuple(sorted(val.get("es") for val in variante.get("values", []) if val.get("es")))
+    )
+
+def safe_float(value):
+    try:
+        return float(value) if value is not None else 0.0
+    except ValueError:
+        return 0.0
+
+def datos_variante(variante, gestionar_precio=True, gestionar_stock=True):
+    """
+    Campos de una variante de Factusol que se comparan y se envían: sin precio o stock si no se
+    gestionan, y sin precio, stock o costo desconocidos (None o vacíos), que en Tienda Nube borrarían el valor.
+    """
+    datos = {
+        campo: valor for campo, valor in variante.items()
+        if not (campo in ("price", "stock", "cost") and (valor is None or str(valor).strip() == ""))
+    }
+    if not gestionar_precio:
+        datos.pop("price", None)
+    if not gestionar_stock:
+        datos.pop("stock", None)
+    return datos
+
+def variantes_iguales(var_existente, var_nuevo):
+    """Igualdad en los campos que trae la variante nueva (ver datos_variante)."""
     return (
         normalizar_sku(var_existente.get("sku")) == normalizar_sku(var_nuevo.get("sku")) and
-        safe_float(var_existente.get("price")) == safe_float(var_nuevo.get("price")) and
-        int(var_existente.get("stock") or 0) == int(var_nuevo.get("stock") or 0) and
-        safe_float(var_existente.get("cost", 0)) == safe_float(var_nuevo.get("cost", 0))
+        ("price" not in var_nuevo or safe_float(var_existente.get("price")) == safe_float(var_nuevo.get("price"))) and
+        ("stock" not in var_nuevo or int(var_existente.get("stock") or 0) == int(var_nuevo.get("stock") or 0)) and
+        ("cost" not in var_nuevo or safe_float(var_existente.get("cost", 0)) == safe_float(var_nuevo.get("cost", 0)))
     )
 
-def productos_iguales(prod_existente, prod_nuevo):
+def campos_modificados(var_existente, var_nuevo):
+    """Campos de la variante nueva cuyo valor difiere del de la variante en Tienda Nube."""
+    campos = []
+    if "price" in var_nuevo and safe_float(var_existente.get("price")) != safe_float(var_nuevo.get("price")):
+        campos.append("price")
+    if "stock" in var_nuevo and int(var_existente.get("stock") or 0) != int(var_nuevo.get("stock") or 0):
+        campos.append("stock")
+    if "cost" in var_nuevo and safe_float(var_existente.get("cost", 0)) != safe_float(var_nuevo.get("cost", 0)):
+        campos.append("cost")
+    if "barcode" in var_nuevo and (var_existente.get("barcode") or "") != (var_nuevo.get("barcode") or ""):
+        campos.append("barcode")
+    if clave_variante(var_existente)[1] != clave_variante(var_nuevo)[1]:
+        campos.append("values")
+    return campos
+
+def productos_iguales(prod_existente, prod_nuevo, gestionar_precio=True, gestionar_stock=True):
     # Removemos la comparación de los nombres de productos.
     
     variantes_existente = prod_existente.get("variants", [])
-    variantes_nuevo = prod_nuevo.get("variants", [])
+    variantes_nuevo = [datos_variante(variante, gestionar_precio, gestionar_stock) for variante in prod_nuevo.get("variants", [])]
 
     if len(variantes_existente) != len(variantes_nuevo):
         logging.debug(f"Diferencia en cantidad de variantes: {len(variantes_existente)} vs {len(variantes_nuevo)}")
@@ -199,98 +569,99 @@ def productos_iguales(prod_existente, prod_nuevo):
     return True
 
 
-def actualizar_producto(producto_id, producto_data, variantes_existentes, gestionar_precio=True, gestionar_stock=True):
-    global productos_actualizados
+def planificar_actualizacion_producto(producto_id, producto_nuevo, variantes_existentes, gestionar_precio=True, gestionar_stock=True):
+    """Genera las operaciones para actualizar las variantes de un producto que difiere del de Tienda Nube."""
+    operaciones = []
 
-    headers = obtener_headers()
+    # Mapear las variantes existentes por SKU y valores para encontrar el ID correcto: las variantes
+    # de un artículo de Factusol comparten el SKU
+    variantes_existentes_dict = {clave_variante(v): v for v in variantes_existentes}
 
-    # Removemos el nombre del producto de los datos a actualizar.
-    if "name" in producto_data:
-        del producto_data["name"]
+    # Trabajamos sobre copias: el nombre del producto no se actualiza y los datos de Factusol no se modifican
+    for variante_nueva in producto_nuevo.get("variants", []):
+        variante = datos_variante(variante_nueva, gestionar_precio, gestionar_stock)
+        sku_normalizado, valores_variacion = clave_variante(variante)
+        variante_existente = variantes_existentes_dict.get((sku_normalizado, valores_variacion))
 
-    # Crear una copia del producto_data, solo trabajaremos con las variantes
-    producto_data_sin_variantes = {
-        "variants": producto_data.get("variants", [])
-    }
+        if not variante_existente:
+            logging.warning(f"No se encontró variante existente para SKU: {sku_normalizado} con valores {valores_variacion}. Verifica que el SKU esté correcto.")
+            continue
 
-    # Mapear las variantes existentes por SKU para encontrar el ID correcto
-    variantes_existentes_dict = {normalizar_sku(v.get('sku')): v for v in variantes_existentes}
+        # Las variantes que no cambiaron no consumen llamadas a la API
+        campos = campos_modificados(variante_existente, variante)
+        if not campos:
+            continue
 
-    # Si no se deben gestionar el precio o stock, eliminarlos de las variantes
-    for variante in producto_data_sin_variantes["variants"]:
-        sku_normalizado = normalizar_sku(variante.get('sku'))
-        variante_existente = variantes_existentes_dict.get(sku_normalizado)
+        operaciones.append(crear_operacion("actualizar_variante", sku_normalizado, variante, producto_id, variante_existente.get("id"), campos))
 
-        if variante_existente:
-            variante['id'] = variante_existente.get('id')
-        else:
-            logging.warning(f"No se encontró variante existente para SKU: {sku_normalizado}. Verifica que el SKU esté correcto.")
+    logging.debug(f"Planificando actualización de variantes para producto {producto_id}. {len(operaciones)} variantes serán actualizadas.")
+    return operaciones
 
-        if not gestionar_precio:
-            variante.pop("price", None)
-        if not gestionar_stock:
-            variante.pop("stock", None)
+def ids_categorias(producto):
+    # Tienda Nube devuelve las categorías completas; el estado local y los productos nuevos, solo sus IDs
+    return sorted({categoria["id"] if isinstance(categoria, dict) else categoria for categoria in producto.get("categories") or []})
 
-    logging.debug(f"Actualizando variantes para producto {producto_id}. {len(producto_data_sin_variantes['variants'])} variantes serán actualizadas.")
+def planificar_categorias(producto_existente, producto_nuevo):
+    """Operación para asignar a un producto existente las categorías de Factusol, si cambiaron."""
+    if "categories" not in producto_nuevo:
+        return []
 
-    for variante in producto_data_sin_variantes["variants"]:
-        variante_id = variante.get("id")
-        logging.debug(f"Procesando variante con ID: {variante_id}")
+    categorias = sorted(set(producto_nuevo["categories"]))
+    if ids_categorias(producto_existente) == categorias:
+        return []
+    return [crear_operacion("actualizar_producto", normalizar_sku(producto_nuevo.get("sku")), {"categories": categorias}, producto_existente["id"], campos=["categories"])]
 
-        if variante_id:
-            url_variante = f"{api_url}/{producto_id}/variants/{variante_id}"
-            response_variante = requests.put(url_variante, headers=headers, json=variante)
-            manejar_rate_limit(response_variante.headers)
+def planificar_actualizacion_variantes(producto_id, variantes_nuevas, variantes_existentes, gestionar_precio=True, gestionar_stock=True):
+    """Genera las operaciones para las variantes que cambiaron o faltan en un producto existente."""
+    operaciones = []
 
-            if response_variante.status_code == 200:
-                logging.info(f"Variante {variante_id} del producto {producto_id} actualizada correctamente.")
-                productos_actualizados += 1
-            else:
-                logging.error(f"Error al actualizar variante {variante_id}: {response_variante.status_code} {response_variante.text}")
-        else:
-            logging.warning(f"No se encontró el ID de la variante para el producto {producto_id}. Saltando la actualización de esta variante.")
-
-
-def actualizar_variantes(producto_id, variantes_nuevas):
-    headers = obtener_headers()
-    variantes_existentes = obtener_variantes_existentes(producto_id)
-    
-    variantes_existentes_dict = {
-        (normalizar_sku(var.get("sku")), tuple(sorted(val.get("es") for val in var.get("values", []) if val.get("es")))): var
-        for var in variantes_existentes
-    }
+    variantes_existentes_dict = {clave_variante(var): var for var in variantes_existentes}
 
     for variante_nueva in variantes_nuevas:
-        sku_normalizado = normalizar_sku(variante_nueva.get("sku"))
-        valores_variacion = tuple(sorted(val.get("es") for val in variante_nueva.get("values", []) if val.get("es")))
-
-        key = (sku_normalizado, valores_variacion)
+        variante_nueva = datos_variante(variante_nueva, gestionar_precio, gestionar_stock)
+        key = clave_variante(variante_nueva)
+        sku_normalizado, valores_variacion = key
         if key in variantes_existentes_dict:
             variante_existente = variantes_existentes_dict[key]
 
-            if not variantes_iguales(variante_existente, variante_nueva):
-                variante_id = variante_existente.get("id")
-                url = f"{api_url}/{producto_id}/variants/{variante_id}"
-                response = requests.put(url, headers=headers, json=variante_nueva)
-                manejar_rate_limit(response.headers)
-
-                if response.status_code == 200:
-                    logging.info(f"Variante {variante_id} del producto {producto_id} actualizada correctamente.")
-                else:
-                    logging.error(f"Error al actualizar variante {variante_id} del producto {producto_id}: {response.status_code} {response.text}")
+            campos = campos_modificados(variante_existente, variante_nueva)
+            if campos:
+                operaciones.append(crear_operacion("actualizar_variante", sku_normalizado, variante_nueva, producto_id, variante_existente.get("id"), campos))
             else:
                 logging.info(f"Variante {sku_normalizado} con valores {valores_variacion} ya está actualizada y no necesita cambios.")
         else:
-            logging.info(f"Creando nueva variante {variante_nueva['sku']} para el producto {producto_id} con valores {valores_variacion}...")
+            logging.info(f"Se creará la variante {variante_nueva['sku']} para el producto {producto_id} con valores {valores_variacion}.")
+            operaciones.append(crear_operacion("crear_variante", sku_normalizado, variante_nueva, producto_id))
+
+    return operaciones
+
+def actualizar_variante(producto_id, variante_id, variante_data):
+    url = f"{tienda_actual().api_url}/{producto_id}/variants/{variante_id}"
+    response = solicitar("PUT", url, "variants", json=variante_data)
+
+    if response.status_code == 200:
+        logging.info(f"Variante {variante_id} del producto {producto_id} actualizada correctamente.")
+        tienda_actual().contadores["actualizados"] += 1
+        return True
+
+    logging.error(f"Error al actualizar variante {variante_id} del producto {producto_id}: {response.status_code} {response.text}")
+    return False
 
-            if not crear_variante(producto_id, variante_nueva):
-                logging.warning(f"Se omitió la creación de la variante con SKU {sku_normalizado} porque ya existe.")
+def actualizar_producto(producto_id, producto_data):
+    url = f"{tienda_actual().api_url}/{producto_id}"
+    response = solicitar("PUT", url, "products", json=producto_data)
+
+    if response.status_code == 200:
+        logging.info(f"Producto {producto_id} actualizado correctamente.")
+        tienda_actual().contadores["actualizados"] += 1
+        return True
+
+    logging.error(f"Error al actualizar producto {producto_id}: {response.status_code} {response.text}")
+    return False
 
 def crear_variante(producto_id, variante_data):
-    headers = obtener_headers()
-    url = f"{api_url}/{producto_id}/variants"
-    response = requests.post(url, headers=headers, json=variante_data)
-    manejar_rate_limit(response.headers)
+    url = f"{tienda_actual().api_url}/{producto_id}/variants"
+    response = solicitar("POST", url, "variants", json=variante_data)
 
     if response.status_code == 201:
         logging.info(f"Variante para producto {producto_id} creada correctamente.")
@@ -302,18 +673,23 @@ def crear_variante(producto_id, variante_data):
             logging.warning(f"Variante con SKU {variante_data['sku']} ya existe para el producto {producto_id}. No se creará nuevamente.")
         return False
 
-def crear_producto(producto_data, log_func=None):
-    global productos_creados
-
-    headers = obtener_headers()
+def datos_api(producto):
+    """
+    El producto como se envía a Tienda Nube: sin los campos internos de la transformación y sin
+    precio, stock o costo desconocidos en las variantes (ver datos_variante).
+    """
+    datos = {clave: valor for clave, valor in producto.items() if clave not in CAMPOS_INTERNOS}
+    if "variants" in datos:
+        datos["variants"] = [datos_variante(variante) for variante in datos["variants"]]
+    return datos
 
-    response = requests.post(api_url, headers=headers, json=producto_data)
-    manejar_rate_limit(response.headers)
+def crear_producto(producto_data, log_func=None):
+    response = solicitar("POST", tienda_actual().api_url, "products", json=datos_api(producto_data))
 
     if response.status_code == 201:
         if log_func:
             log_func("Producto creado correctamente.")
-        productos_creados += 1
+        tienda_actual().contadores["creados"] += 1
     else:
         try:
             error_message = response.json()
@@ -328,29 +704,130 @@ def crear_producto(producto_data, log_func=None):
     return response.status_code
 
 def eliminar_producto(producto_id):
-    global productos_eliminados
-
-    headers = obtener_headers()
-
-    url = f"{api_url}/{producto_id}"
-    response = requests.delete(url, headers=headers)
-    manejar_rate_limit(response.headers)
+    url = f"{tienda_actual().api_url}/{producto_id}"
+    response = solicitar("DELETE", url, "products")
 
     if response.status_code in [200, 204]:
         logging.info(f"Producto {producto_id} eliminado correctamente.")
-        productos_eliminados += 1
+        tienda_actual().contadores["eliminados"] += 1
+        return True
     else:
         logging.error(f"Error al eliminar producto {producto_id}: {response.status_code} {response.text}")
+        return False
 
-def procesar_csv_a_json(csv_files):
+def indexar_stock(filas_sto, filas_stc, clave=str):
+    """
+    Stock sin negativos de F_STO por artículo y de F_STC por (artículo, talla, color), tal como lo
+    deja sumado por almacén la exportación (ver consultas_stock). clave transforma el código de artículo.
+    """
+    stock_simple = {}
+    for fila in filas_sto:
+        stock_simple.setdefault(clave(fila["ARTSTO"]), max(int(float(fila.get("DISSTO") or 0)), 0))
+
+    stock_variantes = {}
+    for fila in filas_stc:
+        if not fila.get("CE1STC"):
+            continue
+        clave_variante = (clave(fila["ARTSTC"]), fila["CE1STC"], fila.get("CE2STC") or "")
+        stock_variantes.setdefault(clave_variante, max(int(float(fila.get("DISSTC") or 0)), 0))
+    return stock_simple, stock_variantes
+
+def stock_variante(stock_variantes, articulo, talla, color=""):
+    """Stock de una talla y color; si F_STC no distingue colores, el de la talla."""
+    stock = stock_variantes.get((articulo, talla, color or ""))
+    if stock is None and color:
+        stock = stock_variantes.get((articulo, talla, ""))
+    return stock
+
+def orden_tarifa(codigo):
+    # Los códigos de tarifa de Factusol suelen ser números: "2" va antes que "10"
+    return (0, int(codigo), codigo) if codigo.isdigit() else (1, 0, codigo)
+
+def elegir_tarifa(data, tarifa=None):
+    """
+    Tarifa de la que se toman los precios: la configurada o, si no hay, la de código más bajo de F_TAR
+    (o de las listas de precios si F_TAR no se exportó), para que sea siempre la misma.
+    """
+    codigos = {fila["CODTAR"] for fila in data.get("F_TAR.csv", []) if fila.get("CODTAR")}
+    if not codigos:
+        codigos = {fila["TARLTA"] for fila in data.get("F_LTA.csv", []) if fila.get("TARLTA")}
+        codigos.update(fila["TARLTC"] for fila in data.get("F_LTC.csv", []) if fila.get("TARLTC"))
+
+    if tarifa:
+        if codigos and tarifa not in codigos:
+            logging.warning(f"La tarifa {tarifa} no existe en Factusol.")
+        return tarifa
+    return min(codigos, key=orden_tarifa) if codigos else None
+
+def indexar_precios(filas_lta, filas_ltc):
+    """Precios de F_LTA por (artículo, tarifa) y de F_LTC por (artículo, tarifa, talla, color)."""
+    precios_articulos = {}
+    for fila in filas_lta:
+        precios_articulos.setdefault((fila["ARTLTA"], fila.get("TARLTA") or ""), fila.get("PRELTA"))
+
+    precios_variantes = {}
+    for fila in filas_ltc:
+        clave_variante = (fila["ARTLTC"], fila.get("TARLTC") or "", fila.get("CE1LTC") or "", fila.get("CE2LTC") or "")
+        precios_variantes.setdefault(clave_variante, fila.get("PRELTC"))
+    return precios_articulos, precios_variantes
+
+def precio_variante(precios_variantes, articulo, tarifa, talla, color=""):
+    """Precio de una talla y color en la tarifa; si F_LTC no distingue colores, el de la talla."""
+    precio = precios_variantes.get((articulo, tarifa, talla, color or ""))
+    if precio is None and color:
+        precio = precios_variantes.get((articulo, tarifa, talla, ""))
+    return precio
+
+def indexar_categorias(filas_fam, filas_sec):
+    """
+    Categorías de cada familia de F_FAM: su sección de F_SEC, si tiene, y la familia dentro de ella.
+    Cada categoría es {"clave", "nombre", "padre"}, con padre la clave de la categoría superior.
+    """
+    secciones = {fila["CODSEC"]: fila.get("DESSEC") or fila["CODSEC"] for fila in filas_sec if fila.get("CODSEC")}
+
+    categorias = {}
+    for fila in filas_fam:
+        codigo = fila.get("CODFAM")
+        if not codigo or codigo in categorias:
+            continue
+        ruta = []
+        seccion = fila.get("SECFAM")
+        if seccion in secciones:
+            ruta.append({"clave": f"seccion:{seccion}", "nombre": secciones[seccion], "padre": None})
+        ruta.append({"clave": f"familia:{codigo}", "nombre": fila.get("DESFAM") or codigo, "padre": ruta[0]["clave"] if ruta else None})
+        categorias[codigo] = ruta
+    return categorias
+
+def procesar_csv_a_json(csv_files, tarifa=None, almacenes=None, categorias=False):
+    """
+    Convierte las tablas exportadas en productos de Tienda Nube. Los precios se toman de la tarifa
+    indicada (ver elegir_tarifa); stock, precios y combinaciones se buscan por índices armados una
+    sola vez, no recorriendo las tablas por cada artículo. Las tablas que no están en csv_files
+    (funciones desactivadas) se tratan como vacías. Con categorias, cada producto lleva en
+    categorias_factusol las categorías de su familia (ver scripts/categorias.py).
+    """
     productos = []
     data = {}
 
     for csv_file in csv_files:
+        if not os.path.exists(csv_file):
+            continue
         with open(csv_file, newline='', encoding='utf-8') as file:
             reader = csv.DictReader(file, delimiter=';')
             data[os.path.basename(csv_file)] = list(reader)
 
+    comprobar_almacenes(data.get("F_ALM.csv", []), almacenes)
+    stock_simple, stock_variantes = indexar_stock(data.get("F_STO.csv", []), data.get("F_STC.csv", []))
+    tarifa = elegir_tarifa(data, tarifa)
+    precios_articulos, precios_variantes = indexar_precios(data.get("F_LTA.csv", []), data.get("F_LTC.csv", []))
+    if (precios_articulos or precios_variantes) and not any(clave[1] == tarifa for clave in chain(precios_articulos, precios_variantes)):
+        # Los artículos se conservan sin precio: se sincroniza su stock y el precio de Tienda Nube no cambia
+        logging.warning(f"Ningún artículo tiene precio en la tarifa {tarifa}; se sincronizan sin precio.")
+    categorias_familia = indexar_categorias(data.get("F_FAM.csv", []), data.get("F_SEC.csv", []))
+    combinaciones_articulo = {}
+    for arc_row in data.get("F_ARC.csv", []):
+        combinaciones_articulo.setdefault(arc_row["ARTARC"], []).append(arc_row)
+
     for row in data.get("F_ART.csv", []):
         if row.get("SUWART") != "1":
             continue
@@ -367,8 +844,10 @@ def procesar_csv_a_json(csv_files):
             "variants": [],
             "attributes": []
         }
+        if categorias:
+            producto["categorias_factusol"] = categorias_familia.get(row.get("FAMART"), [])
 
-        variantes_encontradas = [arc_row for arc_row in data.get("F_ARC.csv", []) if arc_row["ARTARC"] == row["CODART"]]
+        variantes_encontradas = combinaciones_articulo.get(row["CODART"], [])
         if variantes_encontradas:
             atributos_set = set()
 
@@ -393,24 +872,10 @@ def procesar_csv_a_json(csv_files):
                     atributos_set.add("Color")
                     variante["values"].append({"es": arc_row["CE2ARC"]})
 
-                for lt_row in data.get("F_LTC.csv", []):
-                    if lt_row["ARTLTC"] == row["CODART"] and lt_row["CE1LTC"] == arc_row["CE1ARC"]:
-                        variante["price"] = lt_row.get("PRELTC")
-                        break
-
-                stock_asignado = False
-                for st_row in data.get("F_STC.csv", []):
-                    if not st_row.get("CE1STC"):
-                        continue
-
-                    if st_row["ARTSTC"] == row["CODART"] and st_row["CE1STC"] == arc_row["CE1ARC"]:
-                        stock_value = int(float(st_row.get("DISSTC", 0)))
-                        variante["stock"] = max(stock_value, 0)
-                        stock_asignado = True
-                        break
+                variante["price"] = precio_variante(precios_variantes, row["CODART"], tarifa, arc_row["CE1ARC"], arc_row.get("CE2ARC"))
 
-                if not stock_asignado:
-                    variante["stock"] = 0
+                stock = stock_variante(stock_variantes, row["CODART"], arc_row["CE1ARC"], arc_row.get("CE2ARC"))
+                variante["stock"] = stock if stock is not None else 0
 
                 producto["variants"].append(variante)
 
@@ -424,8 +889,10 @@ def procesar_csv_a_json(csv_files):
 
             producto["variants"] = variantes_unicas
 
-            for nombre in atributos_set:
-                producto["attributes"].append({"es": nombre})
+            # En el orden de los valores de las variantes, y el mismo en todas las ejecuciones
+            for nombre in ("Talle", "Color"):
+                if nombre in atributos_set:
+                    producto["attributes"].append({"es": nombre})
 
         else:
             variante_simple = {
@@ -437,16 +904,8 @@ def procesar_csv_a_json(csv_files):
                 "values": []
             }
 
-            for lt_row in data.get("F_LTA.csv", []):
-                if lt_row["ARTLTA"] == row["CODART"]:
-                    variante_simple["price"] = lt_row.get("PRELTA")
-                    break
-
-            for st_row in data.get("F_STO.csv", []):
-                if st_row["ARTSTO"] == row["CODART"]:
-                    stock_value = int(float(st_row.get("DISSTO", 0)))
-                    variante_simple["stock"] = max(stock_value, 0)
-                    break
+            variante_simple["price"] = precios_articulos.get((row["CODART"], tarifa))
+            variante_simple["stock"] = stock_simple.get(row["CODART"])
 
             producto["variants"].append(variante_simple)
 
@@ -455,21 +914,20 @@ def procesar_csv_a_json(csv_files):
     return productos
 
 def ocultar_producto(producto_id):
-    global productos_ocultados  # Cambiamos a productos_ocultados, no productos_eliminados
-
-    headers = obtener_headers()
-    url = f"{api_url}/{producto_id}"
+    url = f"{tienda_actual().api_url}/{producto_id}"
     data = {
         "published": False
     }
 
-    response = requests.put(url, headers=headers, json=data)
-    manejar_rate_limit(response.headers)
+    response = solicitar("PUT", url, "products", json=data)
 
     if response.status_code == 200:
         logging.info(f"Producto {producto_id} ocultado correctamente.")
+        tienda_actual().contadores["ocultados"] += 1
+        return True
     else:
         logging.error(f"Error al ocultar producto {producto_id}: {response.status_code} {response.text}")
+        return False
 
 def detectar_duplicados_sku(productos):
     """Detectar productos en Tienda Nube con el mismo SKU, excluyendo productos variables."""
@@ -499,23 +957,56 @@ def detectar_duplicados_sku(productos):
 
     return duplicados
 
-def sincronizar_productos(productos_nuevos, log_func, stop_event, gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes):
-    global productos_creados, productos_actualizados, productos_eliminados, productos_ocultados
-    productos_creados = 0
-    productos_actualizados = 0
-    productos_eliminados = 0
-    productos_ocultados = 0
 
-    productos_existentes = obtener_productos_existentes()
+def prioridad_operacion(tipo, datos=None, campos=()):
+    """Prioridad de una operación (menor se ejecuta antes) según el valor de su cambio para la tienda."""
+    if tipo in ("crear_producto", "crear_variante"):
+        return PRIORIDAD_CREACION
+    if tipo in ("ocultar_producto", "eliminar_producto"):
+        return PRIORIDAD_BAJA
+    if "stock" in campos:
+        return PRIORIDAD_STOCK_AGOTADO if int((datos or {}).get("stock") or 0) == 0 else PRIORIDAD_STOCK
+    if "price" in campos:
+        return PRIORIDAD_PRECIO
+    return PRIORIDAD_OTROS
+
+def crear_operacion(tipo, sku, datos=None, producto_id=None, variante_id=None, campos=()):
+    """Operación serializable de un plan de sincronización."""
+    return {
+        "tipo": tipo,
+        "sku": sku,
+        "producto_id": producto_id,
+        "variante_id": variante_id,
+        "datos": datos,
+        "campos": list(campos),
+        "prioridad": prioridad_operacion(tipo, datos, campos)
+    }
+
+def planificar_sincronizacion(productos_nuevos, productos_existentes, log_func, stop_event, gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes, skus_excluidos=()):
+    """
+    Calcula las operaciones necesarias para llevar Tienda Nube al estado de Factusol.
+    No realiza ninguna escritura: devuelve un plan serializable que luego ejecuta aplicar_plan.
+    skus_excluidos son artículos que siguen en Factusol pero no pasaron la validación: no se
+    sincronizan y tampoco se ocultan ni eliminan.
+    Retorna None si la sincronización se cancela durante la planificación.
+    """
+    skus_excluidos = set(skus_excluidos)
+    operaciones = []
 
     # Diccionario para verificar duplicados por SKU en los productos de Tienda Nube
     productos_existentes_dict = {}
     productos_duplicados = {}
 
+    # Productos con variaciones por el SKU de sus variantes: se comparan con los de Factusol para no
+    # crearlos otra vez, pero no entran en el chequeo de duplicados ni se ocultan
+    productos_variables_dict = {}
+
     # Verificar SKU duplicados en productos existentes (sin incluir productos con variaciones)
     for prod in productos_existentes:
         # Si el producto tiene variaciones, lo excluimos del chequeo de SKU duplicados
         if "variants" in prod and len(prod["variants"]) > 1:
+            for variant in prod["variants"]:
+                productos_variables_dict.setdefault(normalizar_sku(variant.get("sku")), prod)
             continue  # Ignoramos productos con variaciones en este chequeo
 
         for variant in prod.get("variants", []):
@@ -530,12 +1021,11 @@ def sincronizar_productos(productos_nuevos, log_func, stop_event, gestionar_prec
     productos_nuevos_dict = {normalizar_sku(prod.get("sku")): prod for prod in productos_nuevos}
 
     total_productos_procesados = 0
-    total_productos = len(productos_nuevos)
 
     for producto_nuevo in productos_nuevos:
         if stop_event and stop_event.is_set():
             log_func("Sincronización cancelada.")
-            return
+            return None
 
         total_productos_procesados += 1
         sku = normalizar_sku(producto_nuevo.get("sku", ""))
@@ -548,7 +1038,7 @@ def sincronizar_productos(productos_nuevos, log_func, stop_event, gestionar_prec
         if sku in productos_duplicados:
             # Alerta destacada en el log
             log_func(f"\n**ALERTA CRÍTICA**: Se detectaron múltiples productos en Tienda Nube con el mismo SKU '{sku}'. No se realizará ninguna acción hasta que se corrija este error.\n")
-            
+
             for producto in productos_duplicados[sku]:
                 log_func(f"Producto duplicado con ID {producto['id']} y nombre '{producto.get('name', {}).get('es', 'Sin nombre')}'")
 
@@ -556,20 +1046,23 @@ def sincronizar_productos(productos_nuevos, log_func, stop_event, gestionar_prec
             continue
 
         # Verificar si el producto ya existe
-        producto_existente = productos_existentes_dict.get(sku)
+        producto_existente = productos_existentes_dict.get(sku) or productos_variables_dict.get(sku)
 
         if producto_existente:
             log_func(f"Comparando producto existente con SKU: {sku}")
-            if productos_iguales(producto_existente, producto_nuevo):
+            if productos_iguales(producto_existente, producto_nuevo, gestionar_precio, gestionar_stock):
                 log_func(f"El producto SKU: {sku} ya está actualizado. Verificando variantes...")
-                actualizar_variantes(producto_existente["id"], producto_nuevo.get("variants", []))
+                operaciones.extend(planificar_actualizacion_variantes(
+                    producto_existente["id"], producto_nuevo.get("variants", []), producto_existente.get("variants", []), gestionar_precio, gestionar_stock
+                ))
             else:
                 log_func(f"Actualizando producto SKU: {sku}")
-                actualizar_producto(producto_existente["id"], producto_nuevo, producto_existente.get("variants", []), gestionar_precio, gestionar_stock)
+                operaciones.extend(planificar_actualizacion_producto(producto_existente["id"], producto_nuevo, producto_existente.get("variants", []), gestionar_precio, gestionar_stock))
+            operaciones.extend(planificar_categorias(producto_existente, producto_nuevo))
         else:
             if crear_productos:
                 log_func(f"Creando nuevo producto SKU: {sku}")
-                crear_producto(producto_nuevo)
+                operaciones.append(crear_operacion("crear_producto", sku, datos_api(producto_nuevo)))
             else:
                 log_func(f"El producto SKU: {sku} no existe en Tienda Nube y la opción 'Crear Productos' está deshabilitada.")
 
@@ -577,44 +1070,390 @@ def sincronizar_productos(productos_nuevos, log_func, stop_event, gestionar_prec
     for sku, producto_existente in productos_existentes_dict.items():
         if stop_event and stop_event.is_set():
             log_func("Sincronización cancelada.")
-            return
-        
+            return None
+
         # Si el producto ya no existe en Factusol, verificar si debe ser ocultado o eliminado
-        if sku not in productos_nuevos_dict:
+        if sku not in productos_nuevos_dict and sku not in skus_excluidos:
             # Verificamos si el producto ya está oculto en la tienda
             if not producto_existente.get("published", True):
                 log_func(f"El producto con SKU {sku} ya está oculto en la tienda, no se tomará ninguna acción.")
                 continue  # Si ya está oculto, no hacemos nada
 
-            # Si no está oculto y la opción es ocultar, lo ocultamos
             if accion_no_existentes == "Ocultar":
                 log_func(f"Ocultando producto con SKU: {sku} que ya no está en la base de datos.")
-                ocultar_producto(producto_existente["id"])  # Oculta el producto
-                productos_ocultados += 1  # Solo incrementa productos ocultados
+                operaciones.append(crear_operacion("ocultar_producto", sku, producto_id=producto_existente["id"]))
             else:
                 log_func(f"Eliminando producto con SKU: {sku} que ya no está en la base de datos.")
-                eliminar_producto(producto_existente["id"])  # Elimina el producto
-                productos_eliminados += 1  # Solo incrementa si realmente fue eliminado
-
-    # Mostrar el resumen de sincronización
-    log_func(f"\n--- Resumen de Sincronización ---")
-    log_func(f"Productos creados: {productos_creados}")
-    log_func(f"Productos actualizados: {productos_actualizados}")
-    log_func(f"Productos eliminados: {productos_eliminados}")
-    log_func(f"Productos ocultados en tienda: {productos_ocultados}")
-    log_func(f"Productos con SKUs duplicados en Tienda Nube: {len(productos_duplicados)}")
-    log_func(f"Total productos procesados: {total_productos_procesados}")
-    log_func(f"---------------------------------\n")
-
-    log_func("Sincronización manual completada.")
+                operaciones.append(crear_operacion("eliminar_producto", sku, producto_id=producto_existente["id"]))
 
+    opciones = {
+        "gestionar_precio": gestionar_precio,
+        "gestionar_stock": gestionar_stock,
+        "crear_productos": crear_productos,
+        "accion_no_existentes": accion_no_existentes
+    }
+    return construir_plan(operaciones, opciones, total_productos_procesados, sorted(productos_duplicados))
 
+def construir_plan(operaciones, opciones, total_productos_procesados, skus_duplicados=()):
+    # Lo más valioso primero: si la ejecución se corta o se limita en tiempo, ya se habrá aplicado
+    operaciones.sort(key=lambda operacion: operacion["prioridad"])
 
+    # Identificadores estables para registrar cada operación en el diario
+    for indice, operacion in enumerate(operaciones):
+        operacion["id"] = indice
 
+    return {
+        "version": 1,
+        "id": uuid.uuid4().hex,
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "opciones": opciones,
+        "total_productos_procesados": total_productos_procesados,
+        "skus_duplicados": list(skus_duplicados),
+        "operaciones": operaciones
+    }
 
+def guardar_plan(plan, ruta_plan):
+    """Guarda el plan en disco de forma atómica para poder revisarlo o aplicarlo más tarde."""
+    directorio = os.path.dirname(ruta_plan)
+    if directorio and not os.path.exists(directorio):
+        os.makedirs(directorio)
+
+    ruta_temporal = f"{ruta_plan}.tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(plan, archivo, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta_plan)
+    logging.info(f"Plan de sincronización con {len(plan['operaciones'])} operaciones guardado en {ruta_plan}")
+
+def cargar_plan(ruta_plan):
+    with open(ruta_plan, encoding='utf-8') as archivo:
+        plan = json.load(archivo)
+
+    if plan.get("version") != 1:
+        raise ValueError(f"Versión de plan no soportada: {plan.get('version')}")
+    return plan
+
+def resumir_plan(plan):
+    """Cantidad de operaciones del plan por tipo."""
+    resumen = {}
+    for operacion in plan["operaciones"]:
+        resumen[operacion["tipo"]] = resumen.get(operacion["tipo"], 0) + 1
+    return resumen
+
+def ejecutar_operacion(operacion):
+    """Ejecuta una operación del plan contra Tienda Nube. Retorna True si se aplicó correctamente."""
+    tipo = operacion["tipo"]
+
+    if tipo == "actualizar_variante":
+        return actualizar_variante(operacion["producto_id"], operacion["variante_id"], operacion["datos"])
+    if tipo == "crear_variante":
+        return crear_variante(operacion["producto_id"], operacion["datos"])
+    if tipo == "actualizar_producto":
+        return actualizar_producto(operacion["producto_id"], operacion["datos"])
+    if tipo == "crear_producto":
+        return crear_producto(operacion["datos"]) == 201
+    if tipo == "ocultar_producto":
+        return ocultar_producto(operacion["producto_id"])
+    if tipo == "eliminar_producto":
+        return eliminar_producto(operacion["producto_id"])
+
+    raise ValueError(f"Tipo de operación desconocido: {tipo}")
+
+def verificar_operacion_aplicada(operacion):
+    """
+    Comprueba en Tienda Nube si una creación que quedó a medias en el diario llegó a aplicarse,
+    para no duplicar productos o variantes al reanudar.
+    """
+    if operacion["tipo"] == "crear_producto":
+        return obtener_producto_por_sku(operacion["sku"]) is not None
+    if operacion["tipo"] == "crear_variante":
+        clave = clave_variante(operacion["datos"])
+        return any(clave_variante(v) == clave for v in obtener_variantes_existentes(operacion["producto_id"]))
+
+    # Las actualizaciones, ocultaciones y eliminaciones pueden repetirse sin efectos duplicados
+    return False
+
+def buscar_plan_pendiente(ruta_plan, diario):
+    """Devuelve el plan guardado si su aplicación quedó interrumpida y todavía es reciente."""
+    if not os.path.exists(ruta_plan):
+        return None
+
+    try:
+        plan = cargar_plan(ruta_plan)
+    except (ValueError, OSError) as e:
+        logging.warning(f"No se pudo leer el plan guardado en {ruta_plan}: {e}")
+        return None
+
+    if not diario.pendiente(plan.get("id")):
+        return None
+
+    if datetime.now() - datetime.fromisoformat(plan["creado"]) > ANTIGUEDAD_MAXIMA_PLAN:
+        logging.info(f"El plan interrumpido del {plan['creado']} es demasiado antiguo y no se reanudará.")
+        return None
+
+    return plan
+
+def aplicar_plan(plan, log_func, stop_event=None, max_operaciones=None, diario=None, tiempo_limite=None, estado_remoto=None):
+    """
+    Ejecuta las operaciones de un plan en orden de prioridad.
+    max_operaciones y tiempo_limite (segundos) permiten aplicar el plan por lotes; las operaciones
+    no ejecutadas quedan como pendientes.
+    Con un diario, cada operación se registra antes y después de ejecutarse y las que ya se
+    aplicaron en una ejecución anterior del mismo plan se omiten.
+    Con un estado_remoto, las operaciones aplicadas se reflejan en él y se guarda al terminar.
+    """
+    contadores = tienda_actual().reiniciar_contadores()
+
+    estados = {}
+    if diario:
+        diario.iniciar_plan(plan["id"])
+        estados = diario.estados
+
+    operaciones = [op for op in plan["operaciones"] if estados.get(op["id"]) != "ok"]
+    omitidas = len(plan["operaciones"]) - len(operaciones)
+    if max_operaciones is not None:
+        operaciones = operaciones[:max_operaciones]
+
+    if omitidas:
+        log_func(f"Reanudando plan del {plan.get('creado', '')}: {omitidas} operaciones ya aplicadas se omiten.")
+    log_func(f"Aplicando plan del {plan.get('creado', '')} con {len(operaciones)} operaciones.")
+
+    aplicadas = 0
+    errores = 0
+    skus_con_error = set()
+    cancelada = False
+    limite = time.monotonic() + tiempo_limite if tiempo_limite else None
+
+    with estadisticas.en_curso().etapa("aplicacion"):
+        for operacion in operaciones:
+            if stop_event and stop_event.is_set():
+                log_func("Sincronización cancelada.")
+                cancelada = True
+                break
 
+            if limite and time.monotonic() >= limite:
+                log_func(f"Se alcanzó el tiempo límite de {tiempo_limite} segundos. Las operaciones restantes quedan pendientes.")
+                break
 
+            try:
+                if estados.get(operacion["id"]) == "iniciada" and verificar_operacion_aplicada(operacion):
+                    log_func(f"La operación {operacion['tipo']} para SKU {operacion['sku']} ya se había aplicado antes de la interrupción.")
+                    exito = True
+                else:
+                    if diario:
+                        diario.registrar(operacion["id"], "iniciada")
+                    exito = ejecutar_operacion(operacion)
+            except requests.RequestException as e:
+                logging.error(f"Error de conexión al ejecutar {operacion['tipo']} para SKU {operacion['sku']}: {e}")
+                exito = False
+
+            if diario:
+                diario.registrar(operacion["id"], "ok" if exito else "error")
+            if estado_remoto and exito:
+                estado_remoto.aplicar_operacion(operacion)
+
+            aplicadas += 1
+            if not exito:
+                errores += 1
+                skus_con_error.add(normalizar_sku(operacion["sku"]))
+
+    estadisticas.en_curso().contar("operaciones_aplicadas", aplicadas)
+    estadisticas.en_curso().contar("operaciones_con_error", errores)
+    pendientes = len(plan["operaciones"]) - omitidas - aplicadas
+    if estado_remoto:
+        estado_remoto.guardar()
+    if diario:
+        if pendientes == 0:
+            # Los errores quedan para la próxima sincronización completa, que recalcula el plan
+            diario.finalizar()
+        else:
+            diario.cerrar()
+
+    resumen = {
+        "creados": contadores["creados"],
+        "actualizados": contadores["actualizados"],
+        "eliminados": contadores["eliminados"],
+        "ocultados": contadores["ocultados"],
+        "errores": errores,
+        "skus_con_error": sorted(skus_con_error),
+        "omitidas": omitidas,
+        "pendientes": pendientes,
+        "skus_duplicados": len(plan.get("skus_duplicados", [])),
+        "total_productos_procesados": plan.get("total_productos_procesados", 0),
+        "reintentos": dict(tienda_actual().reintentos_por_endpoint),
+        "cancelada": cancelada
+    }
 
+    if cancelada:
+        return resumen
 
+    # Mostrar el resumen de sincronización
+    log_func(f"\n--- Resumen de Sincronización ---")
+    log_func(f"Productos creados: {contadores['creados']}")
+    log_func(f"Productos actualizados: {contadores['actualizados']}")
+    log_func(f"Productos eliminados: {contadores['eliminados']}")
+    log_func(f"Productos ocultados en tienda: {contadores['ocultados']}")
+    log_func(f"Productos con SKUs duplicados en Tienda Nube: {resumen['skus_duplicados']}")
+    log_func(f"Total productos procesados: {resumen['total_productos_procesados']}")
+    log_func(f"Operaciones con error: {errores}")
+    for endpoint, cantidad in sorted(tienda_actual().reintentos_por_endpoint.items()):
+        log_func(f"Reintentos {endpoint}: {cantidad}")
+    if resumen["pendientes"]:
+        log_func(f"Operaciones pendientes para el próximo lote: {resumen['pendientes']}")
+    log_func(f"---------------------------------\n")
 
+    return resumen
+
+def sincronizar_productos(productos_nuevos, log_func, stop_event, gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes, ruta_plan=None, solo_planificar=False, ruta_diario=None, tiempo_limite=None, ruta_estado=None, skus_excluidos=()):
+    """
+    Planifica y aplica la sincronización. Si se indica ruta_plan el plan queda guardado para revisarlo;
+    con solo_planificar no se realiza ninguna escritura en Tienda Nube.
+    Con ruta_plan y ruta_diario, un plan que quedó interrumpido se reanuda en lugar de recalcularse.
+    Con ruta_estado se guarda la copia local de los productos de Tienda Nube que usa la sincronización de stock.
+    """
+    tienda_actual().reintentos_por_endpoint.clear()
+    diario = DiarioOperaciones(ruta_diario) if ruta_diario else None
+    estado_remoto = EstadoRemoto(ruta_estado) if ruta_estado else None
+
+    if diario and ruta_plan and not solo_planificar:
+        plan_pendiente = buscar_plan_pendiente(ruta_plan, diario)
+        if plan_pendiente:
+            log_func(f"Se encontró una sincronización interrumpida del {plan_pendiente['creado']}. Reanudando...")
+            resumen = aplicar_plan(plan_pendiente, log_func, stop_event, diario=diario, tiempo_limite=tiempo_limite, estado_remoto=estado_remoto)
+            if not resumen["cancelada"]:
+                log_func("Sincronización reanudada completada.")
+            return resumen
+
+    with estadisticas.en_curso().etapa("obtencion_remota"):
+        productos_existentes = obtener_productos_existentes()
+    estadisticas.en_curso().contar("productos_remotos", len(productos_existentes))
+    if estado_remoto:
+        estado_remoto.reemplazar(productos_existentes)
+        estado_remoto.guardar()
+
+    with estadisticas.en_curso().etapa("diferencias"):
+        plan = planificar_sincronizacion(
+            productos_nuevos, productos_existentes, log_func, stop_event,
+            gestionar_precio, gestionar_stock, crear_productos, accion_no_existentes, skus_excluidos
+        )
+    if plan is None:
+        return None
+
+    log_func(f"Plan de sincronización calculado: {resumir_plan(plan) or 'sin cambios'}")
+    if ruta_plan:
+        guardar_plan(plan, ruta_plan)
+
+    if solo_planificar:
+        log_func("Planificación completada. No se realizaron cambios en Tienda Nube.")
+        return {"operaciones": resumir_plan(plan), "planificada": True}
+
+    resumen = aplicar_plan(plan, log_func, stop_event, diario=diario, tiempo_limite=tiempo_limite, estado_remoto=estado_remoto)
+    if not resumen["cancelada"]:
+        log_func("Sincronización manual completada.")
+    return resumen
+
+def leer_stock_factusol(csv_directory, almacenes=None):
+    """
+    Lee el stock exportado con tablas_stock. Devuelve el stock de los artículos simples por SKU y el
+    de las variantes por (SKU, talla, color), solo para artículos publicados en la web, con el mismo
+    criterio que procesar_csv_a_json (suma de los almacenes configurados, sin negativos).
+    """
+    def leer_csv(nombre):
+        ruta = os.path.join(csv_directory, nombre)
+        if not os.path.exists(ruta):
+            return []
+        with open(ruta, newline='', encoding='utf-8') as file:
+            return list(csv.DictReader(file, delimiter=';'))
+
+    articulos_web = {normalizar_sku(row["CODART"]) for row in leer_csv("F_ART.csv") if row.get("SUWART") == "1"}
+
+    comprobar_almacenes(leer_csv("F_ALM.csv"), almacenes)
+    stock_simple, stock_variantes = indexar_stock(leer_csv("F_STO.csv"), leer_csv("F_STC.csv"), clave=normalizar_sku)
+    stock_simple = {sku: stock for sku, stock in stock_simple.items() if sku in articulos_web}
+    stock_variantes = {clave: stock for clave, stock in stock_variantes.items() if clave[0] in articulos_web}
+
+    return articulos_web, stock_simple, stock_variantes
+
+def exportar_y_leer_stock(access_file_path, csv_directory, log_func, almacenes=None):
+    """Exporta el stock de access_file_path a csv_directory/stock y lo lee con leer_stock_factusol."""
+    directorio_stock = os.path.join(csv_directory, "stock")
+    exportar_a_csv(access_file_path, directorio_stock, send_to_gui=log_func, tablas=tablas_stock(almacenes))
+    return leer_stock_factusol(directorio_stock, almacenes)
+
+def planificar_stock(estado_remoto, articulos_web, stock_simple, stock_variantes, skus=None):
+    """
+    Plan con solo los cambios de stock respecto del último stock conocido en Tienda Nube.
+    Con skus se limita a esos artículos. Las variantes se identifican como en la sincronización
+    completa (clave_variante: SKU y valores ordenados), sin depender del orden de las propiedades.
+    Las variantes sin stock en Tienda Nube (None: stock ilimitado o no gestionado) no se tocan.
+    """
+    operaciones = []
+
+    stock_por_valores = {}
+    stock_por_talla = {}
+    for (sku, talla, color), stock in stock_variantes.items():
+        stock_por_valores[(sku, tuple(sorted(valor for valor in (talla, color) if valor)))] = stock
+        if not color:
+            stock_por_talla[(sku, talla)] = stock
+
+    for producto in estado_remoto.productos.values():
+        for variante in producto["variants"]:
+            sku = normalizar_sku(variante.get("sku"))
+            if sku not in articulos_web or (skus is not None and sku not in skus) or variante.get("stock") is None:
+                continue
+
+            valores = clave_variante(variante)[1]
+            if valores:
+                stock = stock_por_valores.get((sku, valores))
+                if stock is None and len(valores) > 1:
+                    # F_STC sin colores: el stock de la talla, esté la talla en la posición que esté
+                    stock = next((stock_por_talla[(sku, valor)] for valor in valores if (sku, valor) in stock_por_talla), None)
+                # Las variantes sin fila en F_STC quedan con stock 0, igual que en la sincronización completa
+                stock = stock if stock is not None else 0
+            else:
+                stock = stock_simple.get(sku)
+                if stock is None:
+                    continue
 
+            if int(variante["stock"]) != stock:
+                operaciones.append(crear_operacion("actualizar_variante", sku, {"stock": stock}, producto["id"], variante.get("id"), ["stock"]))
+
+    return construir_plan(operaciones, {"modo": "stock"}, len(articulos_web))
+
+def sincronizar_stock(access_file_path, csv_directory, log_func, stop_event, ruta_estado, skus=None, leer_stock=None, almacenes=None):
+    """
+    Sincronización rápida: exporta solo las columnas de stock, compara con el último stock conocido
+    de Tienda Nube (estado guardado por la sincronización completa) y envía solo los cambios de stock.
+    Con skus solo se comparan esos artículos. leer_stock reemplaza la exportación y lectura del stock
+    de access_file_path (por ejemplo, para combinar varias bases); devuelve lo mismo que leer_stock_factusol.
+    almacenes limita el stock a esos almacenes de F_ALM (por defecto, la suma de todos).
+    """
+    tienda_actual().reintentos_por_endpoint.clear()
+    estado_remoto = EstadoRemoto(ruta_estado)
+    if estado_remoto.vacio():
+        log_func("No hay un estado de Tienda Nube guardado. Ejecute primero una sincronización completa.")
+        return None
+
+    if leer_stock:
+        with estadisticas.en_curso().etapa("exportacion"):
+            articulos_web, stock_simple, stock_variantes = leer_stock(csv_directory)
+    else:
+        directorio_stock = os.path.join(csv_directory, "stock")
+        with estadisticas.en_curso().etapa("exportacion"):
+            exportar_a_csv(access_file_path, directorio_stock, send_to_gui=log_func, tablas=tablas_stock(almacenes))
+
+    if stop_event and stop_event.is_set():
+        log_func("Sincronización de stock cancelada.")
+        return None
+
+    if not leer_stock:
+        with estadisticas.en_curso().etapa("transformacion"):
+            articulos_web, stock_simple, stock_variantes = leer_stock_factusol(directorio_stock, almacenes)
+    estadisticas.en_curso().contar("productos", len(articulos_web))
+    with estadisticas.en_curso().etapa("diferencias"):
+        plan = planificar_stock(estado_remoto, articulos_web, stock_simple, stock_variantes, {normalizar_sku(sku) for sku in skus} if skus is not None else None)
+    log_func(f"Sincronización de stock: {len(plan['operaciones'])} variantes con stock distinto al de Tienda Nube (estado del {estado_remoto.actualizado}).")
+
+    resumen = aplicar_plan(plan, log_func, stop_event, estado_remoto=estado_remoto)
+    if not resumen["cancelada"]:
+        log_func("Sincronización de stock completada.")
+    return resumen
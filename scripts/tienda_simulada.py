@@ -0,0 +1,228 @@
+# scripts/tienda_simulada.py
+
+import json
+import math
+import time
+import threading
+from urllib.parse import unquote, urlsplit, parse_qs
+
+# Campos de variante que acepta la simulación al crear o actualizar
+CAMPOS_VARIANTE = ("sku", "price", "stock", "cost", "barcode", "values", "promotional_price", "weight")
+POR_PAGINA_MAXIMO = 200
+
+
+def normalizar_sku(sku):
+    # Igual que scripts.sincronizador.normalizar_sku, sin cargar el sincronizador en el emulador
+    return sku.strip().upper() if sku else ""
+
+class TiendaSimulada:
+    """
+    Catálogo de productos y categorías en memoria que responde como la API de Tienda Nube, para
+    medir y probar la sincronización sin conexión. manejar() recibe método, URL y cuerpo y devuelve
+    (estado HTTP, cuerpo, cabeceras), de modo que puede servirse desde un adaptador de requests o
+    desde Flask.
+    """
+
+    def __init__(self, user_id="1"):
+        self.user_id = str(user_id)
+        self.productos = {}
+        self.categorias = {}
+        self._siguiente_id = 1
+        self._bloqueo = threading.Lock()
+
+    def _nuevo_id(self):
+        nuevo = self._siguiente_id
+        self._siguiente_id += 1
+        return nuevo
+
+    def _crear_variante(self, datos):
+        variante = {campo: datos.get(campo) for campo in CAMPOS_VARIANTE}
+        variante["values"] = variante["values"] or []
+        variante["id"] = self._nuevo_id()
+        return variante
+
+    def _categorias_producto(self, ids):
+        # Como Tienda Nube: se reciben IDs y se devuelven las categorías completas
+        return [self.categorias[categoria_id] for categoria_id in ids or [] if categoria_id in self.categorias]
+
+    def _crear_producto(self, datos):
+        producto = {
+            "id": self._nuevo_id(),
+            "name": datos.get("name", {}),
+            "description": datos.get("description", {}),
+            "published": datos.get("published", True),
+            "attributes": datos.get("attributes", []),
+            "categories": self._categorias_producto(datos.get("categories")),
+            "variants": []
+        }
+        producto["variants"] = [self._crear_variante(variante) for variante in datos.get("variants") or [{}]]
+        self.productos[producto["id"]] = producto
+        return producto
+
+    def cargar(self, productos):
+        """Carga productos con el formato de procesar_csv_a_json; se les asignan IDs nuevos."""
+        with self._bloqueo:
+            for producto in productos:
+                self._crear_producto(producto)
+
+    def vaciar(self):
+        with self._bloqueo:
+            self.productos.clear()
+            self.categorias.clear()
+
+    def manejar(self, metodo, url, cuerpo=None):
+        partes = urlsplit(url)
+        params = {clave: valores[0] for clave, valores in parse_qs(partes.query).items()}
+        ruta = [unquote(segmento) for segmento in partes.path.strip("/").split("/")]
+
+        # /v1/{user_id}/products/...
+        if len(ruta) < 3 or ruta[0] != "v1" or ruta[1] != self.user_id:
+            return 404, {"description": "Not Found"}, {}
+
+        datos = json.loads(cuerpo) if cuerpo else {}
+        with self._bloqueo:
+            return self._despachar(metodo, ruta[2:], params, datos, f"{partes.scheme}://{partes.netloc}{partes.path}")
+
+    def _despachar(self, metodo, ruta, params, datos, url_base):
+        if ruta[0] == "categories":
+            return self._despachar_categorias(metodo, ruta, params, datos, url_base)
+        if ruta[0] != "products":
+            return 404, {"description": "Not Found"}, {}
+
+        if len(ruta) == 1:
+            if metodo == "GET":
+                return self._listar(params, url_base)
+            if metodo == "POST":
+                return 201, self._crear_producto(datos), {}
+
+        if len(ruta) == 3 and ruta[1] == "sku" and metodo == "GET":
+            buscado = normalizar_sku(ruta[2])
+            for producto in self.productos.values():
+                if any(normalizar_sku(variante.get("sku")) == buscado for variante in producto["variants"]):
+                    return 200, producto, {}
+            return 404, {"description": "Not Found"}, {}
+
+        try:
+            producto = self.productos.get(int(ruta[1]))
+        except ValueError:
+            producto = None
+        if producto is None:
+            return 404, {"description": "Not Found"}, {}
+
+        if len(ruta) == 2:
+            if metodo == "GET":
+                return 200, producto, {}
+            if metodo == "PUT":
+                producto.update({clave: valor for clave, valor in datos.items() if clave in ("name", "description", "published", "attributes")})
+                if "categories" in datos:
+                    producto["categories"] = self._categorias_producto(datos["categories"])
+                return 200, producto, {}
+            if metodo == "DELETE":
+                del self.productos[producto["id"]]
+                return 200, {}, {}
+
+        if len(ruta) >= 3 and ruta[2] == "variants":
+            if len(ruta) == 3:
+                if metodo == "GET":
+                    return 200, producto["variants"], {}
+                if metodo == "POST":
+                    variante = self._crear_variante(datos)
+                    producto["variants"].append(variante)
+                    return 201, variante, {}
+
+            if len(ruta) == 4:
+                variante = next((v for v in producto["variants"] if str(v["id"]) == ruta[3]), None)
+                if variante is None:
+                    return 404, {"description": "Not Found"}, {}
+                if metodo == "GET":
+                    return 200, variante, {}
+                if metodo == "PUT":
+                    variante.update({clave: valor for clave, valor in datos.items() if clave in CAMPOS_VARIANTE})
+                    return 200, variante, {}
+
+        return 405, {"description": "Method Not Allowed"}, {}
+
+    def _despachar_categorias(self, metodo, ruta, params, datos, url_base):
+        if len(ruta) == 1:
+            if metodo == "GET":
+                return self._listar(params, url_base, self.categorias)
+            if metodo == "POST":
+                categoria = {"id": self._nuevo_id(), "name": datos.get("name", {}), "parent": datos.get("parent"), "subcategories": []}
+                self.categorias[categoria["id"]] = categoria
+                return 201, categoria, {}
+
+        try:
+            categoria = self.categorias.get(int(ruta[1]))
+        except ValueError:
+            categoria = None
+        if categoria is None:
+            return 404, {"description": "Not Found"}, {}
+
+        if metodo == "GET":
+            return 200, categoria, {}
+        if metodo == "PUT":
+            categoria.update({clave: valor for clave, valor in datos.items() if clave in ("name", "parent")})
+            return 200, categoria, {}
+        if metodo == "DELETE":
+            del self.categorias[categoria["id"]]
+            return 200, {}, {}
+        return 405, {"description": "Method Not Allowed"}, {}
+
+    def _listar(self, params, url_base, coleccion=None):
+        pagina = max(int(params.get("page", 1)), 1)
+        por_pagina = min(max(int(params.get("per_page", 30)), 1), POR_PAGINA_MAXIMO)
+        elementos = list((self.productos if coleccion is None else coleccion).values())
+        desde = (pagina - 1) * por_pagina
+        if desde >= len(elementos) and pagina > 1:
+            return 404, {"description": "Last page is 0"}, {}
+
+        cabeceras = {}
+        enlaces = []
+        if desde + por_pagina < len(elementos):
+            enlaces.append(f'<{url_base}?page={pagina + 1}&per_page={por_pagina}>; rel="next"')
+        if pagina > 1:
+            enlaces.append(f'<{url_base}?page={pagina - 1}&per_page={por_pagina}>; rel="prev"')
+        if enlaces:
+            cabeceras["Link"] = ", ".join(enlaces)
+        cabeceras["x-total-count"] = str(len(elementos))
+        return 200, elementos[desde:desde + por_pagina], cabeceras
+
+
+class CuboLlamadas:
+    """
+    Límite de tasa como el de Tienda Nube: un cubo con capacidad para `capacidad` solicitudes que
+    se vacía a `ritmo` solicitudes por segundo. Con el cubo lleno la solicitud se rechaza con 429 y
+    Retry-After con los segundos hasta que quepa una solicitud.
+    Las cabeceras x-rate-limit-* siguen el formato de la API (reset en milisegundos hasta que el
+    cubo queda vacío).
+    """
+
+    def __init__(self, capacidad=40, ritmo=2.0):
+        self.capacidad = capacidad
+        self.ritmo = ritmo
+        self.nivel = 0.0
+        self.rechazadas = 0
+        self._ultimo = time.monotonic()
+        self._bloqueo = threading.Lock()
+
+    def consumir(self):
+        """Registra una solicitud. Devuelve (permitida, cabeceras)."""
+        with self._bloqueo:
+            ahora = time.monotonic()
+            self.nivel = max(self.nivel - (ahora - self._ultimo) * self.ritmo, 0.0)
+            self._ultimo = ahora
+
+            permitida = self.nivel + 1 <= self.capacidad
+            if permitida:
+                self.nivel += 1
+            else:
+                self.rechazadas += 1
+
+            cabeceras = {
+                "x-rate-limit-limit": str(self.capacidad),
+                "x-rate-limit-remaining": str(max(int(self.capacidad - self.nivel), 0) if permitida else 0),
+                "x-rate-limit-reset": str(int(self.nivel / self.ritmo * 1000))
+            }
+            if not permitida:
+                cabeceras["Retry-After"] = str(max(math.ceil((self.nivel + 1 - self.capacidad) / self.ritmo), 1))
+            return permitida, cabeceras
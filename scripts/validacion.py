@@ -0,0 +1,144 @@
+# scripts/validacion.py
+
+import logging
+
+from scripts.sincronizador import normalizar_sku
+
+# Categorías de problemas. Los SKU duplicados detienen la sincronización; el resto solo excluye el
+# producto, salvo las advertencias
+SKU_VACIO = "sku_vacio"
+SKU_DUPLICADO = "sku_duplicado"
+SIN_NOMBRE = "sin_nombre"
+SIN_VARIANTES = "sin_variantes"
+PRECIO_FALTANTE = "precio_faltante"
+PRECIO_INVALIDO = "precio_invalido"
+VARIANTE_SIN_VALORES = "variante_sin_valores"
+VALORES_INCOMPLETOS = "valores_incompletos"
+
+DESCRIPCIONES = {
+    SKU_VACIO: "Productos sin SKU",
+    SKU_DUPLICADO: "SKUs duplicados en Factusol",
+    SIN_NOMBRE: "Productos sin nombre",
+    SIN_VARIANTES: "Productos sin variantes",
+    PRECIO_FALTANTE: "Productos sin precio en la tarifa (se sincronizan sin cambiar el precio en Tienda Nube)",
+    PRECIO_INVALIDO: "Productos con precio no válido",
+    VARIANTE_SIN_VALORES: "Productos con variantes sin talle ni color",
+    VALORES_INCOMPLETOS: "Productos con variantes que no tienen todos los atributos"
+}
+
+# Problemas que se informan sin excluir el producto: un artículo sin fila en la tarifa se sincroniza
+# igual (stock, variantes) y sin precio, que datos_variante no envía
+ADVERTENCIAS = {PRECIO_FALTANTE}
+
+# Ejemplos por categoría que se muestran en el log; el informe completo va en el resumen
+MAX_EJEMPLOS_LOG = 20
+
+
+def problema_precio(precio):
+    if precio is None or str(precio).strip() == "":
+        return PRECIO_FALTANTE
+    try:
+        if float(precio) < 0:
+            return PRECIO_INVALIDO
+    except ValueError:
+        return PRECIO_INVALIDO
+    return None
+
+def problemas_producto(producto, gestionar_precio):
+    """Problemas de un producto que harían fallar su alta o actualización en Tienda Nube."""
+    problemas = []
+
+    if not (producto.get("name") or {}).get("es", "").strip():
+        problemas.append((SIN_NOMBRE, ""))
+
+    variantes = producto.get("variants") or []
+    if not variantes:
+        problemas.append((SIN_VARIANTES, ""))
+
+    cantidad_atributos = len(producto.get("attributes") or [])
+    for variante in variantes:
+        valores = variante.get("values") or []
+        descripcion = "/".join(valor.get("es", "") for valor in valores) or "sin valores"
+
+        if gestionar_precio:
+            problema = problema_precio(variante.get("price"))
+            if problema:
+                problemas.append((problema, f"variante {descripcion}: {variante.get('price')!r}"))
+
+        if len(variantes) > 1 and not valores:
+            problemas.append((VARIANTE_SIN_VALORES, ""))
+        elif valores and len(valores) != cantidad_atributos:
+            # Tienda Nube exige un valor por cada atributo del producto
+            problemas.append((VALORES_INCOMPLETOS, f"variante {descripcion}"))
+
+    return problemas
+
+def validar_productos(productos, gestionar_precio=True):
+    """
+    Valida los productos transformados en una sola pasada, antes de cualquier llamada a la API.
+    Devuelve los productos válidos y un informe con los problemas por categoría:
+    {"total", "validos", "excluidos", "problemas": {categoría: [{"sku", "detalle"}]}, "skus_duplicados", "skus_excluidos"}.
+    """
+    problemas = {}
+    primeros_por_sku = {}
+    duplicados = {}
+    candidatos = []
+
+    def registrar(categoria, sku, detalle=""):
+        problemas.setdefault(categoria, []).append({"sku": sku, "detalle": detalle})
+
+    for producto in productos:
+        sku_original = producto.get("sku") or ""
+        sku = normalizar_sku(sku_original)
+
+        if not sku:
+            registrar(SKU_VACIO, "", (producto.get("name") or {}).get("es", ""))
+            continue
+
+        if sku in primeros_por_sku:
+            duplicados.setdefault(sku, [primeros_por_sku[sku]]).append(sku_original)
+            continue
+        primeros_por_sku[sku] = sku_original
+
+        encontrados = problemas_producto(producto, gestionar_precio)
+        # Se registra una vez cada categoría por producto
+        for categoria in dict.fromkeys(categoria for categoria, _ in encontrados):
+            detalles = [detalle for cat, detalle in encontrados if cat == categoria and detalle]
+            registrar(categoria, sku_original, "; ".join(detalles))
+
+        candidatos.append((sku, producto, any(categoria not in ADVERTENCIAS for categoria, _ in encontrados)))
+
+    for sku, originales in duplicados.items():
+        registrar(SKU_DUPLICADO, originales[0], f"{len(originales)} artículos: {', '.join(originales)}")
+
+    validos = [producto for sku, producto, con_problemas in candidatos if not con_problemas and sku not in duplicados]
+    skus_excluidos = sorted({sku for sku, _, con_problemas in candidatos if con_problemas} | set(duplicados))
+
+    return validos, {
+        "total": len(productos),
+        "validos": len(validos),
+        "excluidos": len(productos) - len(validos),
+        "problemas": problemas,
+        "skus_duplicados": sorted(originales[0] for originales in duplicados.values()),
+        "skus_excluidos": skus_excluidos
+    }
+
+def resumir_validacion(informe):
+    """Cantidad de productos por categoría de problema."""
+    return {categoria: len(casos) for categoria, casos in informe["problemas"].items()}
+
+def registrar_informe(informe, log_func=logging.info):
+    if not informe["problemas"]:
+        log_func(f"Validación: los {informe['total']} productos son válidos.")
+        return
+
+    if informe["excluidos"]:
+        log_func(f"Validación: {informe['validos']} productos válidos de {informe['total']}; {informe['excluidos']} excluidos de la sincronización.")
+    else:
+        log_func(f"Validación: los {informe['total']} productos son válidos, con advertencias.")
+    for categoria, casos in informe["problemas"].items():
+        log_func(f"{DESCRIPCIONES.get(categoria, categoria)}: {len(casos)}")
+        for caso in casos[:MAX_EJEMPLOS_LOG]:
+            log_func(f"  SKU '{caso['sku']}' {caso['detalle']}".rstrip())
+        if len(casos) > MAX_EJEMPLOS_LOG:
+            log_func(f"  ... y {len(casos) - MAX_EJEMPLOS_LOG} más.")
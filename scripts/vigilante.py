@@ -0,0 +1,93 @@
+# scripts/vigilante.py
+
+import os
+import time
+import logging
+import threading
+
+# Cada cuánto se revisa la fecha de modificación de la base de datos
+INTERVALO_SONDEO = 5.0
+# Tiempo sin cambios que se espera antes de sincronizar, para no hacerlo en medio de una edición
+ESPERA_SILENCIO = 60.0
+
+
+class VigilanteBaseDatos:
+    """
+    Vigila el archivo .accdb/.mdb de Factusol (o una lista de ellos) consultando su fecha de
+    modificación y tamaño (el sondeo funciona igual en Windows y en unidades de red, donde no hay
+    notificaciones del sistema). Cuando algún archivo cambió y luego pasa espera_silencio segundos sin cambios, llama a al_cambiar.
+    Si al_cambiar devuelve False (por ejemplo, porque había otra sincronización en curso), se
+    vuelve a intentar después de otro período de silencio.
+    al_cambiar recibe registrar_lectura, que la sincronización llama al terminar de exportar: la
+    propia lectura por ODBC puede tocar la fecha del archivo, así que los cambios durante la
+    sincronización se cuentan desde ahí y no desde el inicio.
+    """
+
+    def __init__(self, ruta, al_cambiar, espera_silencio=ESPERA_SILENCIO, intervalo=INTERVALO_SONDEO, log_func=logging.info):
+        self.rutas = [ruta] if isinstance(ruta, str) else list(ruta)
+        self.al_cambiar = al_cambiar
+        self.espera_silencio = espera_silencio
+        self.intervalo = intervalo
+        self.log_func = log_func
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        if self.activo():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="vigilante_base_datos", daemon=True)
+        self._hilo.start()
+        self.log_func(f"Vigilando cambios en {', '.join(self.rutas)} (se sincroniza tras {self.espera_silencio:.0f} segundos sin cambios).")
+
+    def detener(self):
+        self._detener.set()
+
+    def _firma(self):
+        firmas = []
+        for ruta in self.rutas:
+            try:
+                estado = os.stat(ruta)
+                firmas.append((estado.st_mtime_ns, estado.st_size))
+            except OSError:
+                firmas.append(None)
+        return tuple(firmas)
+
+    def _ciclo(self):
+        ultima_firma = self._firma()
+        ultimo_cambio = None
+
+        while not self._detener.wait(self.intervalo):
+            firma = self._firma()
+            if firma != ultima_firma:
+                ultima_firma = firma
+                ultimo_cambio = time.monotonic()
+                continue
+
+            if ultimo_cambio is None or time.monotonic() - ultimo_cambio < self.espera_silencio:
+                continue
+
+            self.log_func("Se detectaron cambios en la base de datos de Factusol. Iniciando sincronización incremental...")
+            leida = [ultima_firma]
+
+            def registrar_lectura():
+                leida[0] = self._firma()
+
+            try:
+                ejecutada = self.al_cambiar(registrar_lectura)
+            except Exception as e:
+                logging.error(f"Error en la sincronización por cambios en la base de datos: {e}")
+                ejecutada = True
+
+            ultima_firma = self._firma()
+            if ejecutada is False:
+                # No se pudo ejecutar: se reintenta tras otro período de silencio
+                ultimo_cambio = time.monotonic()
+            elif ultima_firma != leida[0]:
+                # Una edición hecha después de exportar quedó fuera: se arma otra sincronización
+                ultimo_cambio = time.monotonic()
+            else:
+                ultimo_cambio = None
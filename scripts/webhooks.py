@@ -0,0 +1,287 @@
+# scripts/webhooks.py
+
+import hmac
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from scripts.estado_remoto import EstadoRemoto
+
+# Cabecera con la firma HMAC-SHA256 del cuerpo que envía Tienda Nube
+CABECERA_FIRMA = "x-linkedstore-hmac-sha256"
+
+RECURSOS_SOPORTADOS = ("product", "order")
+
+# Un evento que falla se reintenta en los siguientes lotes hasta este número de veces
+MAX_INTENTOS_EVENTO = 5
+# Eventos por lote y espera para agrupar ráfagas (una venta suele disparar varios eventos seguidos)
+TAMANO_LOTE_EVENTOS = 100
+ESPERA_AGRUPACION = 2.0
+INTERVALO_REVISION = 30.0
+# Los eventos procesados se conservan este tiempo para poder revisarlos
+ANTIGUEDAD_MAXIMA_EVENTOS = timedelta(days=7)
+
+
+def firmar(cuerpo, secreto):
+    return hmac.new(secreto.encode('utf-8'), cuerpo, hashlib.sha256).hexdigest()
+
+def verificar_firma(cuerpo, firma, secreto):
+    return bool(firma) and hmac.compare_digest(firmar(cuerpo, secreto), firma)
+
+def interpretar_evento(datos):
+    """Devuelve (evento, recurso, recurso_id) de un webhook de Tienda Nube, o None si no se maneja."""
+    if not isinstance(datos, dict):
+        return None
+
+    evento = str(datos.get("event") or "")
+    recurso = evento.partition("/")[0]
+    if recurso not in RECURSOS_SOPORTADOS or datos.get("id") is None:
+        return None
+    return evento, recurso, str(datos["id"])
+
+
+class RegistroEventos:
+    """
+    Cola persistente (SQLite) de los webhooks recibidos. Los eventos pendientes del mismo recurso de
+    una tienda se agrupan en uno solo, ya que al procesarlo siempre se consulta el estado actual en
+    Tienda Nube.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with self._conectar() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS eventos ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " recibido TEXT NOT NULL,"
+                " evento TEXT NOT NULL,"
+                " recurso TEXT NOT NULL,"
+                " recurso_id TEXT NOT NULL,"
+                " tienda_id TEXT,"
+                " estado TEXT NOT NULL DEFAULT 'pendiente',"
+                " intentos INTEGER NOT NULL DEFAULT 0,"
+                " error TEXT)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS eventos_estado ON eventos (estado, recurso, recurso_id)")
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def agregar(self, evento, recurso, recurso_id, tienda_id=None):
+        """Registra un evento y devuelve su id (el del evento pendiente existente si se agrupó)."""
+        ahora = datetime.now().isoformat(timespec="seconds")
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                "SELECT id FROM eventos WHERE estado = 'pendiente' AND recurso = ? AND recurso_id = ? AND COALESCE(tienda_id, '') = ?",
+                (recurso, recurso_id, tienda_id or "")
+            ).fetchone()
+            if fila:
+                conexion.execute("UPDATE eventos SET evento = ?, recibido = ? WHERE id = ?", (evento, ahora, fila[0]))
+                return fila[0]
+
+            cursor = conexion.execute(
+                "INSERT INTO eventos (recibido, evento, recurso, recurso_id, tienda_id) VALUES (?, ?, ?, ?, ?)",
+                (ahora, evento, recurso, recurso_id, tienda_id)
+            )
+            return cursor.lastrowid
+
+    def pendientes(self, limite=TAMANO_LOTE_EVENTOS, tiendas=None):
+        """Eventos pendientes, los más antiguos primero; con tiendas, solo los de esos tienda_id ("" para los que no lo traen)."""
+        consulta = "SELECT id, evento, recurso, recurso_id, intentos FROM eventos WHERE estado = 'pendiente'"
+        parametros = []
+        if tiendas is not None:
+            consulta += f" AND COALESCE(tienda_id, '') IN ({', '.join('?' for _ in tiendas)})"
+            parametros.extend(tiendas)
+        with self._conectar() as conexion:
+            filas = conexion.execute(f"{consulta} ORDER BY id LIMIT ?", (*parametros, limite)).fetchall()
+        return [dict(zip(("id", "evento", "recurso", "recurso_id", "intentos"), fila)) for fila in filas]
+
+    def marcar_procesados(self, ids):
+        with self._conectar() as conexion:
+            conexion.executemany("UPDATE eventos SET estado = 'procesado', error = NULL WHERE id = ?", [(i,) for i in ids])
+
+    def marcar_error(self, evento_id, error):
+        """Cuenta el intento fallido; el evento sigue pendiente hasta agotar MAX_INTENTOS_EVENTO."""
+        with self._conectar() as conexion:
+            conexion.execute(
+                "UPDATE eventos SET intentos = intentos + 1, error = ?,"
+                " estado = CASE WHEN intentos + 1 >= ? THEN 'error' ELSE 'pendiente' END WHERE id = ?",
+                (str(error), MAX_INTENTOS_EVENTO, evento_id)
+            )
+
+    def contar(self):
+        with self._conectar() as conexion:
+            return dict(conexion.execute("SELECT estado, COUNT(*) FROM eventos GROUP BY estado").fetchall())
+
+    def purgar(self):
+        limite = (datetime.now() - ANTIGUEDAD_MAXIMA_EVENTOS).isoformat(timespec="seconds")
+        with self._conectar() as conexion:
+            conexion.execute("DELETE FROM eventos WHERE estado != 'pendiente' AND recibido < ?", (limite,))
+
+
+class ProcesadorWebhooks:
+    """
+    Hilo que procesa los eventos registrados: vuelve a consultar en Tienda Nube los productos
+    afectados, actualiza con ellos el estado remoto local y pide una resincronización dirigida
+    solo de esos SKU, una por ráfaga de eventos. Las órdenes solo cambian el stock; en los
+    productos modificados en Tienda Nube también hay que revisar el precio y las variantes.
+
+    obtener_producto(id), obtener_orden(id) y resincronizar(skus, skus_productos) se inyectan para
+    poder probar el procesador con un emisor y una API falsos; skus_productos son los SKU que
+    llegaron por eventos de producto. resincronizar debe devolver False si no pudo ejecutarse (por
+    ejemplo, porque hay otra sincronización en curso); esos SKU se reintentan.
+    Con varias tiendas hay un procesador por tienda, cada uno con su estado remoto y solo los
+    eventos de sus tiendas (los tienda_id del registro; None procesa todos).
+    en_exclusiva(funcion) ejecuta cada ráfaga con el bloqueo de las sincronizaciones (ver
+    planificador.ejecutar_en_exclusiva), ya que se escribe el mismo estado remoto; si devuelve
+    False, los eventos siguen pendientes hasta la próxima revisión.
+    """
+
+    def __init__(self, registro, ruta_estado, obtener_producto, obtener_orden, resincronizar=None, log_func=logging.info, tiendas=None, en_exclusiva=None):
+        self.registro = registro
+        self.ruta_estado = ruta_estado
+        self.tiendas = tiendas
+        self.en_exclusiva = en_exclusiva
+        self.obtener_producto = obtener_producto
+        self.obtener_orden = obtener_orden
+        self.resincronizar = resincronizar
+        self.log_func = log_func
+        self.skus_pendientes = set()
+        self.skus_productos = set()
+        self._aviso = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._ciclo, name="webhooks", daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._aviso.set()
+
+    def notificar(self):
+        """Avisa al hilo que llegó un evento nuevo."""
+        self._aviso.set()
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            self._aviso.wait(INTERVALO_REVISION)
+            if self._detener.is_set():
+                break
+            self._aviso.clear()
+            # Se deja pasar un momento para procesar juntos los eventos de una misma ráfaga
+            time.sleep(ESPERA_AGRUPACION)
+            try:
+                if self.en_exclusiva:
+                    self.en_exclusiva(self.procesar_rafaga)
+                else:
+                    self.procesar_rafaga()
+                self.registro.purgar()
+            except Exception as e:
+                logging.error(f"Error al procesar los webhooks: {e}")
+
+    def procesar_rafaga(self):
+        while self.procesar_pendientes(resincronizar=False)["eventos"] == TAMANO_LOTE_EVENTOS:
+            pass
+        # Una sola resincronización (y una sola lectura de Factusol) por ráfaga
+        self.resincronizar_pendientes()
+
+    def procesar_pendientes(self, resincronizar=True):
+        """Procesa un lote de eventos. Devuelve {"eventos", "errores", "skus"}."""
+        eventos = self.registro.pendientes(tiendas=self.tiendas)
+        if not eventos and not self.skus_pendientes:
+            return {"eventos": 0, "errores": 0, "skus": []}
+
+        estado = EstadoRemoto(self.ruta_estado)
+        procesados = []
+        errores = 0
+        productos_consultados = {}
+
+        if estado.vacio():
+            # Sin una sincronización completa previa no hay estado que mantener al día
+            self.log_func("Webhooks recibidos, pero no hay un estado de Tienda Nube guardado. Ejecute primero una sincronización completa.")
+            self.registro.marcar_procesados([evento["id"] for evento in eventos])
+            return {"eventos": len(eventos), "errores": 0, "skus": []}
+
+        for evento in eventos:
+            try:
+                skus = self._refrescar(estado, evento, productos_consultados)
+                self.skus_pendientes.update(skus)
+                if evento["recurso"] == "product":
+                    self.skus_productos.update(skus)
+                procesados.append(evento["id"])
+            except Exception as e:
+                logging.warning(f"No se pudo procesar el evento {evento['evento']} {evento['recurso_id']}: {e}")
+                self.registro.marcar_error(evento["id"], e)
+                errores += 1
+
+        if procesados:
+            estado.guardar()
+            self.registro.marcar_procesados(procesados)
+
+        skus = sorted(self.skus_pendientes)
+        if resincronizar:
+            self.resincronizar_pendientes()
+        return {"eventos": len(eventos), "errores": errores, "skus": skus}
+
+    def resincronizar_pendientes(self):
+        skus = sorted(self.skus_pendientes)
+        if skus and self.resincronizar:
+            self.log_func(f"Webhooks: resincronizando {len(skus)} SKU afectados.")
+            if self.resincronizar(skus, sorted(self.skus_productos & self.skus_pendientes)) is not False:
+                self.skus_pendientes.clear()
+                self.skus_productos.clear()
+
+    def _refrescar_producto(self, estado, producto_id, productos_consultados):
+        if producto_id not in productos_consultados:
+            productos_consultados[producto_id] = self.obtener_producto(producto_id)
+
+        producto = productos_consultados[producto_id]
+        if producto is None:
+            estado.quitar_producto(producto_id)
+            return set()
+
+        estado.actualizar_producto(producto)
+        return {variante["sku"] for variante in producto.get("variants", []) if variante.get("sku")}
+
+    def _refrescar(self, estado, evento, productos_consultados):
+        """Actualiza el estado con el recurso del evento y devuelve los SKU afectados."""
+        if evento["recurso"] == "product":
+            return self._refrescar_producto(estado, evento["recurso_id"], productos_consultados)
+
+        orden = self.obtener_orden(evento["recurso_id"])
+        skus = set()
+        for item in (orden or {}).get("products", []):
+            if item.get("product_id") is not None:
+                skus |= self._refrescar_producto(estado, str(item["product_id"]), productos_consultados)
+        return skus
+
+
+def enviar_evento(url, evento, recurso_id, secreto=None, tienda_id=None):
+    """Emisor de prueba: envía un webhook firmado como lo haría Tienda Nube."""
+    import requests
+
+    cuerpo = json.dumps({"store_id": tienda_id, "event": evento, "id": recurso_id}).encode('utf-8')
+    headers = {"Content-Type": "application/json"}
+    if secreto:
+        headers[CABECERA_FIRMA] = firmar(cuerpo, secreto)
+    return requests.post(url, data=cuerpo, headers=headers, timeout=10)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    if len(sys.argv) != 4:
+        print("Uso: python -m scripts.webhooks URL EVENTO ID   (por ejemplo http://localhost:5000/webhook product/updated 123)")
+        sys.exit(1)
+
+    respuesta = enviar_evento(sys.argv[1], sys.argv[2], sys.argv[3], secreto=os.getenv("TIENDANUBE_CLIENT_SECRET"))
+    print(respuesta.status_code, respuesta.text)
@@ -0,0 +1,33 @@
+# tests/test_configuracion.py
+
+import unittest
+import configparser
+
+from scripts.configuracion import cargar_opciones
+
+
+def configuracion(**valores):
+    config = configparser.ConfigParser()
+    config.read_dict({"DEFAULT": valores})
+    return config
+
+
+class PruebaOpciones(unittest.TestCase):
+
+    def test_valores_por_defecto(self):
+        opciones = cargar_opciones(configuracion())
+        self.assertIsNone(opciones["tiempo_limite"])
+        self.assertEqual(opciones["espera_cambios_segundos"], 60)
+
+    def test_tiempo_limite_en_segundos(self):
+        self.assertEqual(cargar_opciones(configuracion(tiempo_limite_minutos="1.5"))["tiempo_limite"], 90)
+
+    def test_numeros_no_validos(self):
+        for clave, valor in (("tiempo_limite_minutos", "diez"), ("tiempo_limite_minutos", "0"), ("espera_cambios_segundos", "-5")):
+            with self.subTest(clave=clave, valor=valor):
+                with self.assertRaisesRegex(ValueError, f"no válido en config.txt: '{valor}'"):
+                    cargar_opciones(configuracion(**{clave: valor}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# tests/test_diario.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from scripts.diario import DiarioOperaciones
+
+
+class PruebaDiario(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, "diario_sincronizacion.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def diario_interrumpido(self):
+        diario = DiarioOperaciones(self.ruta)
+        diario.iniciar_plan("plan-1")
+        diario.registrar("op-1", "iniciada")
+        diario.registrar("op-1", "ok")
+        diario.registrar("op-2", "iniciada")
+        diario.cerrar()
+
+    def test_reanuda_el_plan_interrumpido(self):
+        self.diario_interrumpido()
+
+        diario = DiarioOperaciones(self.ruta)
+
+        self.assertTrue(diario.pendiente("plan-1"))
+        self.assertFalse(diario.pendiente("plan-2"))
+        self.assertEqual(diario.estados, {"op-1": "ok", "op-2": "iniciada"})
+
+        diario.iniciar_plan("plan-1")
+        diario.registrar("op-2", "error")
+        diario.cerrar()
+        self.assertEqual(DiarioOperaciones(self.ruta).estados, {"op-1": "ok", "op-2": "error"})
+
+    def test_plan_nuevo_reemplaza_el_diario(self):
+        self.diario_interrumpido()
+
+        diario = DiarioOperaciones(self.ruta)
+        diario.iniciar_plan("plan-2")
+        diario.cerrar()
+
+        diario = DiarioOperaciones(self.ruta)
+        self.assertEqual((diario.plan_id, diario.estados), ("plan-2", {}))
+
+    def test_plan_finalizado_no_queda_pendiente(self):
+        diario = DiarioOperaciones(self.ruta)
+        diario.iniciar_plan("plan-1")
+        diario.registrar("op-1", "ok")
+        diario.finalizar()
+
+        diario = DiarioOperaciones(self.ruta)
+        self.assertFalse(diario.pendiente("plan-1"))
+
+        # Volver a aplicar el mismo plan ya terminado empieza de cero
+        diario.iniciar_plan("plan-1")
+        self.assertEqual(diario.estados, {})
+        diario.cerrar()
+
+    def test_ignora_la_ultima_linea_incompleta(self):
+        self.diario_interrumpido()
+        with open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write('{"evento": "ok", "opera')
+
+        with self.assertLogs(level="WARNING"):
+            diario = DiarioOperaciones(self.ruta)
+
+        self.assertTrue(diario.pendiente("plan-1"))
+        self.assertEqual(diario.estados, {"op-1": "ok", "op-2": "iniciada"})
+
+    def test_sin_diario(self):
+        diario = DiarioOperaciones(os.path.join(self.directorio, "no_existe", "diario.jsonl"))
+
+        self.assertIsNone(diario.plan_id)
+        self.assertFalse(diario.pendiente("plan-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+# tests/test_fuentes.py
+
+import os
+import csv
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from scripts.fuentes import FuenteCSV, FuenteSQLite, agregado, crear_fuente, crear_base_sqlite
+
+
+def leer_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        return list(csv.reader(archivo, delimiter=';'))
+
+
+class PruebaFuentes(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.salida = os.path.join(self.directorio, "salida.csv")
+
+        self.ruta_sqlite = os.path.join(self.directorio, "factusol.sqlite")
+        crear_base_sqlite(self.ruta_sqlite, {
+            "F_ART": [["A", "Remera", "", "1", "", 5.0, "F1"], ["B", "Pantalón", "", "0", "", None, "F1"]],
+            "F_STO": [["GEN", "A", 3.0], ["DEP", "A", 2.0], ["GEN", "B", 1.0], ["OUT", "B", 4.0]]
+        })
+
+        self.ruta_csv = os.path.join(self.directorio, "csv")
+        os.makedirs(self.ruta_csv)
+        with open(os.path.join(self.ruta_csv, "F_STO.csv"), 'w', newline='', encoding='utf-8') as archivo:
+            archivo.write("ALMSTO;ARTSTO;DISSTO\nGEN;A;3\nDEP;A;2\nGEN;B;1\nOUT;B;4\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_crear_fuente_segun_la_ruta(self):
+        self.assertIsInstance(crear_fuente(self.ruta_csv), FuenteCSV)
+        self.assertIsInstance(crear_fuente(self.ruta_sqlite), FuenteSQLite)
+
+    def test_sqlite_exporta_columnas(self):
+        filas = FuenteSQLite(self.ruta_sqlite).exportar_tabla("F_ART", ["CODART", "SUWART", "PCOART"], self.salida)
+
+        self.assertEqual(filas, 2)
+        self.assertEqual(leer_csv(self.salida), [["CODART", "SUWART", "PCOART"], ["A", "1", "5.0"], ["B", "0", ""]])
+
+    def test_sqlite_no_crea_una_base_inexistente(self):
+        ruta = os.path.join(self.directorio, "no_existe.sqlite")
+        with self.assertRaises(FuenteSQLite.error_conexion):
+            FuenteSQLite(ruta).exportar_tabla("F_ART", ["CODART"], self.salida)
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_csv_exporta_columnas(self):
+        filas = FuenteCSV(self.ruta_csv).exportar_tabla("F_STO", ["ARTSTO", "DISSTO"], self.salida)
+
+        self.assertEqual(filas, 4)
+        self.assertEqual(leer_csv(self.salida)[:2], [["ARTSTO", "DISSTO"], ["A", "3"]])
+
+    def test_csv_columna_faltante(self):
+        with self.assertRaises(ValueError):
+            FuenteCSV(self.ruta_csv).exportar_tabla("F_STO", ["ARTSTO", "NOEXISTE"], self.salida)
+
+    def test_agregado_igual_en_sqlite_y_csv(self):
+        columnas = agregado(["ARTSTO"], ["DISSTO"], {"ALMSTO": ["GEN", "DEP"]})
+
+        FuenteSQLite(self.ruta_sqlite).exportar_tabla("F_STO", columnas, self.salida)
+        desde_sqlite = leer_csv(self.salida)
+        FuenteCSV(self.ruta_csv).exportar_tabla("F_STO", columnas, self.salida)
+        desde_csv = leer_csv(self.salida)
+
+        self.assertEqual(desde_sqlite[0], ["ARTSTO", "DISSTO"])
+        self.assertEqual(sorted(desde_sqlite[1:]), [["A", "5.0"], ["B", "1.0"]])
+        self.assertEqual(desde_csv, desde_sqlite)
+
+    def test_agregado_sin_filtro(self):
+        FuenteCSV(self.ruta_csv).exportar_tabla("F_STO", agregado(["ARTSTO"], ["DISSTO"], {"ALMSTO": []}), self.salida)
+
+        self.assertEqual(sorted(leer_csv(self.salida)[1:]), [["A", "5.0"], ["B", "5.0"]])
+
+
+class PruebaColumnasOpcionales(unittest.TestCase):
+    """Bases de versiones de Factusol sin algunas columnas de F_ART."""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.salida = os.path.join(self.directorio, "salida.csv")
+        self.ruta_sqlite = os.path.join(self.directorio, "antigua.sqlite")
+        conn = sqlite3.connect(self.ruta_sqlite)
+        conn.execute("CREATE TABLE F_ART (CODART TEXT, DESART TEXT, DEWART TEXT, SUWART TEXT)")
+        conn.execute("INSERT INTO F_ART VALUES ('A', 'Remera', '', '1')")
+        conn.commit()
+        conn.close()
+
+        self.ruta_csv = os.path.join(self.directorio, "csv")
+        os.makedirs(self.ruta_csv)
+        with open(os.path.join(self.ruta_csv, "F_ART.csv"), 'w', newline='', encoding='utf-8') as archivo:
+            archivo.write("CODART;DESART;DEWART;SUWART\nA;Remera;;1\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_se_exporta_sin_las_opcionales_faltantes(self):
+        columnas = ["CODART", "DESART", "SUWART", "EANART", "PCOART", "FAMART"]
+        for fuente in (FuenteSQLite(self.ruta_sqlite), FuenteCSV(self.ruta_csv)):
+            with self.subTest(fuente=fuente.descripcion()):
+                with self.assertLogs(level="WARNING") as registro:
+                    filas = fuente.exportar_tabla("F_ART", columnas, self.salida)
+
+                self.assertEqual(filas, 1)
+                self.assertEqual(leer_csv(self.salida), [["CODART", "DESART", "SUWART"], ["A", "Remera", "1"]])
+                self.assertIn("EANART, PCOART, FAMART", registro.output[0])
+
+    def test_falta_una_obligatoria(self):
+        for fuente in (FuenteSQLite(self.ruta_sqlite), FuenteCSV(self.ruta_csv)):
+            with self.subTest(fuente=fuente.descripcion()):
+                with self.assertRaisesRegex(ValueError, "Faltan las columnas CE1ARC"):
+                    fuente.exportar_tabla("F_ART", ["CODART", "CE1ARC"], self.salida)
+
+    def test_la_transformacion_lee_la_exportacion_sin_opcionales(self):
+        from scripts.sincronizador import COLUMNAS_ARTICULOS, procesar_csv_a_json
+
+        FuenteSQLite(self.ruta_sqlite).exportar_tabla("F_ART", COLUMNAS_ARTICULOS + ["FAMART"], os.path.join(self.directorio, "F_ART.csv"))
+        productos = procesar_csv_a_json([os.path.join(self.directorio, "F_ART.csv")], categorias=True)
+
+        self.assertEqual(productos[0]["categorias_factusol"], [])
+        self.assertEqual((productos[0]["variants"][0]["barcode"], productos[0]["variants"][0]["cost"]), ("", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
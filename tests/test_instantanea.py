@@ -0,0 +1,51 @@
+# tests/test_instantanea.py
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from scripts import sincronizador
+from scripts.configuracion import obtener_ruta_instantanea, obtener_ruta_tienda
+from scripts.pipeline import cargar_instantanea, guardar_instantanea, guardar_instantaneas, skus_con_error
+from scripts.sincronizador import ContextoTienda, aplicar_plan, construir_plan, crear_operacion
+
+
+class PruebaInstantaneaConErrores(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.opciones = {"csv_path": self.directorio}
+        self.tienda = ContextoTienda("principal", "token", "1")
+        ruta_tienda = obtener_ruta_tienda(self.directorio, "principal")
+        os.makedirs(ruta_tienda, exist_ok=True)
+        self.ruta = obtener_ruta_instantanea(ruta_tienda)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_aplicar_plan_informa_los_skus_con_error(self):
+        plan = construir_plan([
+            crear_operacion("actualizar_variante", "a1", {"price": 1}, 1, 11, ["price"]),
+            crear_operacion("actualizar_variante", "B2", {"price": 2}, 2, 21, ["price"])
+        ], {}, 2)
+        with mock.patch.object(sincronizador, "ejecutar_operacion", side_effect=[False, True]):
+            resumen = aplicar_plan(plan, log_func=lambda mensaje: None)
+        self.assertEqual((resumen["errores"], resumen["skus_con_error"]), (1, ["A1"]))
+
+    def test_skus_con_error_de_todas_las_tiendas(self):
+        adicionales = {"mayorista": {"estado": "completada", "sincronizacion": {"skus_con_error": ["B"]}, "estadisticas": {}}}
+        self.assertEqual(skus_con_error({"skus_con_error": ["A"]}, adicionales), {"A", "B"})
+
+    def test_la_instantanea_no_avanza_para_los_skus_con_error(self):
+        guardar_instantanea(self.ruta, {"A": "a0", "B": "b0", "QUITADO": "q0", "BORRADO": "x0"})
+
+        # A cambió y falló; QUITADO ya no está en Factusol y falló al ocultarlo; BORRADO se quitó bien
+        guardar_instantaneas([self.tienda], self.opciones, {"A": "a1", "B": "b1", "C": "c1"}, {"A", "QUITADO"})
+
+        self.assertEqual(cargar_instantanea(self.ruta), {"B": "b1", "C": "c1", "QUITADO": "q0"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+# tests/test_memoria.py
+
+import time
+import unittest
+
+from scripts.memoria import MedidorMemoria
+
+
+def asignar_y_soltar():
+    temporal = [bytes(1000) for _ in range(20000)]
+    # Lo suficiente para que el muestreo vea el pico
+    time.sleep(0.2)
+    del temporal
+    return [bytes(100) for _ in range(100)]
+
+
+class PruebaMedidorMemoria(unittest.TestCase):
+
+    def test_sitios_en_el_pico_y_no_al_terminar(self):
+        medidor = MedidorMemoria(usar_tracemalloc=True)
+        try:
+            with medidor.etapa("transformacion"):
+                asignar_y_soltar()
+        finally:
+            medidor.detener()
+
+        datos = medidor.etapas["transformacion"]
+        self.assertGreater(datos["python_pico_mb"], 15)
+        principal = datos["sitios_pico"][0]
+        # La lista temporal ya no existe al terminar, pero es la que marca el pico
+        self.assertIn("test_memoria.py", principal["sitio"])
+        self.assertGreater(principal["mb"], 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
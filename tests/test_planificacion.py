@@ -0,0 +1,45 @@
+# tests/test_planificacion.py
+
+import unittest
+
+from scripts.sincronizador import planificar_sincronizacion
+
+
+def variante(sku, precio, stock, *valores, variante_id=None):
+    datos = {"sku": sku, "price": precio, "stock": stock, "values": [{"es": valor} for valor in valores]}
+    if variante_id is not None:
+        datos["id"] = variante_id
+    return datos
+
+def planificar(nuevos, existentes):
+    plan = planificar_sincronizacion(nuevos, existentes, lambda mensaje: None, None, True, True, True, "Ocultar")
+    return [(operacion["tipo"], operacion["sku"], operacion["variante_id"]) for operacion in plan["operaciones"]]
+
+
+class PruebaProductosConVariantes(unittest.TestCase):
+
+    def setUp(self):
+        # Las variantes de un artículo de Factusol comparten el SKU (CODART)
+        self.nuevo = {
+            "sku": "REMERA", "name": {"es": "Remera"}, "attributes": [{"es": "Talle"}],
+            "variants": [variante("REMERA", "10", 3, "S"), variante("REMERA", "10", 5, "M")]
+        }
+
+    def existente(self, stock_m):
+        return {"id": 1, "published": True, "variants": [
+            variante("REMERA", "10", 3, "S", variante_id=11), variante("REMERA", "10", stock_m, "M", variante_id=12)
+        ]}
+
+    def test_no_se_crea_otra_vez(self):
+        self.assertEqual(planificar([self.nuevo], [self.existente(5)]), [])
+
+    def test_se_actualiza_la_variante_de_sus_valores(self):
+        self.assertEqual(planificar([self.nuevo], [self.existente(1)]), [("actualizar_variante", "REMERA", 12)])
+
+    def test_no_se_oculta_ni_cuenta_como_duplicado(self):
+        otro = dict(self.existente(5), id=2)
+        self.assertEqual(planificar([], [self.existente(5), otro]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
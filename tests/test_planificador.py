@@ -0,0 +1,153 @@
+# tests/test_planificador.py
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import importlib.util
+from datetime import datetime, timedelta
+
+from unittest import mock
+
+from scripts import planificador as modulo_planificador
+from scripts.planificador import (
+    BloqueoArchivo, PlanificadorSincronizacion, bloqueo_sincronizacion, crear_trigger, ejecutar_en_exclusiva, interpretar_programaciones,
+    sincronizacion_en_curso
+)
+
+HAY_APSCHEDULER = importlib.util.find_spec("apscheduler") is not None
+
+
+class SchedulerFalso:
+    """Lo que usa el planificador de un BackgroundScheduler al registrar una ejecución."""
+
+    def get_jobs(self):
+        return []
+
+
+class PruebaEjecucionExclusiva(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta_bloqueo = os.path.join(self.directorio, "sincronizacion.lock")
+        parche = mock.patch.object(modulo_planificador, "ruta_bloqueo", self.ruta_bloqueo)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_se_omite_si_hay_otra_en_curso(self):
+        llamadas = []
+        with bloqueo_sincronizacion:
+            self.assertFalse(ejecutar_en_exclusiva(lambda: llamadas.append(1), "stock", log_func=lambda mensaje: None))
+        self.assertEqual(llamadas, [])
+
+    def test_libera_el_bloqueo_aunque_falle(self):
+        def fallar():
+            raise RuntimeError("error")
+
+        with self.assertRaises(RuntimeError):
+            ejecutar_en_exclusiva(fallar, "completa")
+        self.assertFalse(sincronizacion_en_curso())
+        self.assertTrue(ejecutar_en_exclusiva(lambda: None, "completa"))
+
+    def test_se_omite_si_otro_proceso_tiene_el_archivo(self):
+        otro_proceso = BloqueoArchivo(self.ruta_bloqueo)
+        self.assertTrue(otro_proceso.adquirir())
+        try:
+            self.assertFalse(BloqueoArchivo(self.ruta_bloqueo).adquirir())
+            llamadas = []
+            self.assertFalse(ejecutar_en_exclusiva(lambda: llamadas.append(1), "stock", log_func=lambda mensaje: None))
+            self.assertEqual(llamadas, [])
+            self.assertFalse(sincronizacion_en_curso())
+        finally:
+            otro_proceso.liberar()
+        self.assertTrue(ejecutar_en_exclusiva(lambda: None, "stock"))
+
+
+@unittest.skipUnless(HAY_APSCHEDULER, "requiere APScheduler")
+class PruebaCadencias(unittest.TestCase):
+
+    def test_cadencias_validas(self):
+        self.assertEqual(interpretar_programaciones("completa 02:00; stock cada 10m; incremental cada 1h"), [
+            ("completa", "02:00"), ("stock", "cada 10m"), ("incremental", "cada 1h")
+        ])
+
+    def test_intervalo_cero_no_es_valido(self):
+        for expresion in ("cada 0m", "cada 0h", "cada 00m"):
+            with self.assertRaisesRegex(ValueError, "Cadencia no válida"):
+                crear_trigger(expresion)
+
+
+class PruebaPlanificador(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta_estado = os.path.join(self.directorio, "programaciones.json")
+        parche = mock.patch.object(modulo_planificador, "ruta_bloqueo", os.path.join(self.directorio, "sincronizacion.lock"))
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_disparo_superpuesto_se_omite(self):
+        planificador = PlanificadorSincronizacion(self.ruta_estado, log_func=lambda mensaje: None)
+        planificador.scheduler = SchedulerFalso()
+        llamadas = []
+
+        def completa():
+            llamadas.append("completa")
+            # Un disparo de stock mientras corre la completa
+            planificador._ejecutar("stock cada 10m", lambda: llamadas.append("stock"))
+
+        planificador._ejecutar("completa 02:00", completa)
+
+        self.assertEqual(llamadas, ["completa"])
+        with open(self.ruta_estado, encoding='utf-8') as archivo:
+            estado = json.load(archivo)
+        self.assertEqual(estado["completa 02:00"]["resultado"], "completada")
+        self.assertEqual(estado["stock cada 10m"]["resultado"], "omitida")
+
+    def test_error_queda_registrado(self):
+        planificador = PlanificadorSincronizacion(self.ruta_estado, log_func=lambda mensaje: None)
+        planificador.scheduler = SchedulerFalso()
+
+        def fallar():
+            raise RuntimeError("sin conexión")
+
+        with self.assertLogs(level="ERROR"):
+            planificador._ejecutar("stock cada 10m", fallar)
+        self.assertEqual(planificador.estado["stock cada 10m"]["resultado"], "error")
+        self.assertFalse(sincronizacion_en_curso())
+
+    @unittest.skipUnless(HAY_APSCHEDULER, "requiere APScheduler")
+    def test_programacion_vencida_se_ejecuta_una_sola_vez(self):
+        # La aplicación estuvo cerrada durante varios disparos: se agrupan en una sola ejecución
+        vencida = (datetime.now().astimezone() - timedelta(hours=3)).isoformat(timespec="seconds")
+        with open(self.ruta_estado, 'w', encoding='utf-8') as archivo:
+            json.dump({"stock cada 10m": {"proxima_ejecucion": vencida}}, archivo)
+
+        llamadas = []
+        planificador = PlanificadorSincronizacion(self.ruta_estado, log_func=lambda mensaje: None)
+        planificador.programar([("stock", "cada 10m")], {"stock": lambda: llamadas.append(1)})
+        try:
+            limite = time.monotonic() + 5
+            while not llamadas and time.monotonic() < limite:
+                time.sleep(0.05)
+            time.sleep(0.2)
+
+            self.assertEqual(llamadas, [1])
+            job = planificador.scheduler.get_job("stock cada 10m")
+            self.assertTrue(job.coalesce)
+            self.assertEqual(job.max_instances, 1)
+            self.assertGreater(datetime.fromisoformat(planificador.estado["stock cada 10m"]["proxima_ejecucion"]), datetime.now().astimezone())
+        finally:
+            planificador.detener()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# tests/test_reintentos.py
+
+import unittest
+from unittest import mock
+
+import requests
+
+from scripts import sincronizador
+from scripts.sincronizador import ESPERA_MAXIMA_REINTENTO, ESPERA_BASE_REINTENTO, REINTENTOS_MAXIMOS, calcular_espera_reintento, manejar_rate_limit, solicitar
+
+
+def respuesta(estado, headers=None):
+    response = requests.Response()
+    response.status_code = estado
+    response.headers.update(headers or {})
+    response._content = b"{}"
+    return response
+
+
+class PruebaEsperaReintento(unittest.TestCase):
+
+    def test_retry_after_limitado(self):
+        for _ in range(20):
+            espera = calcular_espera_reintento({"Retry-After": "3600"}, 0)
+            self.assertGreaterEqual(espera, ESPERA_MAXIMA_REINTENTO)
+            self.assertLessEqual(espera, ESPERA_MAXIMA_REINTENTO + 1)
+
+    def test_retry_after_en_segundos(self):
+        espera = calcular_espera_reintento({"Retry-After": "2"}, 3)
+        self.assertTrue(2 <= espera <= 3)
+
+    def test_rate_limit_reset_sin_restantes(self):
+        espera = calcular_espera_reintento({"x-rate-limit-remaining": "0", "x-rate-limit-reset": "4000"}, 0)
+        self.assertTrue(4 <= espera <= 5)
+
+    def test_cabeceras_mal_formadas_usan_backoff(self):
+        headers = {"Retry-After": "pronto", "x-rate-limit-remaining": "cero", "x-rate-limit-reset": "x"}
+        for intento in range(REINTENTOS_MAXIMOS):
+            espera = calcular_espera_reintento(headers, intento)
+            self.assertTrue(0 <= espera <= min(ESPERA_MAXIMA_REINTENTO, ESPERA_BASE_REINTENTO * 2 ** intento))
+
+    def test_jitter_dentro_del_tope(self):
+        for intento in range(12):
+            for _ in range(20):
+                espera = calcular_espera_reintento({}, intento)
+                self.assertTrue(0 <= espera <= min(ESPERA_MAXIMA_REINTENTO, ESPERA_BASE_REINTENTO * 2 ** intento))
+
+
+class PruebaRateLimit(unittest.TestCase):
+
+    def test_sin_cabeceras_no_espera(self):
+        with mock.patch("time.sleep") as dormir:
+            manejar_rate_limit({})
+            manejar_rate_limit({"x-rate-limit-remaining": "muchas"})
+        dormir.assert_not_called()
+
+    def test_pocas_restantes_espera_el_reset(self):
+        with mock.patch("time.sleep") as dormir:
+            manejar_rate_limit({"x-rate-limit-remaining": "2", "x-rate-limit-reset": "3000"})
+        dormir.assert_called_once_with(3.0)
+
+    def test_reset_mal_formado(self):
+        with mock.patch("time.sleep") as dormir:
+            manejar_rate_limit({"x-rate-limit-remaining": "2", "x-rate-limit-reset": "mañana"})
+        dormir.assert_called_once_with(1)
+
+
+class PruebaSolicitar(unittest.TestCase):
+
+    def solicitar_con(self, metodo, resultados):
+        """Llama a solicitar con una sesión que devuelve (o lanza) los resultados en orden."""
+        pendientes = list(resultados)
+
+        def request(*args, **kwargs):
+            resultado = pendientes.pop(0)
+            if isinstance(resultado, Exception):
+                raise resultado
+            return resultado
+
+        with mock.patch.object(sincronizador.tienda_principal.sesion, "request", side_effect=request) as llamada, mock.patch("time.sleep"):
+            try:
+                return solicitar(metodo, "http://tienda/v1/1/products", "products"), llamada.call_count
+            except requests.RequestException as e:
+                return e, llamada.call_count
+
+    def test_post_no_se_reintenta_con_500(self):
+        response, llamadas = self.solicitar_con("POST", [respuesta(500), respuesta(201)])
+        self.assertEqual((response.status_code, llamadas), (500, 1))
+
+    def test_post_se_reintenta_con_429_y_503(self):
+        response, llamadas = self.solicitar_con("POST", [respuesta(429, {"Retry-After": "0"}), respuesta(503), respuesta(201)])
+        self.assertEqual((response.status_code, llamadas), (201, 3))
+
+    def test_post_no_se_reintenta_si_se_corta_la_conexion(self):
+        error, llamadas = self.solicitar_con("POST", [requests.ConnectionError("cortada"), respuesta(201)])
+        self.assertIsInstance(error, requests.ConnectionError)
+        self.assertEqual(llamadas, 1)
+
+    def test_post_se_reintenta_si_no_llego_a_conectar(self):
+        response, llamadas = self.solicitar_con("POST", [requests.ConnectTimeout("sin conexión"), respuesta(201)])
+        self.assertEqual((response.status_code, llamadas), (201, 2))
+
+    def test_get_y_put_se_reintentan_con_5xx_y_errores_de_conexion(self):
+        for metodo in ("GET", "PUT"):
+            response, llamadas = self.solicitar_con(metodo, [respuesta(500), respuesta(502), requests.ConnectionError("cortada"), requests.ReadTimeout("lenta"), respuesta(200)])
+            self.assertEqual((metodo, response.status_code, llamadas), (metodo, 200, 5))
+
+    def test_se_devuelve_el_ultimo_error_al_agotar_los_reintentos(self):
+        response, llamadas = self.solicitar_con("GET", [respuesta(503)] * (REINTENTOS_MAXIMOS + 1))
+        self.assertEqual((response.status_code, llamadas), (503, REINTENTOS_MAXIMOS + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
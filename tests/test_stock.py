@@ -0,0 +1,67 @@
+# tests/test_stock.py
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from scripts.estado_remoto import EstadoRemoto
+from scripts.pipeline import ejecutar_sincronizacion_stock
+from scripts.sincronizador import planificar_stock
+
+
+def variante(variante_id, sku, stock, *valores):
+    return {"id": variante_id, "sku": sku, "stock": stock, "values": [{"es": valor} for valor in valores]}
+
+
+class PruebaPlanificarStock(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.estado = EstadoRemoto(os.path.join(self.directorio, "estado_remoto.json"))
+        self.estado.reemplazar([
+            {"id": 1, "variants": [variante(11, "SIMPLE", 5)]},
+            # Tienda Nube puede devolver las propiedades en otro orden que F_STC (color y luego talla)
+            {"id": 2, "variants": [variante(21, "REMERA", 1, "Rojo", "M"), variante(22, "REMERA", 1, "Azul", "M")]},
+            {"id": 3, "variants": [variante(31, "PANTALON", 0, "42", "Negro"), variante(32, "PANTALON", 4, "44", "Negro")]},
+            {"id": 4, "variants": [variante(41, "ILIMITADO", None)]}
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def operaciones(self, stock_simple, stock_variantes, skus=None):
+        articulos_web = {"SIMPLE", "REMERA", "PANTALON", "ILIMITADO"}
+        plan = planificar_stock(self.estado, articulos_web, stock_simple, stock_variantes, skus)
+        return {operacion["variante_id"]: operacion["datos"]["stock"] for operacion in plan["operaciones"]}
+
+    def test_variantes_por_valores_en_cualquier_orden(self):
+        operaciones = self.operaciones({"SIMPLE": 5}, {("REMERA", "M", "Rojo"): 7, ("REMERA", "M", "Azul"): 1})
+
+        self.assertEqual(operaciones, {21: 7, 32: 0})
+
+    def test_stock_de_la_talla_sin_colores(self):
+        operaciones = self.operaciones({}, {("PANTALON", "42", ""): 3, ("PANTALON", "44", ""): 4})
+
+        # REMERA no tiene filas en F_STC: sus variantes quedan en 0
+        self.assertEqual(operaciones, {31: 3, 21: 0, 22: 0})
+
+    def test_solo_los_skus_indicados(self):
+        operaciones = self.operaciones({"SIMPLE": 9}, {("PANTALON", "42", "Negro"): 3}, skus={"PANTALON"})
+
+        self.assertEqual(operaciones, {31: 3, 32: 0})
+
+    def test_no_toca_el_stock_no_gestionado(self):
+        operaciones = self.operaciones({"SIMPLE": 5, "ILIMITADO": 10}, {}, skus={"SIMPLE", "ILIMITADO"})
+
+        self.assertEqual(operaciones, {})
+
+    def test_stock_desactivado(self):
+        resumen = ejecutar_sincronizacion_stock({"gestionar_stock": False}, lambda mensaje: None, threading.Event())
+
+        self.assertEqual(resumen["estado"], "stock_desactivado")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# tests/test_tarifas.py
+
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+from scripts.sincronizador import datos_variante, procesar_csv_a_json
+
+
+class PruebaTarifas(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def tabla(self, nombre, filas):
+        ruta = os.path.join(self.directorio, nombre)
+        with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=list(filas[0]), delimiter=';')
+            escritor.writeheader()
+            escritor.writerows(filas)
+        return ruta
+
+    def productos(self, tarifa, filas_lta):
+        archivos = [
+            self.tabla("F_ART.csv", [
+                {"CODART": "A", "DESART": "Con precio", "SUWART": "1"},
+                {"CODART": "B", "DESART": "Sin fila en la tarifa", "SUWART": "1"}
+            ]),
+            self.tabla("F_TAR.csv", [{"CODTAR": "1"}, {"CODTAR": "2"}]),
+            self.tabla("F_LTA.csv", filas_lta),
+            self.tabla("F_STO.csv", [{"ARTSTO": "A", "ALMSTO": "GEN", "DISSTO": "3"}, {"ARTSTO": "B", "ALMSTO": "GEN", "DISSTO": "4"}])
+        ]
+        return {producto["sku"]: producto["variants"][0] for producto in procesar_csv_a_json(archivos, tarifa=tarifa)}
+
+    def test_articulo_sin_fila_en_la_tarifa_se_conserva_sin_precio(self):
+        variantes = self.productos("1", [{"ARTLTA": "A", "TARLTA": "1", "PRELTA": "10"}, {"ARTLTA": "B", "TARLTA": "2", "PRELTA": "20"}])
+
+        self.assertEqual(variantes["A"]["price"], "10")
+        self.assertIsNone(variantes["B"]["price"])
+        self.assertEqual(variantes["B"]["stock"], 4)
+        # No se envía precio: el de Tienda Nube no cambia
+        self.assertNotIn("price", datos_variante(variantes["B"]))
+
+    def test_aviso_si_la_tarifa_no_tiene_precios(self):
+        with self.assertLogs(level="WARNING") as registro:
+            variantes = self.productos("2", [{"ARTLTA": "A", "TARLTA": "1", "PRELTA": "10"}])
+
+        self.assertEqual(set(variantes), {"A", "B"})
+        self.assertTrue(any("Ningún artículo tiene precio en la tarifa 2" in mensaje for mensaje in registro.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# tests/test_validacion.py
+
+import unittest
+
+from scripts.validacion import (
+    validar_productos, resumir_validacion, SKU_VACIO, SKU_DUPLICADO, SIN_NOMBRE, SIN_VARIANTES, PRECIO_FALTANTE,
+    PRECIO_INVALIDO, VARIANTE_SIN_VALORES, VALORES_INCOMPLETOS
+)
+
+
+def producto(sku, nombre="Remera", variantes=None, atributos=None):
+    return {
+        "sku": sku,
+        "name": {"es": nombre},
+        "attributes": atributos or [],
+        "variants": variantes if variantes is not None else [{"sku": sku, "price": "10", "values": []}]
+    }
+
+def variante(sku, precio, *valores):
+    return {"sku": sku, "price": precio, "values": [{"es": valor} for valor in valores]}
+
+
+class PruebaValidacion(unittest.TestCase):
+
+    def test_productos_validos(self):
+        productos = [
+            producto("A"),
+            producto("B", variantes=[variante("B", "5", "S", "Rojo"), variante("B", "5", "M", "Rojo")], atributos=[{"es": "Talle"}, {"es": "Color"}])
+        ]
+        validos, informe = validar_productos(productos)
+
+        self.assertEqual(validos, productos)
+        self.assertEqual((informe["total"], informe["validos"], informe["excluidos"]), (2, 2, 0))
+        self.assertEqual(informe["problemas"], {})
+
+    def test_cada_problema_excluye_el_producto_salvo_las_advertencias(self):
+        productos = [
+            producto(""),
+            producto("NOMBRE", nombre="  "),
+            producto("VARIANTES", variantes=[]),
+            producto("FALTA", variantes=[variante("FALTA", "")]),
+            producto("NEGATIVO", variantes=[variante("NEGATIVO", "-1")]),
+            producto("TEXTO", variantes=[variante("TEXTO", "abc")]),
+            producto("SINVALORES", variantes=[variante("SINVALORES", "1"), variante("SINVALORES", "1", "M")], atributos=[{"es": "Talle"}]),
+            producto("INCOMPLETO", variantes=[variante("INCOMPLETO", "1", "M")], atributos=[{"es": "Talle"}, {"es": "Color"}]),
+            producto("BIEN")
+        ]
+        validos, informe = validar_productos(productos)
+
+        # Sin precio es solo una advertencia: el producto se sincroniza sin precio
+        self.assertEqual([p["sku"] for p in validos], ["FALTA", "BIEN"])
+        self.assertEqual(resumir_validacion(informe), {
+            SKU_VACIO: 1, SIN_NOMBRE: 1, SIN_VARIANTES: 1, PRECIO_FALTANTE: 1, PRECIO_INVALIDO: 2,
+            VARIANTE_SIN_VALORES: 1, VALORES_INCOMPLETOS: 1
+        })
+        self.assertEqual(informe["skus_excluidos"], ["INCOMPLETO", "NEGATIVO", "NOMBRE", "SINVALORES", "TEXTO", "VARIANTES"])
+
+    def test_precio_no_se_valida_si_no_se_gestiona(self):
+        validos, informe = validar_productos([producto("A", variantes=[variante("A", None)])], gestionar_precio=False)
+
+        self.assertEqual(len(validos), 1)
+        self.assertEqual(informe["problemas"], {})
+
+    def test_una_categoria_por_producto(self):
+        productos = [producto("A", variantes=[variante("A", "", "S"), variante("A", "", "M")], atributos=[{"es": "Talle"}])]
+        _, informe = validar_productos(productos)
+
+        self.assertEqual(len(informe["problemas"][PRECIO_FALTANTE]), 1)
+        self.assertIn("variante S", informe["problemas"][PRECIO_FALTANTE][0]["detalle"])
+
+    def test_skus_duplicados_tras_normalizar(self):
+        validos, informe = validar_productos([producto("ab-1"), producto(" AB-1 "), producto("C")])
+
+        self.assertEqual([p["sku"] for p in validos], ["C"])
+        self.assertEqual(informe["skus_duplicados"], ["ab-1"])
+        self.assertEqual(len(informe["problemas"][SKU_DUPLICADO]), 1)
+        self.assertEqual(informe["excluidos"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# tests/test_vigilante.py
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from scripts.vigilante import VigilanteBaseDatos
+
+
+class PruebaVigilante(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, "factusol.accdb")
+        self.marca = time.time_ns()
+        self.escribir(b"AAAA")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def tocar(self):
+        # Las fechas de algunos sistemas de archivos tienen poca resolución: cada cambio avanza un segundo
+        self.marca += 10**9
+        os.utime(self.ruta, ns=(self.marca, self.marca))
+
+    def escribir(self, contenido):
+        with open(self.ruta, 'wb') as archivo:
+            archivo.write(contenido)
+        self.tocar()
+
+    def vigilar(self, al_cambiar, llamadas_esperadas):
+        self.llamadas = []
+        vigilante = VigilanteBaseDatos(self.ruta, al_cambiar, espera_silencio=0.05, intervalo=0.01, log_func=lambda mensaje: None)
+        vigilante.iniciar()
+        try:
+            time.sleep(0.05)
+            self.escribir(b"BBBB")
+            limite = time.monotonic() + 3
+            while len(self.llamadas) < llamadas_esperadas and time.monotonic() < limite:
+                time.sleep(0.01)
+            time.sleep(0.3)
+        finally:
+            vigilante.detener()
+        return self.llamadas
+
+    def test_edicion_del_mismo_tamano_durante_la_sincronizacion(self):
+        def al_cambiar(registrar_lectura):
+            registrar_lectura()
+            self.llamadas.append(1)
+            if len(self.llamadas) == 1:
+                # Edición en el lugar, sin cambiar el tamaño, después de exportar
+                self.escribir(b"CCCC")
+
+        self.assertEqual(self.vigilar(al_cambiar, 2), [1, 1])
+
+    def test_la_lectura_de_la_exportacion_no_dispara_otra(self):
+        def al_cambiar(registrar_lectura):
+            # La exportación por ODBC toca la fecha del archivo
+            self.tocar()
+            registrar_lectura()
+            self.llamadas.append(1)
+
+        self.assertEqual(self.vigilar(al_cambiar, 1), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+# tests/test_webhooks.py
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from scripts.estado_remoto import EstadoRemoto
+from scripts.webhooks import MAX_INTENTOS_EVENTO, RegistroEventos, ProcesadorWebhooks, firmar, verificar_firma, interpretar_evento
+
+
+def producto(producto_id, *skus):
+    return {"id": producto_id, "variants": [{"id": producto_id * 10 + i, "sku": sku, "stock": 1} for i, sku in enumerate(skus)]}
+
+
+class PruebaFirma(unittest.TestCase):
+
+    def test_firma_correcta(self):
+        cuerpo = b'{"event": "product/updated", "id": 1}'
+        self.assertTrue(verificar_firma(cuerpo, firmar(cuerpo, "secreto"), "secreto"))
+
+    def test_firma_de_otro_cuerpo_o_secreto(self):
+        cuerpo = b'{"event": "product/updated", "id": 1}'
+        self.assertFalse(verificar_firma(cuerpo + b" ", firmar(cuerpo, "secreto"), "secreto"))
+        self.assertFalse(verificar_firma(cuerpo, firmar(cuerpo, "otro"), "secreto"))
+
+    def test_sin_firma(self):
+        self.assertFalse(verificar_firma(b"{}", None, "secreto"))
+        self.assertFalse(verificar_firma(b"{}", "", "secreto"))
+
+    def test_interpretar_evento(self):
+        self.assertEqual(interpretar_evento({"event": "order/paid", "id": 5}), ("order/paid", "order", "5"))
+        self.assertIsNone(interpretar_evento({"event": "app/uninstalled", "id": 5}))
+        self.assertIsNone(interpretar_evento({"event": "product/updated"}))
+        self.assertIsNone(interpretar_evento([]))
+
+
+class PruebaProcesador(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.registro = RegistroEventos(os.path.join(self.directorio, "webhooks.sqlite3"))
+        self.ruta_estado = os.path.join(self.directorio, "estado_remoto.json")
+        estado = EstadoRemoto(self.ruta_estado)
+        estado.reemplazar([producto(1, "A"), producto(2, "B")])
+        estado.guardar()
+
+        # API falsa de Tienda Nube
+        self.productos = {"1": producto(1, "A"), "2": producto(2, "B", "B2")}
+        self.ordenes = {"7": {"products": [{"product_id": 1}, {"product_id": 2}]}}
+        self.consultas = []
+        self.fallar = False
+        self.resincronizaciones = []
+        self.resincronizar_resultado = True
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def obtener_producto(self, producto_id):
+        self.consultas.append(producto_id)
+        if self.fallar:
+            raise ConnectionError("sin conexión")
+        return self.productos.get(producto_id)
+
+    def resincronizar(self, skus, skus_productos):
+        self.resincronizaciones.append((skus, skus_productos))
+        return self.resincronizar_resultado
+
+    def crear_procesador(self, **kwargs):
+        return ProcesadorWebhooks(
+            self.registro, self.ruta_estado, self.obtener_producto, self.ordenes.get,
+            resincronizar=self.resincronizar, log_func=lambda mensaje: None, **kwargs
+        )
+
+    def test_eventos_del_mismo_recurso_se_agrupan(self):
+        primero = self.registro.agregar("product/updated", "product", "1")
+        self.assertEqual(self.registro.agregar("product/updated", "product", "1"), primero)
+        self.assertNotEqual(self.registro.agregar("product/updated", "product", "2"), primero)
+
+        resultado = self.crear_procesador().procesar_pendientes()
+
+        self.assertEqual(resultado["eventos"], 2)
+        self.assertEqual(sorted(self.consultas), ["1", "2"])
+        self.assertEqual(self.registro.contar(), {"procesado": 2})
+
+    def test_orden_refresca_cada_producto_una_vez(self):
+        self.registro.agregar("order/paid", "order", "7")
+        self.registro.agregar("product/updated", "product", "2")
+
+        resultado = self.crear_procesador().procesar_pendientes()
+
+        self.assertEqual(sorted(self.consultas), ["1", "2"])
+        self.assertEqual(resultado["skus"], ["A", "B", "B2"])
+        # Solo los del producto modificado necesitan revisar el precio y las variantes
+        self.assertEqual(self.resincronizaciones, [(["A", "B", "B2"], ["B", "B2"])])
+        variantes = EstadoRemoto(self.ruta_estado).productos["2"]["variants"]
+        self.assertEqual([variante["sku"] for variante in variantes], ["B", "B2"])
+
+    def test_producto_borrado_sale_del_estado(self):
+        del self.productos["2"]
+        self.registro.agregar("product/deleted", "product", "2")
+
+        self.crear_procesador().procesar_pendientes()
+
+        self.assertNotIn("2", EstadoRemoto(self.ruta_estado).productos)
+
+    def test_evento_fallido_se_reintenta_hasta_el_maximo(self):
+        evento_id = self.registro.agregar("product/updated", "product", "1")
+        procesador = self.crear_procesador()
+        self.fallar = True
+
+        for intento in range(1, MAX_INTENTOS_EVENTO):
+            self.assertEqual(procesador.procesar_pendientes()["errores"], 1)
+            self.assertEqual(self.registro.pendientes()[0]["intentos"], intento)
+
+        procesador.procesar_pendientes()
+        self.assertEqual(self.registro.pendientes(), [])
+        with sqlite3.connect(self.registro.ruta) as conexion:
+            estado, intentos = conexion.execute("SELECT estado, intentos FROM eventos WHERE id = ?", (evento_id,)).fetchone()
+        self.assertEqual((estado, intentos), ("error", MAX_INTENTOS_EVENTO))
+
+    def test_evento_fallido_se_procesa_al_reintentar(self):
+        self.registro.agregar("product/updated", "product", "1")
+        procesador = self.crear_procesador()
+        self.fallar = True
+        procesador.procesar_pendientes()
+
+        self.fallar = False
+        resultado = procesador.procesar_pendientes()
+
+        self.assertEqual((resultado["errores"], resultado["skus"]), (0, ["A"]))
+        self.assertEqual(self.registro.contar(), {"procesado": 1})
+
+    def test_resincronizacion_omitida_se_reintenta(self):
+        self.registro.agregar("product/updated", "product", "1")
+        procesador = self.crear_procesador()
+        self.resincronizar_resultado = False
+        procesador.procesar_pendientes()
+        self.assertEqual(procesador.skus_pendientes, {"A"})
+
+        self.resincronizar_resultado = True
+        procesador.procesar_pendientes()
+
+        self.assertEqual(self.resincronizaciones, [(["A"], ["A"]), (["A"], ["A"])])
+        self.assertEqual(procesador.skus_pendientes, set())
+
+    def test_una_resincronizacion_por_rafaga(self):
+        self.registro.agregar("order/paid", "order", "7")
+        procesador = self.crear_procesador()
+        procesador.procesar_pendientes(resincronizar=False)
+        self.registro.agregar("product/updated", "product", "1")
+        procesador.procesar_pendientes(resincronizar=False)
+        self.assertEqual(self.resincronizaciones, [])
+
+        procesador.resincronizar_pendientes()
+
+        self.assertEqual(self.resincronizaciones, [(["A", "B", "B2"], ["A"])])
+        self.assertEqual((procesador.skus_pendientes, procesador.skus_productos), (set(), set()))
+
+    def test_sin_estado_remoto_se_descartan_los_eventos(self):
+        os.remove(self.ruta_estado)
+        self.registro.agregar("product/updated", "product", "1")
+
+        resultado = self.crear_procesador().procesar_pendientes()
+
+        self.assertEqual(resultado["skus"], [])
+        self.assertEqual(self.consultas, [])
+        self.assertEqual(self.registro.contar(), {"procesado": 1})
+
+    def test_cada_procesador_toma_los_eventos_de_su_tienda(self):
+        self.registro.agregar("product/updated", "product", "1", "100")
+        self.registro.agregar("product/updated", "product", "1", "200")
+        self.registro.agregar("product/updated", "product", "2", "")
+
+        resultado = self.crear_procesador(tiendas=("100", "")).procesar_pendientes()
+
+        self.assertEqual(resultado["eventos"], 2)
+        self.assertEqual([evento["recurso_id"] for evento in self.registro.pendientes()], ["1"])
+        self.assertEqual(len(self.registro.pendientes(tiendas=("200",))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()